@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: decoding fetched JSON the old way, json.loads(response.text),
+against lib/fast_json.loads(response.content), and against every
+accelerated backend installed here.
+
+Payloads are read from /tmp/raiplay_debug/*.json when present (set
+DEBUG_MODE in plugin.py to collect them on a receiver), otherwise
+synthetic catalogue, category and sport search documents are generated.
+The old path goes through a real requests Response, so its charset
+handling (header, or detection when the header has none) is included.
+
+    python bench/bench_json_decode.py
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+import requests
+
+PLUGIN_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..",
+    "usr", "lib", "enigma2", "python", "Plugins", "Extensions", "RaiPlay")
+sys.path.insert(0, os.path.join(PLUGIN_DIR, "lib"))
+
+import fast_json  # noqa: E402
+
+DEBUG_DIR = "/tmp/raiplay_debug"
+# Each measurement repeats the decode for at least this long
+MIN_SECONDS = 0.5
+
+
+def synthetic_documents():
+    programs = {"name": "Programmi - Tutti", "contents": {}}
+    for i in range(20000):
+        letter = chr(ord("A") + i % 26)
+        programs["contents"].setdefault(letter, []).append({
+            "name": "Programma {} à è ì".format(i),
+            "path_id": "/programmi/programma{}.json".format(i),
+            "type": "PLR programma Page",
+            "images": {"landscape": "/dl/img/{}-landscape.jpg".format(i)},
+            "description": "Descrizione del programma {} ".format(i) * 4
+        })
+    category = {"name": "Fiction", "blocks": [{
+        "name": "Blocco {}".format(b),
+        "sets": [{
+            "name": "Serie {}".format(s),
+            "path_id": "/programmi/serie{}.json".format(s),
+            "images": {"portrait": "/dl/img/{}.jpg".format(s)}
+        } for s in range(60)]
+    } for b in range(12)]}
+    hits = {"total": 500, "hits": [{
+        "data_type": "video",
+        "title": "Sintesi partita {}".format(i),
+        "media": {"mediapolis": "//mediapolisvod.rai.it/relinker/relinkerServlet.htm?cont={}".format(i)},
+        "date_published": "2025-10-{:02d}T20:45:00+02:00".format(1 + i % 28),
+        "description": "Gol e azioni salienti " * 6
+    } for i in range(500)]}
+    return [
+        ("programmi_tutti (synthetic)", json.dumps(programs, ensure_ascii=False).encode("utf-8")),
+        ("category (synthetic)", json.dumps(category, ensure_ascii=False).encode("utf-8")),
+        ("sport_hits (synthetic)", json.dumps(hits, ensure_ascii=False).encode("utf-8"))
+    ]
+
+
+def recorded_documents():
+    documents = []
+    for path in sorted(glob.glob(os.path.join(DEBUG_DIR, "*.json")),
+                       key=os.path.getsize, reverse=True)[:6]:
+        with open(path, "rb") as f:
+            payload = f.read()
+        try:
+            json.loads(payload)
+        except ValueError:
+            continue
+        documents.append((os.path.basename(path), payload))
+    return documents
+
+
+def response_for(payload, content_type):
+    response = requests.Response()
+    response._content = payload
+    response.status_code = 200
+    if content_type:
+        response.headers["Content-Type"] = content_type
+    return response
+
+
+def timed(decode, payload):
+    """Seconds per decode, best of three rounds"""
+    rounds = []
+    for _ in range(3):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            decode(payload)
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SECONDS / 3:
+                break
+        rounds.append(elapsed / count)
+    return min(rounds)
+
+
+def main():
+    documents = recorded_documents()
+    source = DEBUG_DIR
+    if not documents:
+        documents = synthetic_documents()
+        source = "synthetic"
+
+    variants = [
+        ("text+loads (json hdr)",
+         lambda p: json.loads(response_for(p, "application/json").text)),
+        ("text+loads (detected)",
+         lambda p: json.loads(response_for(p, None).text)),
+        ("json bytes", json.loads),
+        ("fast_json ({})".format(fast_json.JSON_BACKEND), fast_json.loads)
+    ]
+    for name in ("orjson", "ujson"):
+        try:
+            module = __import__(name)
+        except ImportError:
+            print("{} not installed".format(name))
+            continue
+        if name != fast_json.JSON_BACKEND:
+            variants.append((name, module.loads))
+
+    print("Documents: {} ({})".format(len(documents), source))
+    print("{:<28} {:>7}".format("document", "MB") + "".join(
+        " {:>24}".format(name) for name, decode in variants))
+    for label, payload in documents:
+        reference = json.loads(payload)
+        row = "{:<28} {:>7.2f}".format(label[:28], len(payload) / 1048576.0)
+        baseline = None
+        for name, decode in variants:
+            if decode(payload) != reference:
+                row += " {:>24}".format("differs")
+                continue
+            seconds = timed(decode, payload)
+            baseline = baseline or seconds
+            row += " {:>24}".format("{:.2f} ms ({:.2f}x)".format(
+                seconds * 1000, baseline / seconds))
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: peak RSS of loading a large catalogue with loads() against the
+incremental parser in lib/json_stream.py, keeping only the projected
+fields the screens use.
+
+Documents are read from /tmp/raiplay_debug/*.json when present,
+otherwise a synthetic A-Z catalogue (Programmi - Tutti layout) is
+generated. Every measurement runs in a fresh process.
+
+    python bench/bench_json_stream.py
+"""
+
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PLUGIN_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..",
+    "usr", "lib", "enigma2", "python", "Plugins", "Extensions", "RaiPlay")
+
+DEBUG_DIR = "/tmp/raiplay_debug"
+CHUNK_SIZE = 64 * 1024
+PATHS = [("contents", "*"), ("hits",), ("*",), ()]
+SYNTHETIC_PROGRAMS = 40000
+
+
+def project(item):
+    if not isinstance(item, dict):
+        return None
+    return (item.get("name", ""), item.get("path_id", ""), item.get("type", ""))
+
+
+def walk_full(node, keys=()):
+    """Elements of the arrays at PATHS in an already decoded document"""
+    if isinstance(node, list):
+        if any(len(p) == len(keys) and all(a == "*" or a == b for a, b in zip(p, keys))
+               for p in PATHS):
+            for item in node:
+                yield item
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            for item in walk_full(value, keys + (key,)):
+                yield item
+
+
+def child(mode, path):
+    sys.path.insert(0, os.path.join(PLUGIN_DIR, "lib"))
+    from json_stream import iter_json_items
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "full":
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8")
+        data = json.loads(text)
+        records = [project(item) for item in walk_full(data)]
+    else:
+        def chunks():
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+        records = [project(item) for item in iter_json_items(chunks(), PATHS)]
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"items": len(records), "rss_kb": peak - base,
+                      "peak_kb": peak, "seconds": elapsed}))
+
+
+def synthetic_document(directory):
+    letters = ["0-9"] + [chr(ord("A") + i) for i in range(26)]
+    contents = {letter: [] for letter in letters}
+    for i in range(SYNTHETIC_PROGRAMS):
+        contents[letters[i % len(letters)]].append({
+            "name": "Programma {}".format(i),
+            "path_id": "/programmi/programma{}.json".format(i),
+            "info_url": "/programmi/info/programma{}.json".format(i),
+            "type": "PLR programma Page",
+            "images": {
+                "landscape": "/dl/img/{}-landscape.jpg".format(i),
+                "portrait": "/dl/img/{}-portrait.jpg".format(i),
+                "square": "/dl/img/{}-square.jpg".format(i)
+            },
+            "description": "Descrizione del programma {} ".format(i) * 8,
+            "tags": ["genere:{}".format(i % 20), "anno:{}".format(1990 + i % 30)]
+        })
+    path = os.path.join(directory, "programmi_tutti.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": "Programmi - Tutti", "contents": contents}, f)
+    return path
+
+
+def _rss(result):
+    return "{:.1f} ({:.1f})".format(
+        result["rss_kb"] / 1024.0, result["peak_kb"] / 1024.0)
+
+
+def run(mode, path):
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, path])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        documents = sorted(glob.glob(os.path.join(DEBUG_DIR, "*.json")),
+                           key=os.path.getsize, reverse=True)[:5]
+        source = DEBUG_DIR
+        if not documents:
+            documents = [synthetic_document(tmp)]
+            source = "synthetic"
+        print("Documents: {} ({})".format(len(documents), source))
+        print("RSS: peak growth over the interpreter baseline (absolute peak)")
+        print("{:<24} {:>6} {:>7} {:>18} {:>18} {:>7} {:>8}".format(
+            "document", "MB", "items", "full RSS MB", "stream RSS MB",
+            "full s", "stream s"))
+        for path in documents:
+            full = run("full", path)
+            stream = run("stream", path)
+            if full["items"] != stream["items"]:
+                print("{}: item counts differ".format(path))
+            print("{:<24} {:>6.1f} {:>7} {:>18} {:>18} {:>7.2f} {:>8.2f}".format(
+                os.path.basename(path)[:24], os.path.getsize(path) / 1048576.0,
+                stream["items"], _rss(full), _rss(stream),
+                full["seconds"], stream["seconds"]))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: main loop stalls while a large catalogue is fetched and
+parsed in a thread of the plugin process, against the same job handed
+to the parse worker process (lib/parse_worker.py).
+
+A ticker thread stands in for the Enigma2 main loop: it wakes up every
+TICK seconds and records how late it was, which is how long the parsing
+thread kept the interpreter lock. The catalogue is served from a local
+HTTP server: the largest /tmp/raiplay_debug/*.json when present (set
+DEBUG_MODE in plugin.py to collect them on a receiver), otherwise a
+synthetic "Programmi - Tutti" document.
+
+    python bench/bench_parse_offload.py
+"""
+
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLUGIN_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..",
+    "usr", "lib", "enigma2", "python", "Plugins", "Extensions", "RaiPlay")
+# The plugin modules use relative imports: load the directory as a package
+_package = types.ModuleType("raiplay")
+_package.__path__ = [PLUGIN_DIR]
+sys.modules["raiplay"] = _package
+
+import requests  # noqa: E402
+
+from raiplay import RaiPlayOffload  # noqa: E402
+from raiplay.lib.parse_jobs import new_job, run_job  # noqa: E402
+
+DEBUG_DIR = "/tmp/raiplay_debug"
+TICK = 0.01
+ROUNDS = 5
+
+
+def synthetic_catalogue():
+    programs = {"name": "Programmi - Tutti", "contents": {}}
+    for i in range(20000):
+        letter = chr(ord("A") + i % 26)
+        programs["contents"].setdefault(letter, []).append({
+            "name": "Programma {} à è ì".format(i),
+            "path_id": "/programmi/programma{}.json".format(i),
+            "type": "PLR programma Page",
+            "images": {"landscape": "/dl/img/{}-landscape.jpg".format(i)},
+            "description": "Descrizione del programma {} ".format(i) * 4
+        })
+    return "programmi_tutti (synthetic)", json.dumps(programs).encode("utf-8")
+
+
+def recorded_catalogue():
+    paths = sorted(glob.glob(os.path.join(DEBUG_DIR, "*.json")),
+                   key=os.path.getsize, reverse=True)
+    if not paths:
+        return None
+    with open(paths[0], "rb") as f:
+        return os.path.basename(paths[0]), f.read()
+
+
+def serve(payload):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def stalls(run):
+    """(seconds, worst and mean ticker delay) while run() executes"""
+    delays = []
+    done = threading.Event()
+
+    def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            time.sleep(TICK)
+            delays.append(time.perf_counter() - start - TICK)
+
+    thread = threading.Thread(target=ticker)
+    thread.start()
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    done.set()
+    thread.join()
+    return result, seconds, max(delays), sum(delays) / len(delays)
+
+
+def main():
+    label, payload = recorded_catalogue() or synthetic_catalogue()
+    server = serve(payload)
+    url = "http://127.0.0.1:{}/catalogue.json".format(server.server_port)
+    # Recorded documents may not be the programs catalogue: keep every
+    # element of the letter lists or of a top level array
+    job = new_job(url, [("contents", "*"), ()],
+                  RaiPlayOffload.ALL_PROGRAMS_FIELDS, timeout=30)
+    session = requests.Session()
+    # The point is the worker itself, even on a single core machine
+    RaiPlayOffload.OFFLOAD_MIN_CPUS = 1
+    offload = RaiPlayOffload.get_offload()
+    offload.configure(True)
+    variants = [
+        ("thread", lambda: run_job(job, session)),
+        ("worker", lambda: offload.run(job))
+    ]
+    offload.run(job)
+
+    print("Document: {} ({:.2f} MB), {} CPUs".format(
+        label, len(payload) / 1048576.0, os.cpu_count()))
+    print("{:<8} {:>7} {:>10} {:>16} {:>16}".format(
+        "variant", "items", "seconds", "worst stall ms", "mean stall ms"))
+    for name, run in variants:
+        best = None
+        for _ in range(ROUNDS):
+            result, seconds, worst, mean = stalls(run)
+            if best is None or worst < best[2]:
+                best = (len(result["items"]), seconds, worst, mean)
+        print("{:<8} {:>7} {:>10.3f} {:>16.1f} {:>16.2f}".format(
+            name, best[0], best[1], best[2] * 1000, best[3] * 1000))
+    offload.configure(False)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: schema-driven category extraction (RaiPlaySchema) against the
+previous probing cascade of RaiPlayAPI.getOnDemandCategory.
+
+Pages are read from /tmp/raiplay_debug/*.json when present (set
+DEBUG_MODE in plugin.py to collect them on a receiver), otherwise large
+synthetic tipologia/*/index.json style pages are generated.
+
+    python bench/bench_schema.py
+"""
+
+import gc
+import glob
+import io
+import json
+import os
+import sys
+import time
+import types
+from contextlib import redirect_stdout
+
+PLUGIN_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..",
+    "usr", "lib", "enigma2", "python", "Plugins", "Extensions", "RaiPlay")
+# Load the plugin modules as a package without running its __init__
+# (which needs enigma2)
+_package = types.ModuleType("raiplay")
+_package.__path__ = [PLUGIN_DIR]
+sys.modules["raiplay"] = _package
+
+from raiplay.RaiPlaySchema import AZ_KEYS, extract_category  # noqa: E402
+
+DEBUG_DIR = "/tmp/raiplay_debug"
+ROUNDS = 10
+REPEATS = 5
+
+
+class StubAPI:
+    """The three RaiPlayAPI helpers used by the extractors"""
+
+    def fixPath(self, path):
+        if path.startswith("/tipologia") and not path.startswith("/tipologia/"):
+            return "/tipologia/" + path[len("/tipologia"):]
+        return path
+
+    def getFullUrl(self, url):
+        if not url or url.startswith("http"):
+            return url or ""
+        return "https://www.raiplay.it" + url
+
+    def getThumbnailUrl2(self, item):
+        images = item.get("images", {})
+        return self.getFullUrl(images.get("landscape", "") or item.get("image", ""))
+
+
+def legacy_extract(response, api):
+    """Replica of the cascade replaced by extract_category"""
+    items = []
+    az_structures = []
+    az_keys = list(AZ_KEYS)
+    if any(key in response for key in az_keys):
+        az_structures.append(response)
+    if "contents" in response and isinstance(response["contents"], dict):
+        az_structures.append(response["contents"])
+    if "blocks" in response and isinstance(response["blocks"], list):
+        for block in response["blocks"]:
+            if "contents" in block and isinstance(block["contents"], dict):
+                if any(key in block["contents"] for key in az_keys):
+                    az_structures.append(block["contents"])
+    for az_structure in az_structures:
+        for key in az_keys:
+            if key in az_structure and az_structure[key]:
+                for item in az_structure[key]:
+                    name = item.get("name", "")
+                    if not name:
+                        continue
+                    raw_url = item.get("path_id") or item.get("PathID") or ""
+                    items.append({
+                        "name": name,
+                        "url": api.fixPath(raw_url) if raw_url else None,
+                        "icon": api.getThumbnailUrl2(item),
+                        "sub-type": item.get("type", "PLR programma Page")
+                    })
+        if items:
+            return items
+    if "items" in response and isinstance(response["items"], list):
+        for i, item in enumerate(response["items"]):
+            print("[DEBUG] Item #{}: {}".format(i, item.get("name", "no-name")))
+            raw_url = item.get("path_id") or item.get("url") or item.get("PathID") or ""
+            items.append({
+                "name": item.get("name", ""),
+                "url": api.fixPath(raw_url) if raw_url else None,
+                "icon": api.getThumbnailUrl2(item),
+                "sub-type": item.get("type", item.get("sub_type", ""))
+            })
+    elif "blocks" in response and isinstance(response["blocks"], list):
+        for block in response["blocks"]:
+            block_type = block.get("type", "")
+            print("[DEBUG] Processing block type: {}".format(block_type))
+            if block_type == "RaiPlay Slider Generi Block":
+                for item in block.get("contents", []):
+                    raw_url = item.get("path_id") or item.get("url") or ""
+                    item_data = {
+                        "name": item.get("name", ""),
+                        "url": api.fixPath(raw_url) if raw_url else None,
+                        "icon": api.getFullUrl(item.get("image", "")),
+                        "sub-type": item.get("sub_type", "")
+                    }
+                    print("[DEBUG] Adding genre item: {} URL:{} ICON:{}".format(
+                        item_data["name"], item_data["url"], item_data["icon"]))
+                    items.append(item_data)
+            elif block_type == "RaiPlay Multimedia Block":
+                for j, item in enumerate(block.get("sets", [])):
+                    print("[DEBUG] Set #{}: {}".format(j, item.get("name", "no-name")))
+                    raw_url = item.get("path_id") or item.get("url") or ""
+                    items.append({
+                        "name": item.get("name", ""),
+                        "url": api.fixPath(raw_url) if raw_url else None,
+                        "icon": api.getThumbnailUrl2(item),
+                        "sub-type": item.get("type", "")
+                    })
+            elif block_type == "RaiPlay Lista Programmi Block":
+                for content in block.get("contents", []):
+                    raw_url = content.get("path_id") or content.get("PathID") or ""
+                    items.append({
+                        "name": content.get("name", ""),
+                        "url": api.fixPath(raw_url) if raw_url else None,
+                        "icon": api.getThumbnailUrl2(content),
+                        "sub-type": content.get("type", "")
+                    })
+    elif "contents" in response and isinstance(response["contents"], list):
+        for content_block in response["contents"]:
+            if "contents" in content_block and isinstance(content_block["contents"], list):
+                for item in content_block["contents"]:
+                    raw_url = item.get("path_id") or item.get("PathID") or ""
+                    items.append({
+                        "name": item.get("name", ""),
+                        "url": api.fixPath(raw_url) if raw_url else None,
+                        "icon": api.getThumbnailUrl2(item),
+                        "sub-type": item.get("type", "")
+                    })
+    return items
+
+
+def _item(i, kind):
+    return {
+        "name": "{} {}".format(kind, i),
+        "path_id": "/tipologiafiction/PublishingBlock-{}.json".format(i),
+        "type": "RaiPlay Programma Item",
+        "sub_type": "PLR programma Page",
+        "image": "/cropgd/{}.jpg".format(i),
+        "images": {"landscape": "/cropgd/{}-l.jpg".format(i)},
+        "description": "x" * 200
+    }
+
+
+def synthetic_pages():
+    blocks = []
+    for b in range(40):
+        blocks.append({"type": "RaiPlay Multimedia Block",
+                       "sets": [_item(b * 100 + i, "Set") for i in range(60)]})
+        blocks.append({"type": "RaiPlay Lista Programmi Block",
+                       "contents": [_item(b * 100 + i, "Prog") for i in range(40)]})
+    blocks.append({"type": "RaiPlay Slider Generi Block",
+                   "contents": [_item(i, "Genre") for i in range(30)]})
+    az = {key: [_item(i, key) for i in range(150)] for key in AZ_KEYS}
+    cards = {"contents": [{"contents": [_item(b * 100 + i, "Card") for i in range(80)]}
+                          for b in range(30)]}
+    return [("blocks", {"blocks": blocks}), ("az", az), ("cards", cards)]
+
+
+def debug_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(DEBUG_DIR, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            pages.append((os.path.basename(path), data))
+    return pages
+
+
+def timed(func, page, api):
+    """Best of REPEATS, per call; debug prints go to a buffer"""
+    best = None
+    result = None
+    gc.collect()
+    with redirect_stdout(io.StringIO()):
+        for _ in range(REPEATS):
+            result = None
+            gc.collect()
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                result = func(page, api)
+            elapsed = (time.perf_counter() - start) / ROUNDS
+            best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    pages = debug_pages()
+    source = DEBUG_DIR
+    if not pages:
+        pages = synthetic_pages()
+        source = "synthetic"
+    print("Pages: {} ({})".format(len(pages), source))
+    print("{:<32} {:>7} {:>11} {:>11} {:>8}".format(
+        "page", "items", "legacy ms", "schema ms", "speedup"))
+    api = StubAPI()
+    total_legacy = total_schema = 0.0
+    for name, page in pages:
+        legacy_time, legacy = timed(legacy_extract, page, api)
+        schema_time, records = timed(extract_category, page, api)
+        plain = [{k: v for k, v in r.items() if v is not None} for r in legacy]
+        if plain != [r.to_dict() for r in records]:
+            print("{}: outputs differ ({} vs {} items)".format(
+                name, len(legacy), len(records)))
+        total_legacy += legacy_time
+        total_schema += schema_time
+        print("{:<32} {:>7} {:>11.2f} {:>11.2f} {:>7.2f}x".format(
+            name[:32], len(records), legacy_time * 1000, schema_time * 1000,
+            legacy_time / schema_time if schema_time else 0))
+    if total_schema:
+        print("Total speedup: {:.2f}x".format(total_legacy / total_schema))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+from json import dumps
+from os.path import exists
+
+from twisted.internet import defer, reactor
+from twisted.internet.error import ConnectError, TCPTimedOutError, TimeoutError
+from twisted.web.client import (
+    Agent,
+    BrowserLikeRedirectAgent,
+    ContentDecoderAgent,
+    FileBodyProducer,
+    GzipDecoder,
+    HTTPConnectionPool,
+    ResponseFailed,
+    ResponseNeverReceived,
+    readBody
+)
+from twisted.web.http_headers import Headers
+
+from .RaiPlayBreaker import CircuitOpenError, get_breaker
+from .RaiPlayDNS import CachedEndpointFactory
+from .RaiPlayLimiter import get_limiter, parse_retry_after
+from .RaiPlayOffload import get_offload
+from .RaiPlaySchema import extract_category
+from .lib.fast_json import loads
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Asynchronous API Module                     #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Requests run on the reactor, no worker threads   #
+#    - Shared persistent connection pool (keep-alive)   #
+#    - Cached DNS and happy-eyeballs connects           #
+#    - Redirects and gzip handled by the agent          #
+#    - Host limiter slots taken without blocking        #
+#    - Known-bad URLs and hosts fail at once            #
+#    - Deferred results, callbacks on the main thread   #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
+ASYNC_TIMEOUT = 15
+ASYNC_CONNECTIONS_PER_HOST = 4
+ASYNC_IDLE_SECONDS = 60
+SPORT_VIDEO_TYPE = "video"
+
+
+class HTTPStatusError(Exception):
+    """Non 2xx answer; code and headers are kept for the caller"""
+
+    def __init__(self, url, code, headers=None):
+        Exception.__init__(self, "HTTP {} for {}".format(code, url))
+        self.url = url
+        self.code = code
+        self.headers = headers
+
+
+class AsyncHTTP:
+    """
+    Twisted Agent over one HTTPConnectionPool.
+
+    Connections to the Rai hosts are kept alive between requests; every
+    method returns a Deferred fired on the reactor thread, so callbacks
+    may touch the UI directly.
+    """
+
+    def __init__(self):
+        self.pool = HTTPConnectionPool(reactor, persistent=True)
+        self.pool.maxPersistentPerHost = ASYNC_CONNECTIONS_PER_HOST
+        self.pool.cachedConnectionTimeout = ASYNC_IDLE_SECONDS
+        agent = Agent.usingEndpointFactory(
+            reactor, CachedEndpointFactory(ASYNC_TIMEOUT), pool=self.pool)
+        self.agent = ContentDecoderAgent(
+            BrowserLikeRedirectAgent(agent), [(b"gzip", GzipDecoder)])
+
+    def request(self, method, url, headers=None, body=None,
+                timeout=ASYNC_TIMEOUT):
+        """Deferred firing with the response body (bytes)"""
+        raw_headers = {b"User-Agent": [USER_AGENT.encode("ascii")]}
+        for name, value in (headers or {}).items():
+            raw_headers[name.encode("ascii")] = [value.encode("utf-8")]
+        try:
+            cached = get_breaker().check(url)
+        except CircuitOpenError:
+            return defer.fail()
+        if cached:
+            return defer.fail(HTTPStatusError(url, cached))
+        limiter = get_limiter(url)
+        sent = []
+
+        def timed_out(result, seconds):
+            if sent:
+                # Waiting for a limiter slot is not the URL's fault
+                get_breaker().record(url, timeout=True)
+            raise TimeoutError("{} not answered in {}s".format(url, seconds))
+        d = limiter.acquire_deferred()
+        d.addCallback(self._send, limiter, method, url, Headers(raw_headers), body, sent)
+        d.addTimeout(timeout, reactor, onTimeoutCancel=timed_out)
+        return d
+
+    def _send(self, started, limiter, method, url, headers, body, sent):
+        sent.append(started)
+        producer = FileBodyProducer(BytesIO(body)) if body is not None else None
+        d = self.agent.request(method, url.encode("utf-8"), headers, producer)
+
+        breaker = get_breaker()
+
+        def answered(response):
+            retry_after = response.headers.getRawHeaders(b"retry-after", [None])[0]
+            limiter.release(started, response.code, parse_retry_after(retry_after))
+            breaker.record(url, response.code)
+            return response
+
+        def failed(failure):
+            limiter.release(started, failed=True)
+            if failure.check(TimeoutError, TCPTimedOutError):
+                breaker.record(url, timeout=True)
+            elif failure.check(ConnectError, ResponseFailed, ResponseNeverReceived):
+                breaker.record(url, failed=True)
+            else:
+                # Cancelled (screen closed or overall timeout)
+                breaker.abandon(url)
+            return failure
+        d.addCallbacks(answered, failed)
+        d.addCallback(self._read_body, url)
+        return d
+
+    def _read_body(self, response, url):
+        if not 200 <= response.code < 300:
+            # Drain the body so the connection goes back to the pool
+            d = readBody(response)
+            d.addBoth(self._status_error, url, response)
+            return d
+        return readBody(response)
+
+    @staticmethod
+    def _status_error(ignored, url, response):
+        raise HTTPStatusError(url, response.code, response.headers)
+
+    def get_text(self, url, headers=None, timeout=ASYNC_TIMEOUT):
+        d = self.request(b"GET", url, headers, timeout=timeout)
+        d.addCallback(lambda body: body.decode("utf-8", "replace"))
+        return d
+
+    def get_json(self, url, headers=None, timeout=ASYNC_TIMEOUT):
+        d = self.request(b"GET", url, headers, timeout=timeout)
+        d.addCallback(loads)
+        return d
+
+    def post_json(self, url, payload, headers=None, timeout=ASYNC_TIMEOUT):
+        request_headers = {"Content-Type": "application/json; charset=UTF-8"}
+        request_headers.update(headers or {})
+        d = self.request(b"POST", url, request_headers,
+                         dumps(payload).encode("utf-8"), timeout)
+        d.addCallback(loads)
+        return d
+
+    def close(self):
+        return self.pool.closeCachedConnections()
+
+
+class AsyncRaiPlayAPI:
+    """
+    Deferred variants of RaiPlayAPI lookups.
+
+    Only the transport differs: URLs, request bodies and parsing come
+    from the wrapped RaiPlayAPI, so both paths return the same records.
+    """
+
+    def __init__(self, api, http=None):
+        self.api = api
+        self.http = http or get_async_http()
+
+    def getOnDemandMenu(self):
+        d = self.api.mirrors.fetch_deferred("menu", self.http.get_json)
+        d.addCallback(self.api.parseOnDemandMenu)
+        return d
+
+    def getOnDemandCategory(self, url):
+        d = self.http.get_json(self.api.prepare_url(url))
+        d.addCallback(extract_category, self.api)
+        return d
+
+    @defer.inlineCallbacks
+    def get_sport_videos_page(self, key, page=0, page_size=50):
+        """Videos of one sport search page; [] on an unknown key"""
+        api = self.api
+        if not getattr(api, "categories_data", None) and not exists(api.CACHE_FILE):
+            # Only the cache file is read synchronously
+            api.categories_data = yield self.http.get_json(
+                api.RAISPORT_CATEGORIES_URL)
+        request = api.sport_search_request(key, page, page_size)
+        if not request:
+            defer.returnValue([])
+        payload, headers = request
+        offload = get_offload()
+        if offload.active():
+            # Decoded in the parse worker, off the reactor thread
+            result = yield offload.run_deferred(
+                api.sport_search_job(payload, headers))
+            if result["status"] >= 400:
+                raise HTTPStatusError(api.RAISPORT_SEARCH_URL, result["status"])
+            defer.returnValue(result["items"])
+        data = yield self.http.post_json(
+            api.RAISPORT_SEARCH_URL, payload, headers)
+        defer.returnValue([
+            hit for hit in data.get("hits", [])
+            if isinstance(hit, dict) and hit.get("data_type") == SPORT_VIDEO_TYPE
+        ])
+
+
+_http = None
+
+
+def get_async_http():
+    """Return the process-wide agent and connection pool"""
+    global _http
+    if _http is None:
+        _http = AsyncHTTP()
+    return _http
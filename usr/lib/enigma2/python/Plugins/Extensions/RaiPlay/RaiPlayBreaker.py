@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import requests
+
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Circuit Breaker Module                      #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Negative cache of 404/410 and timed out URLs     #
+#    - Per-host breaker after repeated failures         #
+#    - Single probe when the cooldown is over           #
+#    - Known-bad fetches fail at once                   #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+NEGATIVE_TTL = 300
+NEGATIVE_CACHE_SIZE = 500
+NEGATIVE_STATUS = (404, 410)
+# Throttling is the limiter's business, not a failure
+THROTTLE_STATUS = (429, 503)
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 30
+BREAKER_MAX_COOLDOWN = 600
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A request skipped because its URL or host is known to fail"""
+
+
+class HostState:
+    __slots__ = ("failures", "open_until", "cooldown", "probing")
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0
+        self.cooldown = BREAKER_COOLDOWN
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    Remembers what failed so it is not waited for again.
+
+    URLs answering 404/410 or timing out are cached for negative_ttl
+    seconds (0 disables). BREAKER_THRESHOLD consecutive timeouts,
+    connection errors or 5xx open a host for a cooldown; then one probe
+    is let through: success closes it, failure reopens it for twice as
+    long.
+    """
+
+    def __init__(self, negative_ttl=NEGATIVE_TTL):
+        self.negative_ttl = negative_ttl
+        self.negative = OrderedDict()
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def configure(self, negative_ttl):
+        with self.lock:
+            self.negative_ttl = negative_ttl
+            if not negative_ttl:
+                self.negative.clear()
+
+    def check(self, url):
+        """
+        Raise CircuitOpenError for a URL or host known to be failing;
+        return the cached status of a URL that answered 404/410, else None.
+        """
+        now = time.time()
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            entry = self.negative.get(url)
+            if entry is not None:
+                expires, status = entry
+                if expires > now:
+                    get_metrics().increment("breaker.negative_hit", key=host)
+                    if status:
+                        return status
+                    raise CircuitOpenError("{} timed out recently".format(url))
+                del self.negative[url]
+            state = self.hosts.get(host)
+            if state is None or state.failures < BREAKER_THRESHOLD:
+                return None
+            if state.open_until > now or state.probing:
+                get_metrics().increment("breaker.short_circuit", key=host)
+                raise CircuitOpenError("{} is failing, retry in {:.0f}s".format(
+                    host, max(state.open_until - now, 0)))
+            # Cooldown over: this request is the probe
+            state.probing = True
+            return None
+
+    def record(self, url, status=None, timeout=False, failed=False):
+        """Outcome of a request: an HTTP status, a timeout or a failure"""
+        host = urlparse(url).netloc.lower()
+        now = time.time()
+        with self.lock:
+            if self.negative_ttl and (timeout or status in NEGATIVE_STATUS):
+                self.negative[url] = (now + self.negative_ttl, None if timeout else status)
+                self.negative.move_to_end(url)
+                while len(self.negative) > NEGATIVE_CACHE_SIZE:
+                    self.negative.popitem(last=False)
+            state = self.hosts.get(host)
+            if status in THROTTLE_STATUS:
+                if state is not None:
+                    state.probing = False
+                return
+            if timeout or failed or (status is not None and status >= 500):
+                if state is None:
+                    state = self.hosts[host] = HostState()
+                if state.probing:
+                    state.cooldown = min(state.cooldown * 2, BREAKER_MAX_COOLDOWN)
+                state.probing = False
+                state.failures += 1
+                if state.failures >= BREAKER_THRESHOLD:
+                    state.open_until = now + state.cooldown
+                    get_metrics().increment("breaker.open", key=host)
+                    print("[BREAKER] {} open for {}s".format(host, state.cooldown))
+            elif state is not None:
+                del self.hosts[host]
+
+    def abandon(self, url):
+        """A request ended without an outcome (cancelled): free the probe"""
+        with self.lock:
+            state = self.hosts.get(urlparse(url).netloc.lower())
+            if state is not None:
+                state.probing = False
+
+
+def cached_response(request, status):
+    """A requests Response replaying a cached failure status"""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "Cached failure"
+    response.url = request.url
+    response.request = request
+    response._content = b""
+    response._content_consumed = True
+    return response
+
+
+_breaker = None
+
+
+def get_breaker():
+    """Return the process-wide circuit breaker"""
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
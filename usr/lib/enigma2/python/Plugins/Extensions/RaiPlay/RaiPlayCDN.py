@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from re import sub
+from urllib.parse import urlparse
+
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play CDN Edge Selection Module                   #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Throughput per edge host from real transfers     #
+#    - Scores fade back to the average as they age      #
+#    - Fastest edge chosen among the offered URLs       #
+#    - Optional rewrite to a faster sibling edge        #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+# Smaller transfers measure latency, not throughput
+CDN_MIN_BYTES = 256 * 1024
+# Weight of the newest transfer in the rolling throughput
+CDN_DECAY = 0.3
+# A measurement this old counts half, the rest is the average edge
+CDN_HALF_LIFE = 1800
+# A failed transfer costs this share of the throughput
+CDN_FAILURE_PENALTY = 0.5
+# Another offered edge must be this much faster than the first one
+CDN_SWITCH_GAIN = 1.2
+# A sibling edge must be this much faster to rewrite a URL to it
+CDN_REWRITE_GAIN = 1.5
+CDN_MAX_EDGES = 64
+
+
+def edge_family(host):
+    """Hosts differing only in numbers are edges of one pool"""
+    return sub(r"\d+", "", host.split(":")[0])
+
+
+class EdgeStats:
+    __slots__ = ("throughput", "updated")
+
+    def __init__(self, throughput, updated):
+        self.throughput = throughput
+        self.updated = updated
+
+
+class EdgeSelector:
+    """
+    Throughput of the CDN edges as seen from this receiver.
+
+    Segments fetched by the HLS proxy and finished downloads report
+    bytes and seconds per host. When a relinker offers several URLs the
+    best scored edge is used; with rewriting enabled a URL is also moved
+    to a measurably faster edge of the same pool (cdnraivodostr1..N).
+    """
+
+    def __init__(self, rewrite=False):
+        self.rewrite_enabled = rewrite
+        self.edges = {}
+        self.lock = threading.Lock()
+
+    def configure(self, rewrite):
+        self.rewrite_enabled = rewrite
+
+    def record(self, url, nbytes, seconds):
+        """A finished transfer of nbytes from the host of url"""
+        if nbytes < CDN_MIN_BYTES or seconds <= 0:
+            return
+        host = urlparse(url).netloc.lower()
+        sample = nbytes / seconds
+        now = time.time()
+        with self.lock:
+            stats = self.edges.get(host)
+            if stats is None:
+                stats = self.edges[host] = EdgeStats(sample, now)
+                while len(self.edges) > CDN_MAX_EDGES:
+                    oldest = min(self.edges, key=lambda h: self.edges[h].updated)
+                    del self.edges[oldest]
+            else:
+                stats.throughput += CDN_DECAY * (sample - stats.throughput)
+                stats.updated = now
+            throughput = stats.throughput
+        get_metrics().gauge("cdn.throughput", int(throughput), key=host)
+
+    def failed(self, url):
+        """A transfer from the host of url failed"""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            stats = self.edges.get(host)
+            if stats is not None:
+                stats.throughput *= CDN_FAILURE_PENALTY
+                stats.updated = time.time()
+        get_metrics().increment("cdn.failure", key=host)
+
+    def _average(self):
+        if not self.edges:
+            return None
+        return sum(s.throughput for s in self.edges.values()) / len(self.edges)
+
+    def _score(self, host, average, now):
+        """Throughput fading to the average with age (lock held)"""
+        stats = self.edges.get(host)
+        if stats is None:
+            return average
+        weight = 0.5 ** ((now - stats.updated) / CDN_HALF_LIFE)
+        return average + (stats.throughput - average) * weight
+
+    def select(self, urls):
+        """The URL to use among those offered for one stream (None if empty)"""
+        urls = [u for i, u in enumerate(urls) if u and u not in urls[:i]]
+        if not urls:
+            return None
+        now = time.time()
+        with self.lock:
+            average = self._average()
+            chosen = urls[0]
+            if average is not None and len(urls) > 1:
+                scores = [self._score(urlparse(u).netloc.lower(), average, now) for u in urls]
+                best = max(range(len(urls)), key=lambda i: scores[i])
+                if scores[best] > scores[0] * CDN_SWITCH_GAIN:
+                    chosen = urls[best]
+            if self.rewrite_enabled and average is not None:
+                chosen = self._rewrite(chosen, average, now)
+        if chosen != urls[0]:
+            print("[CDN] Using {} instead of {}".format(
+                urlparse(chosen).netloc, urlparse(urls[0]).netloc))
+            get_metrics().increment("cdn.switch", key=urlparse(chosen).netloc.lower())
+        return chosen
+
+    def _rewrite(self, url, average, now):
+        """url on the fastest recently measured sibling edge (lock held)"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if host not in self.edges:
+            return url
+        family = edge_family(host)
+        current = self._score(host, average, now)
+        best, best_score = None, current * CDN_REWRITE_GAIN
+        for sibling, stats in self.edges.items():
+            if sibling == host or edge_family(sibling) != family:
+                continue
+            if now - stats.updated > CDN_HALF_LIFE:
+                continue
+            score = self._score(sibling, average, now)
+            if score > best_score:
+                best, best_score = sibling, score
+        if best is None:
+            return url
+        return parsed._replace(netloc=best).geturl()
+
+
+_selector = None
+
+
+def get_cdn():
+    """Return the process-wide edge selector"""
+    global _selector
+    if _selector is None:
+        _selector = EdgeSelector()
+    return _selector
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+
+import errno
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+from os import strerror
+
+import requests
+from requests.adapters import HTTPAdapter
+from twisted.internet import defer, reactor, threads
+from twisted.internet.endpoints import (
+    TCP4ClientEndpoint,
+    TCP6ClientEndpoint,
+    wrapClientTLS
+)
+from twisted.internet.error import DNSLookupError
+from twisted.internet.interfaces import IStreamClientEndpoint
+from twisted.web.client import BrowserLikePolicyForHTTPS
+from twisted.web.iweb import IAgentEndpointFactory
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from zope.interface import implementer
+
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play DNS Module                                  #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - In-process cache of resolved host addresses      #
+#    - Stale answers kept when the resolver fails       #
+#    - Happy-eyeballs connect over IPv6 and IPv4        #
+#    - Remembers the address family that works          #
+#    - Used by the requests session and the Agent       #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+# getaddrinfo() does not tell the record TTL: answers are kept this long,
+# short enough to follow CDN changes
+DNS_TTL = 60
+# A host that did not resolve is not asked again for this long
+DNS_NEGATIVE_TTL = 10
+# An expired answer still used when the resolver is down
+DNS_STALE_GRACE = 600
+DNS_CACHE_SIZE = 128
+# Start the next address when the current one has not connected in time
+# (RFC 8305 recommends 250 ms)
+HAPPY_EYEBALLS_DELAY = 0.25
+CONNECTING = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+
+
+class DNSEntry:
+    __slots__ = ("addresses", "error", "expires")
+
+    def __init__(self, addresses, error, expires):
+        self.addresses = addresses
+        self.error = error
+        self.expires = expires
+
+
+class DNSCache:
+    """
+    Resolved addresses per host name, shared by both HTTP transports.
+
+    Concurrent lookups of one host wait for the same getaddrinfo() call.
+    Addresses come back in connect order: the families interleaved as in
+    RFC 8305, the one that last connected for the host first.
+    """
+
+    def __init__(self, ttl=DNS_TTL, negative_ttl=DNS_NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()
+        self.preferred = {}
+        self.resolving = {}
+        self.lock = threading.Lock()
+
+    def cached(self, host):
+        """Fresh addresses of host, or None when a lookup is needed"""
+        with self.lock:
+            entry = self.entries.get(host)
+            if entry is None or entry.expires <= time.time():
+                return None
+            get_metrics().increment("dns.hit", key=host)
+            if entry.error is not None:
+                raise entry.error
+            return self._ordered(host, entry.addresses)
+
+    def resolve(self, host, port):
+        """
+        [(family, socktype, proto, sockaddr)] for host:port; raises
+        socket.gaierror when the host does not resolve.
+        """
+        addresses = self.cached(host)
+        if addresses is None:
+            addresses = self._lookup(host)
+        return [
+            (family, socktype, proto, (sockaddr[0], port) + tuple(sockaddr[2:]))
+            for family, socktype, proto, sockaddr in addresses
+        ]
+
+    def _lookup(self, host):
+        with self.lock:
+            event = self.resolving.get(host)
+            owner = event is None
+            if owner:
+                event = self.resolving[host] = threading.Event()
+        if not owner:
+            event.wait()
+            return self.cached(host) or self._lookup(host)
+        start = time.time()
+        try:
+            infos = socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)
+            addresses = [
+                (family, socktype, proto, sockaddr)
+                for family, socktype, proto, canonname, sockaddr in infos
+                if family in (socket.AF_INET, socket.AF_INET6)
+            ]
+            error = None
+            if not addresses:
+                error = socket.gaierror(socket.EAI_NONAME, "no address for " + host)
+        except (OSError, UnicodeError) as e:
+            addresses = None
+            error = e
+        now = time.time()
+        get_metrics().observe("dns.resolve", now - start, key=host, ok=error is None)
+        with self.lock:
+            del self.resolving[host]
+            previous = self.entries.get(host)
+            if error is not None and previous is not None and previous.error is None \
+                    and previous.expires + DNS_STALE_GRACE > now:
+                print("[DNS] {} did not resolve ({}), keeping old addresses".format(host, error))
+                get_metrics().increment("dns.stale", key=host)
+                previous.expires = now + self.negative_ttl
+                addresses, error = previous.addresses, None
+            else:
+                ttl = self.negative_ttl if error is not None else self.ttl
+                self.entries[host] = DNSEntry(addresses, error, now + ttl)
+            self.entries.move_to_end(host)
+            while len(self.entries) > DNS_CACHE_SIZE:
+                self.entries.popitem(last=False)
+            event.set()
+            if error is not None:
+                raise error
+            return self._ordered(host, addresses)
+
+    def _ordered(self, host, addresses):
+        """Interleave families, starting with the preferred one (lock held)"""
+        first = self.preferred.get(host, addresses[0][0])
+        primary = [a for a in addresses if a[0] == first]
+        secondary = [a for a in addresses if a[0] != first]
+        ordered = []
+        for index in range(max(len(primary), len(secondary))):
+            ordered.extend(group[index] for group in (primary, secondary) if index < len(group))
+        return ordered
+
+    def connected(self, host, family, seconds, fallback):
+        """Account a connection that succeeded to an address of family"""
+        with self.lock:
+            self.preferred[host] = family
+        get_metrics().observe("net.connect", seconds, key=host)
+        if fallback:
+            get_metrics().increment("net.fallback", key=host)
+
+    def connect(self, address, timeout=None, source_address=None,
+                socket_options=None):
+        """
+        socket.create_connection() over the cached addresses. Attempts are
+        staggered by HAPPY_EYEBALLS_DELAY and raced; a failed attempt starts
+        the next one at once. The first connected socket is returned.
+        """
+        host, port = address
+        start = time.time()
+        addresses = self.resolve(host, port)
+        deadline = start + timeout if timeout is not None else None
+        selector = selectors.DefaultSelector()
+        attempts = {}
+        error = None
+        index = 0
+        next_start = start
+        try:
+            while True:
+                now = time.time()
+                if index < len(addresses) and (now >= next_start or not attempts):
+                    family, socktype, proto, sockaddr = addresses[index]
+                    index += 1
+                    sock = None
+                    try:
+                        sock = socket.socket(family, socktype, proto)
+                        for option in socket_options or ():
+                            sock.setsockopt(*option)
+                        if source_address:
+                            sock.bind(source_address)
+                        sock.setblocking(False)
+                        code = sock.connect_ex(sockaddr)
+                        if code and code not in CONNECTING:
+                            raise OSError(code, strerror(code))
+                    except OSError as e:
+                        error = e
+                        if sock is not None:
+                            sock.close()
+                        continue
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    attempts[sock] = (family, index > 1)
+                    next_start = now + HAPPY_EYEBALLS_DELAY
+                    continue
+                if not attempts:
+                    raise error or OSError("no address for " + host)
+                waits = []
+                if deadline is not None:
+                    waits.append(deadline - now)
+                if index < len(addresses):
+                    waits.append(next_start - now)
+                wait = max(min(waits), 0) if waits else None
+                if deadline is not None and deadline <= now:
+                    raise socket.timeout("connect to {} timed out".format(host))
+                for key, events in selector.select(wait):
+                    sock = key.fileobj
+                    selector.unregister(sock)
+                    family, fallback = attempts.pop(sock)
+                    code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if code:
+                        error = OSError(code, strerror(code))
+                        sock.close()
+                        next_start = now
+                        continue
+                    sock.setblocking(True)
+                    sock.settimeout(timeout)
+                    self.connected(host, family, time.time() - start, fallback)
+                    return sock
+        except BaseException:
+            get_metrics().observe("net.connect", time.time() - start, key=host, ok=False)
+            raise
+        finally:
+            for sock in attempts:
+                sock.close()
+            selector.close()
+
+
+class CachedConnectionMixin:
+    """urllib3 connection whose sockets come from DNSCache.connect()"""
+
+    def _new_conn(self):
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else socket.getdefaulttimeout()
+        try:
+            return get_dns().connect(
+                (self._dns_host, self.port), timeout,
+                self.source_address, self.socket_options)
+        except socket.timeout:
+            raise ConnectTimeoutError(
+                self, "Connection to {} timed out. (connect timeout={})".format(self.host, timeout))
+        except OSError as e:
+            raise NewConnectionError(
+                self, "Failed to establish a new connection: {}".format(e))
+
+
+class CachedHTTPConnection(CachedConnectionMixin, HTTPConnection):
+    pass
+
+
+class CachedHTTPSConnection(CachedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CachedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedHTTPConnection
+
+
+class CachedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedHTTPSConnection
+
+
+class DNSAdapter(HTTPAdapter):
+    """requests transport adapter connecting through the DNS cache"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(DNSAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CachedHTTPConnectionPool,
+            "https": CachedHTTPSConnectionPool
+        }
+
+
+def new_dns_session(pool_maxsize=10):
+    """A requests session connecting through the DNS cache"""
+    session = requests.Session()
+    adapter = DNSAdapter(pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@implementer(IStreamClientEndpoint)
+class CachedHostEndpoint:
+    """
+    Twisted client endpoint resolving through the DNS cache (in a reactor
+    thread on a miss) and racing the addresses like DNSCache.connect().
+    """
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def connect(self, protocolFactory):
+        dns = get_dns()
+        try:
+            addresses = dns.cached(self.host)
+        except socket.gaierror as e:
+            return defer.fail(DNSLookupError(self.host, str(e)))
+        if addresses is not None:
+            d = defer.succeed(dns.resolve(self.host, self.port))
+        else:
+            d = threads.deferToThread(dns.resolve, self.host, self.port)
+            d.addErrback(self._lookup_failed)
+        d.addCallback(self._race, protocolFactory)
+        return d
+
+    def _lookup_failed(self, failure):
+        failure.trap(socket.gaierror, UnicodeError)
+        raise DNSLookupError(self.host, failure.getErrorMessage())
+
+    def _race(self, addresses, protocolFactory):
+        start = time.time()
+        attempts = {}
+        state = {"next": 0, "timer": None, "closed": False, "error": None}
+
+        def stop():
+            state["closed"] = True
+            timer = state["timer"]
+            if timer is not None and timer.active():
+                timer.cancel()
+            for attempt in list(attempts):
+                attempt.cancel()
+
+        result = defer.Deferred(lambda d: stop())
+
+        def start_next():
+            state["timer"] = None
+            index = state["next"]
+            state["next"] += 1
+            family, socktype, proto, sockaddr = addresses[index]
+            endpoint_class = TCP6ClientEndpoint if family == socket.AF_INET6 else TCP4ClientEndpoint
+            attempt = endpoint_class(reactor, sockaddr[0], self.port, self.timeout).connect(protocolFactory)
+            attempts[attempt] = (family, index > 0)
+            attempt.addCallbacks(won, lost, callbackArgs=(attempt,), errbackArgs=(attempt,))
+            if state["next"] < len(addresses) and not state["closed"]:
+                state["timer"] = reactor.callLater(HAPPY_EYEBALLS_DELAY, start_next)
+
+        def won(protocol, attempt):
+            family, fallback = attempts.pop(attempt)
+            if state["closed"]:
+                protocol.transport.abortConnection()
+                return
+            stop()
+            get_dns().connected(self.host, family, time.time() - start, fallback)
+            result.callback(protocol)
+
+        def lost(failure, attempt):
+            attempts.pop(attempt)
+            if state["closed"]:
+                return
+            state["error"] = state["error"] or failure
+            if state["next"] < len(addresses):
+                timer = state["timer"]
+                if timer is not None and timer.active():
+                    timer.cancel()
+                start_next()
+            elif not attempts:
+                state["closed"] = True
+                get_metrics().observe("net.connect", time.time() - start, key=self.host, ok=False)
+                result.errback(state["error"])
+
+        start_next()
+        return result
+
+
+@implementer(IAgentEndpointFactory)
+class CachedEndpointFactory:
+    """Agent endpoint factory: TCP for http, TLS for https, both cached"""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.policy = BrowserLikePolicyForHTTPS()
+
+    def endpointForURI(self, uri):
+        endpoint = CachedHostEndpoint(uri.host.decode("ascii"), uri.port, self.timeout)
+        if uri.scheme == b"https":
+            return wrapClientTLS(self.policy.creatorForNetloc(uri.host, uri.port), endpoint)
+        return endpoint
+
+
+_dns = None
+
+
+def get_dns():
+    """Return the process-wide DNS cache"""
+    global _dns
+    if _dns is None:
+        _dns = DNSCache()
+    return _dns
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+
+import requests
+
+from .RaiPlayExecutor import PRIORITY_PLAYBACK, get_executor, in_worker
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Deadline Module                             #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Time budget shared by a chain of requests        #
+#    - Per-request timeouts capped by what is left      #
+#    - Hedged GET after the observed p90 latency        #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+# Budget from pressing Play to a playable URL, per screen step
+PLAY_DEADLINE = 20
+# Hedge after this long while fewer than HEDGE_MIN_SAMPLES are known
+HEDGE_DEFAULT_DELAY = 1.5
+HEDGE_MIN_DELAY = 0.2
+HEDGE_MIN_SAMPLES = 5
+
+_local = threading.local()
+_hedging = True
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The budget of the current operation is spent"""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires = time.time() + seconds
+
+    def remaining(self):
+        return self.expires - time.time()
+
+    def timeout(self, cap):
+        """cap, or less if the budget ends sooner"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("deadline exceeded")
+        return min(cap, remaining)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """
+    Give the requests made by this thread inside the block 'seconds' in
+    total; a nested scope never extends an outer one.
+    """
+    outer = getattr(_local, "deadline", None)
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires < deadline.expires:
+        deadline = outer
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = outer
+
+
+def budget_timeout(cap):
+    """Timeout for the next request: cap, bounded by the current deadline"""
+    deadline = getattr(_local, "deadline", None)
+    return deadline.timeout(cap) if deadline is not None else cap
+
+
+def configure_hedging(enabled):
+    global _hedging
+    _hedging = enabled
+
+
+def hedge_delay(operation):
+    """p90 latency of an operation, the default until it is known"""
+    stats = get_metrics().latency("hedge." + operation)
+    if not stats or stats["count"] < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+    return max(stats["p90"], HEDGE_MIN_DELAY)
+
+
+def _close_loser(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def hedged_get(session, url, operation, timeout, **kwargs):
+    """
+    session.get(url) that sends the same GET a second time when the
+    first has not answered within the operation's p90 latency; the first
+    answer wins, the other one is closed when it arrives.
+
+    Only for idempotent requests on the playback path. Called from an
+    executor thread it is a plain get.
+    """
+    def fetch():
+        start = time.time()
+        ok = False
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+            ok = response.status_code < 500
+            return response
+        finally:
+            get_metrics().observe(
+                "hedge." + operation, time.time() - start, ok=ok)
+
+    if not _hedging or in_worker():
+        return fetch()
+    executor = get_executor()
+    first = executor.submit(fetch, priority=PRIORITY_PLAYBACK)
+    wait([first], timeout=min(hedge_delay(operation), timeout))
+    if first.done():
+        return first.result()
+
+    print("[DEADLINE] Hedging {} request: {}".format(operation, url))
+    get_metrics().increment("hedge.sent", key=operation)
+    second = executor.submit(fetch, priority=PRIORITY_PLAYBACK)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded("{} not answered in {:.0f}s".format(url, timeout))
+        answered = [future for future in done if future.exception() is None]
+        if answered:
+            winner = first if first in answered else answered[0]
+            if winner is second:
+                get_metrics().increment("hedge.won", key=operation)
+            for loser in (done | pending) - {winner}:
+                loser.add_done_callback(_close_loser)
+            return winner.result()
+        error = error or next(iter(done)).exception()
+    raise error
@@ -6,14 +6,16 @@ import time
 import threading
 from re import findall, search, sub
 from os import makedirs, statvfs
-from os.path import exists, getsize, join
+from os.path import basename, exists, getsize, join
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 from Screens.MessageBox import MessageBox
 from Components.config import config
 from Components.Task import Task, Job, job_manager as JobManager
-import requests
-
+from .RaiPlayCDN import get_cdn
+from .RaiPlayExecutor import PRIORITY_PREFETCH, get_executor, when_all
+from .RaiPlayLimiter import get_session
 from .RaiPlayProgressParser import RaiPlayProgressParser
+from .RaiPlayRenditions import pick_rendition
 from . import _
 
 """
@@ -71,6 +73,8 @@ HANDLED_HTTP_HEADER_PARAMS = [
 # ================================
 # DOWNLOAD MANAGER
 # ================================
+# Relinker lookups of a whole season run as background executor work
+BULK_RESOLVE_PRIORITY = PRIORITY_PREFETCH
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
 
 # Import notification system
@@ -189,53 +193,33 @@ class RaiPlayDownloadManager:
             # self.worker.join(timeout=5)
             self.worker = None
 
-    def add_download(self, title, url, quality="best"):
-        """Add a new download to queue"""
+    def add_download(self, title, url, quality="best", progressive=False):
+        """
+        Add a new download to queue.
+
+        With progressive=True the file is written as MPEG-TS so it can be
+        played from disk while it is still being downloaded.
+        """
         try:
             print(f"[DOWNLOAD] Adding download: {title}")
 
-            final_url = self.get_real_video_url(url)
-            clean_title = self._clean_filename(title)
+            final_url = self.get_real_video_url(url, quality)
             download_id = str(int(time.time() * 1000))
 
-            # Determine file extension based on URL type
-            if '.m3u8' in final_url:
-                extension = ".mp4"  # ffmpeg will convert HLS to mp4
-                print("[DOWNLOAD] HLS stream - will use ffmpeg")
-            else:
-                extension = ".mp4"  # Default for direct streams
-                print("[DOWNLOAD] Direct stream - will use wget")
-
-            file_path = join(self.download_dir, f"{clean_title}{extension}")
-
-            download_item = {
-                'id': download_id,
-                'title': title,
-                'clean_title': clean_title,
-                'url': final_url,
-                'original_url': url,
-                'quality': quality,
-                'status': 'paused',
-                'progress': 0,
-                'file_path': file_path,
-                'file_size': 0,
-                'downloaded_bytes': 0,
-                'speed': 0,
-                'eta': 0,
-                'added_time': time.time(),
-                'start_time': None,
-                'end_time': None,
-                'extension': extension
-            }
+            download_item = self._build_download_item(
+                download_id, title, url, final_url, quality, progressive)
+            file_path = download_item['file_path']
 
             self.download_queue.append(download_item)
             self.save_downloads()
 
-            self.session.open(
-                MessageBox,
-                f"📥 Added to queue: {title}",
-                MessageBox.TYPE_INFO,
-                timeout=3)
+            if not progressive:
+                # Progressive adds start with the player already opening
+                self.session.open(
+                    MessageBox,
+                    f"📥 Added to queue: {title}",
+                    MessageBox.TYPE_INFO,
+                    timeout=3)
 
             print("[DOWNLOAD] Successfully added: {}".format(title))
             print("[DOWNLOAD] Stream type: {}".format(
@@ -254,6 +238,176 @@ class RaiPlayDownloadManager:
             traceback.print_exc()
             return None
 
+    def queued_content_ids(self):
+        """Content IDs already in the queue (or already downloaded)"""
+        known_ids = set()
+        for item in self.download_queue:
+            content_id = item.get('content_id') or self._content_id(
+                item.get('original_url') or item.get('url', ''))
+            if content_id:
+                known_ids.add(content_id)
+        return known_ids
+
+    def resolve_downloads(self, entries, callback, quality="best",
+                          known_ids=(), token=None):
+        """
+        Resolve the relinker URL of every new entry of a set.
+
+        Each lookup is a background task of the shared executor, which
+        bounds the parallelism; nothing waits on a worker. Nothing of the
+        queue is read or changed, so this may be called from a worker
+        thread; known_ids (queued_content_ids() taken on the main thread)
+        are skipped.
+
+        Args:
+            entries (list): (title, url) tuples
+            callback (callable): Called with ((title, url, final_url)
+                                 list, skipped_count) in the thread that
+                                 finishes the last lookup
+            quality (str): Requested quality for every entry
+            known_ids (set): Content IDs not to resolve again
+            token (CancelToken): Drops the lookups not started yet
+        """
+        known_ids = set(known_ids)
+        pending = []
+        skipped = 0
+        for title, url in entries:
+            content_id = self._content_id(url)
+            if not url or not content_id or content_id in known_ids:
+                skipped += 1
+                continue
+            known_ids.add(content_id)
+            pending.append((title, url))
+
+        if not pending:
+            callback([], skipped)
+            return
+
+        print("[DOWNLOAD] Bulk add: resolving {} entries".format(len(pending)))
+        executor = get_executor()
+        futures = [
+            executor.submit(self.get_real_video_url, url, quality,
+                            priority=BULK_RESOLVE_PRIORITY, token=token)
+            for title, url in pending
+        ]
+
+        def lookups_done(futures):
+            result = []
+            for (title, url), future in zip(pending, futures):
+                try:
+                    final_url = future.result()
+                except Exception as e:
+                    # As get_real_video_url does on an error
+                    print("[DOWNLOAD] Cannot resolve {}: {}".format(title, e))
+                    final_url = url
+                result.append((title, url, final_url))
+            callback(result, skipped)
+
+        when_all(futures, lookups_done)
+
+    def add_downloads(self, resolved, quality="best"):
+        """
+        Add a whole set of resolved episodes to the queue in one pass.
+
+        Called on the main thread, like add_download: entries whose
+        content ID is already queued are skipped and the queue file is
+        written only once for the whole batch.
+
+        Args:
+            resolved (list): (title, url, final_url) from resolve_downloads
+            quality (str): Requested quality for every entry
+
+        Returns:
+            tuple: (added_count, skipped_count)
+        """
+        known_ids = self.queued_content_ids()
+        base_id = int(time.time() * 1000)
+        used_paths = set(item['file_path'] for item in self.download_queue)
+        added = 0
+        skipped = 0
+        for index, (title, url, final_url) in enumerate(resolved):
+            content_id = self._content_id(url)
+            if content_id in known_ids:
+                # Queued meanwhile by another add
+                skipped += 1
+                continue
+            known_ids.add(content_id)
+            download_item = self._build_download_item(
+                str(base_id + index), title, url, final_url, quality)
+            if download_item['file_path'] in used_paths:
+                # Same episode title in one set: keep both files apart
+                download_item['file_path'] = join(
+                    self.download_dir, "{}_{}{}".format(
+                        download_item['clean_title'],
+                        download_item['content_id'][-8:],
+                        download_item['extension']))
+            used_paths.add(download_item['file_path'])
+            self.download_queue.append(download_item)
+            added += 1
+
+        if not added:
+            print("[DOWNLOAD] Bulk add: nothing new to queue")
+            return 0, skipped
+        self.save_downloads()
+        print("[DOWNLOAD] Bulk add: {} added, {} skipped".format(added, skipped))
+        return added, skipped
+
+    def _build_download_item(self, download_id, title, url, final_url, quality,
+                             progressive=False):
+        """Build a queue entry for an already resolved video URL"""
+        clean_title = self._clean_filename(title)
+
+        # Determine file extension based on URL type
+        if progressive:
+            extension = ".ts"  # ffmpeg remuxes to a playable-while-growing TS
+            print("[DOWNLOAD] Progressive download - will use ffmpeg (TS)")
+        elif '.m3u8' in final_url:
+            extension = ".mp4"  # ffmpeg will convert HLS to mp4
+            print("[DOWNLOAD] HLS stream - will use ffmpeg")
+        else:
+            extension = ".mp4"  # Default for direct streams
+            print("[DOWNLOAD] Direct stream - will use wget")
+
+        return {
+            'id': download_id,
+            'content_id': self._content_id(url),
+            'title': title,
+            'clean_title': clean_title,
+            'url': final_url,
+            'original_url': url,
+            'quality': quality,
+            'status': 'paused',
+            'progress': 0,
+            'file_path': join(self.download_dir, f"{clean_title}{extension}"),
+            'file_size': 0,
+            'downloaded_bytes': 0,
+            'speed': 0,
+            'eta': 0,
+            'added_time': time.time(),
+            'start_time': None,
+            'end_time': None,
+            'extension': extension,
+            'progressive': progressive
+        }
+
+    def _content_id(self, url):
+        """
+        Return a stable content identifier for a RaiPlay URL.
+
+        Relinker URLs carry the content in the 'cont' parameter, page
+        URLs are identified by their path without extension.
+        """
+        if not url:
+            return ""
+        parsed = urlparse(url)
+        cont = parse_qs(parsed.query).get("cont")
+        if cont and cont[0]:
+            return cont[0]
+        name = basename(parsed.path.rstrip("/"))
+        if "." in name:
+            name = name.rsplit(".", 1)[0]
+        return name or url
+
     def has_pending_downloads(self):
         """
         Check if there are downloads waiting to be processed.
@@ -403,9 +557,14 @@ class RaiPlayDownloadManager:
                     timeout=5)
                 return
 
+            # Throughput of this run, for the CDN edge ranking
+            item['run_start'] = time.time()
+            item['run_offset'] = getsize(item['file_path']) if exists(item['file_path']) else 0
+
             # Continue with normal download process...
             cmd = self.build_download_command(
-                final_url, item['file_path'], False)
+                final_url, item['file_path'], False,
+                item.get('progressive', False))
             self.update_download_status(item['id'], "downloading", 1)
 
             job = RaiPlayDownloadJob(
@@ -577,19 +736,25 @@ class RaiPlayDownloadManager:
             print(f"[DOWNLOAD] URL validation error: {e}")
             return False
 
-    def build_download_command(self, url, file_path, resume=False):
+    def build_download_command(self, url, file_path, resume=False,
+                               progressive=False):
         """
         Build appropriate download command based on URL type.
         Args:
             url (str): Video URL
             file_path (str): Output file path
             resume (bool): Whether to resume existing download
+            progressive (bool): Write a TS file playable while growing
 
         Returns:
             str: Shell command for downloading
         """
         print(f"[DOWNLOAD] Building download command for: {url}")
 
+        if progressive:
+            print("[DOWNLOAD] Progressive download, using ffmpeg to TS")
+            return self.build_ffmpeg_command(url, file_path, progressive=True)
+
         # Use ffmpeg for HLS streams, wget for direct downloads
         if '.m3u8' in url:
             print("[DOWNLOAD] HLS stream detected, using ffmpeg")
@@ -598,17 +763,23 @@ class RaiPlayDownloadManager:
             print("[DOWNLOAD] Direct video stream, using wget")
             return self.build_wget_command(url, file_path, resume)
 
-    def build_ffmpeg_command(self, url, file_path):
+    def build_ffmpeg_command(self, url, file_path, progressive=False):
         """Build ffmpeg command with detailed progress output"""
-        if not file_path.endswith('.mp4'):
+        extension = '.ts' if progressive else '.mp4'
+        if not file_path.endswith(extension):
             file_path = file_path.rsplit(
-                '.', 1)[0] + '.mp4' if '.' in file_path else file_path + '.mp4'
+                '.', 1)[0] + extension if '.' in file_path else file_path + extension
         cmd_parts = [
             'ffmpeg',
             '-user_agent', f'"{USER_AGENT}"',
             '-headers', '"Referer: https://www.raiplay.it/"',
             '-i', f'"{url}"',
             '-c', 'copy',
+        ]
+        if progressive:
+            # MPEG-TS has no trailing index, the player can read it as it grows
+            cmd_parts.extend(['-f', 'mpegts', '-flush_packets', '1'])
+        cmd_parts += [
             '-y',
             '-hide_banner',
             '-loglevel', 'warning',
@@ -677,6 +848,11 @@ class RaiPlayDownloadManager:
                         try:
                             item['file_size'] = getsize(filename)
                             item['downloaded_bytes'] = item['file_size']
+                            if item.get('run_start'):
+                                get_cdn().record(
+                                    item['url'],
+                                    item['file_size'] - item.get('run_offset', 0),
+                                    item['end_time'] - item['run_start'])
                             video_info = {
                                 'title': title,
                                 'file_path': filename,
@@ -761,15 +937,15 @@ class RaiPlayDownloadManager:
             ]
 
             for pattern in video_patterns:
-                video_match = search(pattern, xml_content)
-                if video_match:
-                    candidate_url = video_match.group(0)
-                    # Prefer non-HLS URLs
-                    if '.m3u8' not in candidate_url:
-                        video_url = candidate_url
-                        print(
-                            "[DOWNLOAD] Found non-HLS video URL: {}".format(video_url))
-                        return video_url
+                # Prefer non-HLS URLs, then the fastest CDN edge
+                candidates = [
+                    candidate_url for candidate_url in findall(pattern, xml_content)
+                    if '.m3u8' not in candidate_url]
+                if candidates:
+                    video_url = get_cdn().select(candidates)
+                    print(
+                        "[DOWNLOAD] Found non-HLS video URL: {}".format(video_url))
+                    return video_url
 
         print("[DOWNLOAD] No direct video URL found, will use original URL")
         return None
@@ -818,7 +994,7 @@ class RaiPlayDownloadManager:
             }
 
             # Download master playlist
-            response = requests.get(
+            response = get_session().get(
                 master_url,
                 headers=headers,
                 timeout=30,
@@ -879,9 +1055,13 @@ class RaiPlayDownloadManager:
             print(f"[DOWNLOAD] Error processing HLS master playlist: {e}")
             return master_url
 
-    def get_real_video_url(self, url):
+    def get_real_video_url(self, url, quality="best"):
         """
         Extract the actual video URL from RaiPlay's relinker service.
+
+        A progressive MP4 at the requested quality is preferred: it is a
+        single HTTP transfer, where HLS costs a request per segment and a
+        remux. Otherwise the HLS manifest is returned.
         """
         print(f"[DOWNLOAD] Processing URL through relinker: {url}")
 
@@ -909,7 +1089,7 @@ class RaiPlayDownloadManager:
             }
 
             # Fetch the XML response
-            response = requests.get(
+            response = get_session().get(
                 relinker_url,
                 headers=headers,
                 timeout=30,
@@ -919,6 +1099,12 @@ class RaiPlayDownloadManager:
 
             print(f"[DOWNLOAD] Response length: {len(content)}")
 
+            rendition = pick_rendition(url, content, quality)
+            if rendition is not None:
+                print("[DOWNLOAD] Selected {} rendition ({} kbps): {}".format(
+                    rendition.kind, rendition.bitrate or "?", rendition.url))
+                return rendition.url
+
             # Search for video URLs in common formats
             video_patterns = [
                 r'<url[^>]*>(https?://[^<]+\.mp4[^<]*)</url>',
@@ -930,12 +1116,12 @@ class RaiPlayDownloadManager:
 
             for pattern in video_patterns:
                 matches = findall(pattern, content)
+                candidates = []
                 for match in matches:
                     if match and any(
                         ext in match for ext in [
                             '.mp4', '.m3u8', '.ts']):
                         video_url = match.replace('&amp;', '&').strip()
-                        video_url = match.replace('&amp;', '&').strip()
                         print(
                             "[DOWNLOAD] Found video URL: {}".format(video_url))
 
@@ -946,7 +1132,11 @@ class RaiPlayDownloadManager:
                                 "[DOWNLOAD] Skipping image URL: {}".format(video_url))
                             continue
 
-                        return video_url
+                        candidates.append(video_url)
+
+                # Same rendition on several CDN edges: take the fastest
+                if candidates:
+                    return get_cdn().select(candidates)
 
             print("[DOWNLOAD] No valid video URL found, using original URL")
             return url
@@ -974,6 +1164,21 @@ class RaiPlayDownloadManager:
         self.save_downloads()
         return self.download_queue
 
+    def is_download_finished(self, download_id):
+        """True once a download is no longer writing its file"""
+        for item in self.download_queue:
+            if item['id'] == download_id:
+                # New items start out 'paused' before they get a slot
+                return item['status'] in ['completed', 'error']
+        return True
+
+    def get_download(self, download_id):
+        """Return the queue entry for download_id or None"""
+        for item in self.download_queue:
+            if item['id'] == download_id:
+                return item
+        return None
+
     def get_active_count(self):
         """Get count of active downloads"""
         return len([item for item in self.download_queue
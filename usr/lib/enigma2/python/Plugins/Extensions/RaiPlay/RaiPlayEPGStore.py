@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+from os import makedirs
+from os.path import dirname, exists, join
+
+from .RaiPlayExecutor import PRIORITY_MAINTENANCE, get_executor, when_all
+
+try:
+    import sqlite3
+    SQLITE_AVAILABLE = True
+except ImportError:
+    SQLITE_AVAILABLE = False
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play EPG Warehouse Module                        #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Local store of the 8-day replay guide            #
+#    - SQLite, with a compact JSON fallback             #
+#    - Parallel prefetch of every channel and day       #
+#    - Incremental refresh of today and yesterday       #
+#    - Search in the last week                          #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+EPG_DAYS = 8
+# Minimum time between two background refreshes
+EPG_REFRESH_SECONDS = 30 * 60
+# Age after which today and yesterday are fetched again for a screen
+EPG_LIVE_TTL = 5 * 60
+# In the plugin directory: it exists on every receiver
+EPG_STORE_DIR = join(dirname(__file__), "cache")
+# Program fields kept in the store, in this order
+EPG_FIELDS = ("timePublished", "title", "url", "icon")
+
+
+def iso_day(date_api):
+    """'dd-mm-YYYY' (replay API format) -> 'YYYY-MM-DD'"""
+    return datetime.strptime(date_api, "%d-%m-%Y").strftime("%Y-%m-%d")
+
+
+def replay_days(days=EPG_DAYS):
+    """Replay dates in API format, today first"""
+    today = date.today()
+    return [(today - timedelta(days=i)).strftime("%d-%m-%Y")
+            for i in range(days)]
+
+
+class SQLiteEPGStore:
+    """Programs stored as rows keyed by (channel, day)"""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS days ("
+            "channel TEXT, day TEXT, fetched REAL, "
+            "PRIMARY KEY (channel, day))")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS programs ("
+            "channel TEXT, day TEXT, pos INTEGER, timePublished TEXT, "
+            "title TEXT, url TEXT, icon TEXT)")
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS programs_day "
+            "ON programs (channel, day)")
+        self.db.commit()
+
+    def has_day(self, channel, day):
+        return self.fetched(channel, day) is not None
+
+    def fetched(self, channel, day):
+        """Time a channel and day was stored, None if never fetched"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT fetched FROM days WHERE channel=? AND day=?",
+                (channel, day)).fetchone()
+        return row[0] if row else None
+
+    def put_day(self, channel, day, programs):
+        rows = [
+            (channel, day, pos) + tuple(p.get(f, "") for f in EPG_FIELDS)
+            for pos, p in enumerate(programs)
+        ]
+        with self.lock:
+            self.db.execute(
+                "DELETE FROM programs WHERE channel=? AND day=?",
+                (channel, day))
+            self.db.executemany(
+                "INSERT INTO programs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute(
+                "INSERT OR REPLACE INTO days VALUES (?, ?, ?)",
+                (channel, day, time.time()))
+            self.db.commit()
+
+    def get_day(self, channel, day):
+        """Programs of one channel and day, None if never fetched"""
+        if not self.has_day(channel, day):
+            return None
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT timePublished, title, url, icon FROM programs "
+                "WHERE channel=? AND day=? ORDER BY pos",
+                (channel, day)).fetchall()
+        return [dict(zip(EPG_FIELDS, row)) for row in rows]
+
+    def search(self, text):
+        """Programs whose title contains text, newest first"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT channel, day, timePublished, title, url, icon "
+                "FROM programs WHERE title LIKE ? "
+                "ORDER BY day DESC, timePublished DESC",
+                ("%" + text + "%",)).fetchall()
+        return [
+            dict(zip(("channel", "day") + EPG_FIELDS, row)) for row in rows
+        ]
+
+    def prune(self, oldest_day):
+        with self.lock:
+            self.db.execute("DELETE FROM programs WHERE day < ?", (oldest_day,))
+            self.db.execute("DELETE FROM days WHERE day < ?", (oldest_day,))
+            self.db.commit()
+
+    def flush(self):
+        """Every put is committed already"""
+
+
+class JsonEPGStore:
+    """
+    Fallback when sqlite3 is missing: one JSON file holding, per
+    "channel|day" key, the programs packed as field lists. Puts only
+    mark the data dirty; the file is written once by flush() or prune()
+    at the end of a refresh, not once per channel/day. Fetch times are
+    only kept in memory: a day loaded from the file counts as old.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {}
+        self.times = {}
+        self.dirty = False
+        if exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                print("[EPG STORE] Error loading {}: {}".format(self.path, e))
+
+    def _save(self):
+        self.dirty = False
+        try:
+            with open(self.path, "w") as f:
+                json.dump(self.data, f, separators=(",", ":"))
+        except Exception as e:
+            print("[EPG STORE] Error saving {}: {}".format(self.path, e))
+
+    def has_day(self, channel, day):
+        return "{}|{}".format(channel, day) in self.data
+
+    def fetched(self, channel, day):
+        key = "{}|{}".format(channel, day)
+        if key not in self.data:
+            return None
+        return self.times.get(key, 0)
+
+    def put_day(self, channel, day, programs):
+        packed = [[p.get(f, "") for f in EPG_FIELDS] for p in programs]
+        key = "{}|{}".format(channel, day)
+        with self.lock:
+            self.data[key] = packed
+            self.times[key] = time.time()
+            self.dirty = True
+
+    def get_day(self, channel, day):
+        packed = self.data.get("{}|{}".format(channel, day))
+        if packed is None:
+            return None
+        return [dict(zip(EPG_FIELDS, row)) for row in packed]
+
+    def search(self, text):
+        text = text.lower()
+        result = []
+        for key, packed in list(self.data.items()):
+            channel, day = key.split("|", 1)
+            for row in packed:
+                if text in row[1].lower():
+                    result.append(
+                        dict(zip(("channel", "day") + EPG_FIELDS, [channel, day] + row)))
+        result.sort(key=lambda p: (p["day"], p["timePublished"]), reverse=True)
+        return result
+
+    def prune(self, oldest_day):
+        with self.lock:
+            self.data = {
+                key: value for key, value in self.data.items()
+                if key.split("|", 1)[1] >= oldest_day
+            }
+            self._save()
+
+    def flush(self):
+        """Write the file if puts changed the data since the last save"""
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+
+class EPGWarehouse:
+    """
+    Local copy of the replay guide.
+
+    A background job fetches every channel x day pair that is missing
+    from the store, plus today and yesterday which are still changing,
+    as maintenance work on the shared executor. Replay screens read from the store and
+    only hit the network for a day that was never fetched, or for today
+    and yesterday once their copy is older than EPG_LIVE_TTL. When the
+    store cannot be opened every request goes to fetch_programs.
+    """
+
+    def __init__(self, fetch_programs, get_channels, store_dir=None):
+        """
+        Args:
+            fetch_programs (callable): (channel_api, 'dd-mm-YYYY') -> programs
+            get_channels (callable): () -> list of channel API names
+            store_dir (str): directory of the store (default EPG_STORE_DIR)
+        """
+        self.fetch_programs = fetch_programs
+        self.get_channels = get_channels
+        self.store = None
+        try:
+            self.store = self._open_store(store_dir or EPG_STORE_DIR)
+        except Exception as e:
+            print("[EPG STORE] Store not available, fetching directly: {}".format(e))
+        self.refreshing = False
+        self.last_refresh = 0
+
+    @staticmethod
+    def _open_store(store_dir):
+        if not exists(store_dir):
+            makedirs(store_dir)
+        if SQLITE_AVAILABLE:
+            return SQLiteEPGStore(join(store_dir, "raiplay_epg.db"))
+        return JsonEPGStore(join(store_dir, "raiplay_epg.json"))
+
+    def refresh_async(self, force=False):
+        """Start a background refresh unless one ran recently"""
+        if self.store is None or self.refreshing:
+            return
+        if not force and time.time() - self.last_refresh < EPG_REFRESH_SECONDS:
+            return
+        self.refreshing = True
+        get_executor().submit(self.refresh, priority=PRIORITY_MAINTENANCE)
+
+    def refresh(self):
+        """
+        Queue one maintenance task per channel/day pair; the store is
+        pruned when the last one is done. Nothing waits on a worker.
+        """
+        try:
+            days = replay_days()
+            channels = self.get_channels()
+            # Today and yesterday are still being published
+            pairs = [
+                (channel, day) for channel in channels for day in days
+                if day in days[:2] or not self.store.has_day(channel, iso_day(day))
+            ]
+            print("[EPG STORE] Refreshing {} channel/day pairs".format(len(pairs)))
+            start = time.time()
+            executor = get_executor()
+            futures = [
+                executor.submit(self._fetch_day, channel, day,
+                                priority=PRIORITY_MAINTENANCE)
+                for channel, day in pairs
+            ]
+            when_all(futures, lambda done: self._refresh_done(days, start))
+        except Exception as e:
+            print("[EPG STORE] Refresh error: {}".format(e))
+            self.refreshing = False
+
+    def _refresh_done(self, days, start):
+        try:
+            self.store.prune(iso_day(days[-1]))
+            self.last_refresh = time.time()
+            print("[EPG STORE] Refresh done in {:.1f}s".format(time.time() - start))
+        except Exception as e:
+            print("[EPG STORE] Refresh error: {}".format(e))
+        finally:
+            self.refreshing = False
+
+    def _fetch_day(self, channel, day):
+        try:
+            programs = self.fetch_programs(channel, day)
+            if programs:
+                self.store.put_day(channel, iso_day(day), programs)
+            return programs
+        except Exception as e:
+            print("[EPG STORE] {} {}: {}".format(channel, day, e))
+            return []
+
+    def get_programs(self, channel, day):
+        """Programs for a channel and 'dd-mm-YYYY' day, from the store if possible"""
+        if self.store is None:
+            return self.fetch_programs(channel, day)
+        stored_day = iso_day(day)
+        programs = self.store.get_day(channel, stored_day)
+        if programs is not None:
+            # Today and yesterday still get new programmes
+            if day not in replay_days(2):
+                return programs
+            fetched = self.store.fetched(channel, stored_day) or 0
+            if time.time() - fetched < EPG_LIVE_TTL:
+                return programs
+        fresh = self._fetch_day(channel, day)
+        # A day fetched for a screen is kept even if no refresh follows
+        self.store.flush()
+        return fresh or programs or []
+
+    def search(self, text):
+        """Find a programme anywhere in the stored week"""
+        if self.store is None:
+            return []
+        return self.store.search(text)
+
+
+_warehouse = None
+
+
+def get_epg_warehouse(api):
+    """Return the process-wide EPG warehouse built on a RaiPlayAPI"""
+    global _warehouse
+    if _warehouse is None:
+        _warehouse = EPGWarehouse(
+            api.get_programs,
+            lambda: [channel['api'] for channel in api.getReplayChannels()])
+    return _warehouse
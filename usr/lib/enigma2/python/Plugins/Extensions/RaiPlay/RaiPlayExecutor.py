@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Background Executor Module                  #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - One bounded worker pool for background work      #
+#    - Priority classes: user, playback, prefetch,      #
+#      maintenance                                      #
+#    - Prefetch never takes every worker                #
+#    - Per-screen cancellation tokens                   #
+#    - Queue depth and wait time metrics                #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+PRIORITY_USER = 0
+PRIORITY_PLAYBACK = 1
+PRIORITY_PREFETCH = 2
+PRIORITY_MAINTENANCE = 3
+PRIORITY_NAMES = {
+    PRIORITY_USER: "user",
+    PRIORITY_PLAYBACK: "playback",
+    PRIORITY_PREFETCH: "prefetch",
+    PRIORITY_MAINTENANCE: "maintenance"
+}
+EXECUTOR_WORKERS = 6
+# Prefetch and maintenance tasks running at once; the other workers are
+# always free for what the user is waiting on
+EXECUTOR_BACKGROUND_WORKERS = 3
+
+_worker = threading.local()
+
+
+class CancelToken:
+    """
+    Cancels everything a screen started: queued tasks are dropped,
+    Deferreds are cancelled. Running tasks may poll token.cancelled.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def _add(self, job):
+        with self.lock:
+            if not self.cancelled:
+                self.pending.add(job)
+                return True
+        job.cancel()
+        return False
+
+    def _discard(self, job):
+        with self.lock:
+            self.pending.discard(job)
+
+    def track(self, d):
+        """Cancel Deferred d with the token; returns d"""
+        if self._add(d):
+            def forget(result):
+                self._discard(d)
+                return result
+            d.addBoth(forget)
+        return d
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            pending, self.pending = self.pending, set()
+        for job in pending:
+            job.cancel()
+
+
+class PriorityExecutor:
+    """
+    Bounded thread pool taking the most urgent queued task first.
+
+    Workers are started on demand up to 'workers'. Prefetch and
+    maintenance tasks run on at most 'background_workers' of them, so a
+    burst of prefetching never delays a user or playback task.
+    """
+
+    def __init__(self, workers=EXECUTOR_WORKERS,
+                 background_workers=EXECUTOR_BACKGROUND_WORKERS):
+        self.workers = workers
+        self.background_workers = background_workers
+        self.queue = []
+        self.depth = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.sequence = itertools.count()
+        self.cond = threading.Condition()
+        self.threads = []
+        self.idle = 0
+        self.background = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return its concurrent Future.
+
+        Keyword-only options: priority (PRIORITY_*, default
+        PRIORITY_USER) and token (CancelToken).
+        """
+        priority = kwargs.pop("priority", PRIORITY_USER)
+        token = kwargs.pop("token", None)
+        future = Future()
+        if token is not None:
+            if not token._add(future):
+                return future
+            future.add_done_callback(token._discard)
+        with self.cond:
+            heapq.heappush(self.queue, (
+                priority, next(self.sequence), time.time(), future, fn, args, kwargs))
+            self._count(priority, 1)
+            if not self.idle and len(self.threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, name="RaiPlayWorker-{}".format(len(self.threads)))
+                thread.daemon = True
+                self.threads.append(thread)
+                thread.start()
+            else:
+                self.cond.notify_all()
+        return future
+
+    def _count(self, priority, delta):
+        self.depth[priority] += delta
+        get_metrics().gauge(
+            "executor.queue", self.depth[priority], key=PRIORITY_NAMES[priority])
+
+    def _next(self):
+        """Pop the next runnable task (cond held); None to wait"""
+        while self.queue:
+            task = self.queue[0]
+            if task[3].cancelled():
+                heapq.heappop(self.queue)
+                self._count(task[0], -1)
+                continue
+            if task[0] >= PRIORITY_PREFETCH and self.background >= self.background_workers:
+                return None
+            heapq.heappop(self.queue)
+            self._count(task[0], -1)
+            if task[0] >= PRIORITY_PREFETCH:
+                self.background += 1
+            return task
+        return None
+
+    def _work(self):
+        _worker.active = True
+        while True:
+            with self.cond:
+                task = self._next()
+                while task is None:
+                    self.idle += 1
+                    self.cond.wait()
+                    self.idle -= 1
+                    task = self._next()
+            priority, sequence, queued, future, fn, args, kwargs = task
+            get_metrics().observe(
+                "executor.wait", time.time() - queued, key=PRIORITY_NAMES[priority])
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                if priority >= PRIORITY_PREFETCH:
+                    with self.cond:
+                        self.background -= 1
+                        self.cond.notify_all()
+            # An idle worker must not keep the last task's arguments alive
+            del task, future, fn, args, kwargs
+
+    def queue_depth(self):
+        """Queued tasks per priority name"""
+        with self.cond:
+            return {PRIORITY_NAMES[p]: n for p, n in self.depth.items()}
+
+
+def in_worker():
+    """True in an executor thread: waiting there on other tasks can stall the pool"""
+    return getattr(_worker, "active", False)
+
+
+def when_all(futures, callback):
+    """
+    Call callback(futures) once every future is done, in the thread
+    that completes the last one (or right away).
+    """
+    futures = list(futures)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            callback(futures)
+
+    if not futures:
+        callback(futures)
+    for future in futures:
+        future.add_done_callback(done)
+
+
+_executor = None
+
+
+def get_executor():
+    """Return the process-wide background executor"""
+    global _executor
+    if _executor is None:
+        _executor = PriorityExecutor()
+    return _executor
@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, remove
+from os.path import exists, join
+from re import search
+from shutil import rmtree
+from urllib.parse import urljoin
+
+from .RaiPlayCDN import get_cdn
+from .RaiPlayDNS import new_dns_session
+from .RaiPlayDeadline import hedged_get
+from .RaiPlayLocalServer import get_local_server
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play HLS Read-Ahead Proxy Module                 #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Rewrites HLS playlists to localhost              #
+#    - Prefetches next segments on parallel connections #
+#    - RAM or disk segment buffer                       #
+#    - Buffer health reporting                          #
+#    - Live rewind ring buffer on disk                  #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
+HLS_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Referer": "https://www.raiplay.it/"
+}
+HLS_TIMEOUT = 15
+# Segments fetched ahead of the one the player is reading
+DEFAULT_PREFETCH = 4
+DEFAULT_WORKERS = 3
+DEFAULT_BUFFER_BYTES = 48 * 1024 * 1024
+DISK_BUFFER_ROOT = "/tmp/raiplay_hls"
+# Live rewind: ring buffer bounds and playlist polling
+DEFAULT_REWIND_BYTES = 512 * 1024 * 1024
+LIVE_POLL_MIN_SECONDS = 1.0
+# Tags that belong to the segment after them, not to the playlist header
+SEGMENT_TAGS = ("#EXT-X-DISCONTINUITY", "#EXT-X-PROGRAM-DATE-TIME",
+                "#EXT-X-DATERANGE", "#EXT-X-BYTERANGE", "#EXT-X-GAP")
+
+
+def parse_media_playlist(text, playlist_url):
+    """
+    Parse an HLS media playlist.
+
+    Returns:
+        list: [(sequence, absolute_url, duration)] in playlist order
+    """
+    sequence = 0
+    seq_match = search(r"#EXT-X-MEDIA-SEQUENCE:(\d+)", text)
+    if seq_match:
+        sequence = int(seq_match.group(1))
+
+    segments = []
+    duration = 0.0
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#EXTINF:"):
+            try:
+                duration = float(line[8:].split(",", 1)[0])
+            except ValueError:
+                duration = 0.0
+        elif line and not line.startswith("#"):
+            segments.append((sequence, urljoin(playlist_url, line), duration))
+            sequence += 1
+            duration = 0.0
+    return segments
+
+
+class SegmentBuffer:
+    """
+    Bounded segment store kept in RAM or in a directory on disk.
+    The oldest segments are evicted first when max_bytes, or the
+    optional max_seconds of buffered media, is exceeded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUFFER_BYTES, directory=None,
+                 max_seconds=None):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.durations = {}
+        self.total_bytes = 0
+        self.total_seconds = 0.0
+        self.lock = threading.Lock()
+        if self.directory and not exists(self.directory):
+            makedirs(self.directory)
+
+    def _path(self, key):
+        return join(self.directory, "{}_{}.ts".format(*key))
+
+    def _over_limit(self):
+        if self.total_bytes > self.max_bytes:
+            return True
+        return self.max_seconds is not None and self.total_seconds > self.max_seconds
+
+    def put(self, key, data, duration=0.0):
+        with self.lock:
+            if key in self.entries:
+                return
+            if self.directory:
+                with open(self._path(key), "wb") as f:
+                    f.write(data)
+                self.entries[key] = len(data)
+            else:
+                self.entries[key] = data
+            self.total_bytes += len(data)
+            self.durations[key] = duration
+            self.total_seconds += duration
+            while self._over_limit() and len(self.entries) > 1:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        old_key, value = self.entries.popitem(last=False)
+        self.total_seconds -= self.durations.pop(old_key, 0.0)
+        if self.directory:
+            self.total_bytes -= value
+            try:
+                remove(self._path(old_key))
+            except OSError:
+                pass
+        else:
+            self.total_bytes -= len(value)
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            if not self.directory:
+                return self.entries[key]
+            try:
+                with open(self._path(key), "rb") as f:
+                    return f.read()
+            except OSError:
+                return None
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries.keys())
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.durations = {}
+            self.total_bytes = 0
+            self.total_seconds = 0.0
+            if self.directory:
+                rmtree(self.directory, ignore_errors=True)
+
+
+class HLSProxySource:
+    """
+    Local HLS proxy for one playback.
+
+    The player gets a localhost master playlist; variant and segment URIs
+    are rewritten to point back here. When the player asks for segment N,
+    segments N+1..N+prefetch are downloaded in parallel into the buffer,
+    so the player reads them at local speed.
+
+    With rewind_seconds set, live playlists are captured continuously
+    into a disk ring buffer and the player gets a playlist window that
+    covers every buffered segment, so pause and rewind are served from
+    local storage.
+    """
+
+    def __init__(self, master_url, headers=None, prefetch=DEFAULT_PREFETCH,
+                 workers=DEFAULT_WORKERS, max_bytes=DEFAULT_BUFFER_BYTES,
+                 buffer_root=None, rewind_seconds=0):
+        self.master_url = master_url
+        self.headers = headers or HLS_HEADERS
+        self.prefetch = prefetch
+        self.token = None
+        self.session = new_dns_session(pool_maxsize=workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_bytes = max_bytes
+        self.buffer_root = buffer_root
+        self.rewind_seconds = rewind_seconds
+        self.buffer = SegmentBuffer(max_bytes)
+        self.live_variant = None
+        self.live_thread = None
+        self.variants = []
+        self.segments = {}
+        self.durations = {}
+        self.tags = {}
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+        # Buffer health counters
+        self.playhead = None
+        self.hits = 0
+        self.misses = 0
+        self.fetched_bytes = 0
+        self.fetch_seconds = 0.0
+
+    def _get(self, url):
+        start = time.time()
+        response = self.session.get(
+            url, headers=self.headers, timeout=HLS_TIMEOUT, verify=False)
+        response.raise_for_status()
+        data = response.content
+        seconds = time.time() - start
+        self.fetch_seconds += seconds
+        self.fetched_bytes += len(data)
+        get_cdn().record(response.url, len(data), seconds)
+        return response.url, data
+
+    # -------------------- playlists --------------------
+
+    def _master_playlist(self):
+        # The player waits on this one before anything else: hedge it
+        start = time.time()
+        response = hedged_get(
+            self.session, self.master_url, "hls.master", HLS_TIMEOUT,
+            headers=self.headers, verify=False)
+        response.raise_for_status()
+        final_url, data = response.url, response.content
+        self.fetch_seconds += time.time() - start
+        self.fetched_bytes += len(data)
+        text = data.decode("utf-8", errors="ignore")
+        if "#EXT-X-STREAM-INF" not in text:
+            # Already a media playlist
+            self.variants = [final_url]
+            return self._rewrite_media(0, final_url, text)
+
+        self.variants = []
+        lines = []
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
+                lines.append("/{}/variant/{}.m3u8".format(
+                    self.token, len(self.variants)))
+                self.variants.append(urljoin(final_url, stripped))
+            elif 'URI="' in stripped:
+                lines.append(self._absolute_uri(stripped, final_url))
+            else:
+                lines.append(line)
+        return "\n".join(lines) + "\n"
+
+    def _media_playlist(self, variant):
+        if variant >= len(self.variants):
+            self._master_playlist()
+        final_url, data = self._get(self.variants[variant])
+        return self._rewrite_media(
+            variant, final_url, data.decode("utf-8", errors="ignore"))
+
+    def _is_rewindable(self, text):
+        return self.rewind_seconds > 0 and "#EXT-X-ENDLIST" not in text
+
+    def _absolute_uri(self, line, base_url):
+        uri_match = search(r'URI="([^"]+)"', line)
+        if not uri_match:
+            return line
+        return line.replace(
+            uri_match.group(1), urljoin(base_url, uri_match.group(1)))
+
+    def _segment_tags(self, text, playlist_url):
+        """
+        Tag lines of each segment of a media playlist, #EXTINF aside, in
+        playlist order. Before the first segment only SEGMENT_TAGS are
+        its own, the other lines are the playlist header.
+        """
+        tags = []
+        pending = []
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#EXTINF"):
+                continue
+            if not stripped.startswith("#"):
+                tags.append(pending)
+                pending = []
+            elif tags or stripped.split(":", 1)[0] in SEGMENT_TAGS:
+                pending.append(self._absolute_uri(stripped, playlist_url))
+        return tags
+
+    def _rewrite_media(self, variant, playlist_url, text):
+        segments = parse_media_playlist(text, playlist_url)
+        self._remember(variant, segments, self._segment_tags(text, playlist_url))
+
+        if self._is_rewindable(text):
+            self._start_live_capture(variant)
+            return self._live_window(variant, playlist_url, text, segments)
+
+        out = []
+        index = 0
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
+                sequence = segments[index][0]
+                out.append("/{}/seg/{}/{}.ts".format(
+                    self.token, variant, sequence))
+                index += 1
+            elif 'URI="' in stripped:
+                out.append(self._absolute_uri(stripped, playlist_url))
+            else:
+                out.append(line)
+
+        if segments:
+            # Warm the buffer before the player asks for the first segment
+            self._schedule(variant, segments[0][0])
+        return "\n".join(out) + "\n"
+
+    def _remember(self, variant, segments, tags):
+        """
+        Record the segments of a playlist refresh, with their own tags,
+        and forget the older ones of the variant that are no longer
+        buffered, so hours of live playback do not grow the tables.
+        """
+        if not segments:
+            return
+        first = segments[0][0]
+        buffered = set(self.buffer.keys())
+        with self.lock:
+            for (sequence, url, duration), segment_tags in zip(segments, tags):
+                self.segments[(variant, sequence)] = url
+                self.durations[(variant, sequence)] = duration
+                self.tags[(variant, sequence)] = segment_tags
+            stale = [
+                key for key in self.segments
+                if key[0] == variant and key[1] < first
+                and key not in buffered and key not in self.inflight]
+            for key in stale:
+                del self.segments[key]
+                self.durations.pop(key, None)
+                self.tags.pop(key, None)
+
+    # -------------------- live rewind --------------------
+
+    def _start_live_capture(self, variant):
+        # The capture follows the variant the player is reading
+        self.live_variant = variant
+        if self.live_thread is None:
+            self.live_thread = threading.Thread(target=self._capture_loop)
+            self.live_thread.daemon = True
+            self.live_thread.start()
+
+    def _capture_loop(self):
+        """Keep downloading new live segments into the ring buffer"""
+        while not self.closed:
+            wait = LIVE_POLL_MIN_SECONDS
+            try:
+                variant = self.live_variant
+                final_url, data = self._get(self.variants[variant])
+                text = data.decode("utf-8", errors="ignore")
+                segments = parse_media_playlist(text, final_url)
+                self._remember(
+                    variant, segments, self._segment_tags(text, final_url))
+                for sequence, url, duration in segments:
+                    if self.closed or variant != self.live_variant:
+                        break
+                    self._capture_segment((variant, sequence))
+                if segments:
+                    wait = max(LIVE_POLL_MIN_SECONDS, segments[-1][2] / 2)
+            except Exception as e:
+                print("[HLS PROXY] Live capture error: {}".format(e))
+                wait = LIVE_POLL_MIN_SECONDS * 3
+            time.sleep(wait)
+
+    def _capture_segment(self, key):
+        """Fetch a live segment, or wait for the prefetch already on it"""
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is None:
+                if key in self.buffer or self.closed:
+                    return
+                future = self.inflight[key] = self.executor.submit(
+                    self._fetch_segment, key)
+        try:
+            future.result(timeout=HLS_TIMEOUT)
+        except Exception:
+            pass
+
+    def _live_window(self, variant, playlist_url, text, segments):
+        """
+        Playlist covering the buffered past plus the current live window.
+        Buffered keys are contiguous sequences, oldest first; each one
+        keeps its own tags (discontinuity, date, key changes).
+        """
+        live_first = segments[0][0] if segments else 0
+        window = [key[1] for key in self.buffer.keys()
+                  if key[0] == variant and key[1] < live_first]
+        window += [sequence for sequence, url, duration in segments]
+
+        header = []
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("#EXTINF") or (
+                    stripped and not stripped.startswith("#")):
+                break
+            name = stripped.split(":", 1)[0]
+            if name == "#EXT-X-MEDIA-SEQUENCE" or name in SEGMENT_TAGS:
+                continue
+            header.append(self._absolute_uri(line, playlist_url))
+
+        out = header + ["#EXT-X-MEDIA-SEQUENCE:{}".format(
+            window[0] if window else live_first)]
+        for sequence in window:
+            out.extend(self.tags.get((variant, sequence), ()))
+            out.append("#EXTINF:{:.3f},".format(
+                self.durations.get((variant, sequence), 0.0)))
+            out.append("/{}/seg/{}/{}.ts".format(self.token, variant, sequence))
+        return "\n".join(out) + "\n"
+
+    # -------------------- segments --------------------
+
+    def _fetch_segment(self, key):
+        try:
+            if key in self.buffer:
+                return
+            url = self.segments.get(key)
+            if not url or self.closed:
+                return
+            try:
+                final_url, data = self._get(url)
+            except Exception:
+                get_cdn().failed(url)
+                raise
+            self.buffer.put(key, data, self.durations.get(key, 0.0))
+        except Exception as e:
+            print("[HLS PROXY] Segment {} failed: {}".format(key, e))
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def _schedule(self, variant, sequence):
+        """Queue segments sequence..sequence+prefetch not yet buffered"""
+        with self.lock:
+            for seq in range(sequence, sequence + self.prefetch + 1):
+                key = (variant, seq)
+                if key not in self.segments or key in self.inflight:
+                    continue
+                if key in self.buffer or self.closed:
+                    continue
+                self.inflight[key] = self.executor.submit(
+                    self._fetch_segment, key)
+
+    def _segment(self, variant, sequence):
+        key = (variant, sequence)
+        self.playhead = key
+        self._schedule(variant, sequence)
+
+        data = self.buffer.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        with self.lock:
+            future = self.inflight.get(key)
+        if future is not None:
+            try:
+                future.result(timeout=HLS_TIMEOUT)
+            except Exception:
+                pass
+            data = self.buffer.get(key)
+            if data is not None:
+                return data
+
+        url = self.segments.get(key)
+        if not url:
+            return None
+        final_url, data = self._get(url)
+        self.buffer.put(key, data, self.durations.get(key, 0.0))
+        return data
+
+    # -------------------- server side --------------------
+
+    def handle(self, handler, head_only=False):
+        path = handler.path.split("?", 1)[0].strip("/").split("/", 1)
+        route = path[1] if len(path) > 1 else ""
+        try:
+            if route.startswith("seg/"):
+                variant, sequence = route[4:].rsplit(".", 1)[0].split("/")
+                body = self._segment(int(variant), int(sequence))
+                content_type = "video/mp2t"
+            elif route.startswith("variant/"):
+                variant = int(route[8:].split(".", 1)[0])
+                body = self._media_playlist(variant).encode("utf-8")
+                content_type = "application/vnd.apple.mpegurl"
+            else:
+                body = self._master_playlist().encode("utf-8")
+                content_type = "application/vnd.apple.mpegurl"
+        except Exception as e:
+            print("[HLS PROXY] Error on {}: {}".format(route, e))
+            body = None
+
+        if body is None:
+            handler.send_response(502)
+            handler.end_headers()
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if not head_only:
+            handler.wfile.write(body)
+
+    def health(self):
+        """
+        Buffer health snapshot.
+
+        Returns:
+            dict: segments and seconds buffered ahead of the playhead,
+                  buffer size, hit/miss counters and fetch throughput
+        """
+        ahead = 0
+        seconds = 0.0
+        if self.playhead:
+            variant, sequence = self.playhead
+            seq = sequence + 1
+            while (variant, seq) in self.buffer:
+                ahead += 1
+                seconds += self.durations.get((variant, seq), 0.0)
+                seq += 1
+        throughput = 0
+        if self.fetch_seconds > 0:
+            throughput = int(self.fetched_bytes / self.fetch_seconds)
+        return {
+            "segments_ahead": ahead,
+            "seconds_ahead": round(seconds, 1),
+            "buffer_bytes": self.buffer.total_bytes,
+            "rewind_seconds": round(self.buffer.total_seconds, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight": len(self.inflight),
+            "throughput_bps": throughput
+        }
+
+    def start(self):
+        """Register on the local server and return the player URL"""
+        local_url = get_local_server().register(self, "master.m3u8")
+        if local_url and self.buffer_root:
+            self.buffer = SegmentBuffer(
+                self.max_bytes, join(self.buffer_root, self.token),
+                self.rewind_seconds or None)
+        return local_url
+
+    def stop(self):
+        """Stop prefetching and release the buffer"""
+        self.closed = True
+        if self.token:
+            get_local_server().unregister(self.token)
+        self.executor.shutdown(wait=False)
+        self.buffer.clear()
+        self.session.close()
+        print("[HLS PROXY] Stopped, final health: {}".format(self.health()))
+
+
+def start_hls_proxy(url, prefetch=DEFAULT_PREFETCH, buffer_root=None,
+                    max_bytes=DEFAULT_BUFFER_BYTES, rewind_seconds=0):
+    """
+    Start a read-ahead proxy for an HLS URL.
+
+    Args:
+        buffer_root (str): Keep segments on disk below this folder (RAM if None)
+        rewind_seconds (int): Live rewind window, 0 disables live capture
+
+    Returns:
+        tuple: (local_url, source) or (None, None) if the proxy can't start
+    """
+    try:
+        source = HLSProxySource(
+            url, prefetch=prefetch, max_bytes=max_bytes,
+            buffer_root=buffer_root, rewind_seconds=rewind_seconds)
+        local_url = source.start()
+        if not local_url:
+            source.stop()
+            return None, None
+        print("[HLS PROXY] {} -> {}".format(url, local_url))
+        return local_url, source
+    except Exception as e:
+        print("[HLS PROXY] Cannot start proxy: {}".format(e))
+        return None, None
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+from sys import intern
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Items Module                                #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Compact slotted list entries                     #
+#    - Interned repeated strings (types)                #
+#    - Dict style access for the existing screens       #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+# Dict key -> slot; "title" and "sub-type" are the spellings screens use
+ITEM_KEYS = {
+    "name": "name",
+    "title": "name",
+    "url": "url",
+    "icon": "icon",
+    "sub-type": "sub_type",
+    "sub_type": "sub_type",
+    "date": "date",
+    "duration": "duration",
+    "page_url": "page_url",
+    "type": "kind"
+}
+
+
+class Item:
+    """
+    One list entry with only the fields a screen shows or plays.
+
+    Uses __slots__ instead of a per-entry dict; sub-types and kinds,
+    which repeat across a list, are interned. item["name"],
+    item.get("sub-type", "") and "url" in item work as on the dicts the
+    screens used before, a None field counting as missing. Rare extra
+    fields go to a small dict created only when needed.
+    """
+
+    __slots__ = ("name", "url", "icon", "sub_type", "date", "duration",
+                 "page_url", "kind", "extra")
+
+    def __init__(self, name="", url=None, icon=None, sub_type=None,
+                 date=None, duration=None, page_url=None, kind=None, **extra):
+        self.name = name
+        self.url = url
+        self.icon = icon
+        self.sub_type = intern(sub_type) if sub_type.__class__ is str else sub_type
+        self.date = date
+        self.duration = duration
+        self.page_url = page_url
+        self.kind = intern(kind) if kind.__class__ is str else kind
+        self.extra = extra or None
+
+    def __getitem__(self, key):
+        slot = ITEM_KEYS.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        slot = ITEM_KEYS.get(key)
+        if slot is not None:
+            setattr(self, slot, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def to_dict(self):
+        """Plain dict (debug dumps, persistence)"""
+        data = {
+            key: getattr(self, slot) for key, slot in ITEM_KEYS.items()
+            if key not in ("title", "sub_type") and getattr(self, slot) is not None
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return "Item({!r}, {!r})".format(self.name, self.url)
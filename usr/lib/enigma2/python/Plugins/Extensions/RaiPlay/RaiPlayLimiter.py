@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from twisted.internet import defer, reactor
+
+from .RaiPlayBreaker import cached_response, get_breaker
+from .RaiPlayDNS import DNSAdapter
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Host Limiter Module                         #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Adaptive concurrency window per host (AIMD)      #
+#    - Backs off on 429/503 and honours Retry-After     #
+#    - Shrinks when server latency builds up            #
+#    - Shared requests session and Deferred acquire     #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+LIMIT_INITIAL = 4
+LIMIT_MIN = 1
+LIMIT_MAX = 16
+# Multiplicative decrease on throttling / on latency build-up
+LIMIT_BACKOFF = 0.5
+LIMIT_LATENCY_BACKOFF = 0.9
+# A response this many times slower than the host's best is congestion
+LIMIT_LATENCY_TOLERANCE = 3.0
+# ...unless it is still faster than this (seconds)
+LIMIT_LATENCY_FLOOR = 0.5
+# How fast the best latency follows slower responses
+LIMIT_LATENCY_DRIFT = 0.02
+# Pause when a 429/503 carries no Retry-After, and the longest honoured
+LIMIT_DEFAULT_PAUSE = 2
+LIMIT_MAX_PAUSE = 120
+# A blocking caller waits at most this long for a slot, then goes anyway
+LIMIT_MAX_WAIT = 5
+THROTTLE_STATUS = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta or HTTP date), or None"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return min(max(seconds, 0), LIMIT_MAX_PAUSE)
+
+
+class HostLimiter:
+    """
+    Concurrency window of one host.
+
+    Each completed request grows the window by 1/window (about one slot
+    per window of successes); a 429/503 halves it and pauses the host
+    for Retry-After; a response much slower than the best seen shrinks
+    it a little. Blocking callers wait on a condition, reactor callers
+    get a Deferred.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.window = float(LIMIT_INITIAL)
+        self.inflight = 0
+        self.paused_until = 0
+        self.best_latency = None
+        self.cond = threading.Condition()
+        self.waiters = deque()
+        self.timer_pending = False
+
+    def _free(self):
+        return self.inflight < int(self.window) and time.time() >= self.paused_until
+
+    def acquire(self, max_wait=LIMIT_MAX_WAIT):
+        """Block until a slot is free; returns the start time"""
+        start = time.time()
+        deadline = start + max_wait
+        with self.cond:
+            while not self._free():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                pause = self.paused_until - time.time()
+                self.cond.wait(min(remaining, pause) if pause > 0 else remaining)
+            self.inflight += 1
+        now = time.time()
+        get_metrics().observe("limiter.wait", now - start, key=self.host)
+        return now
+
+    def acquire_deferred(self):
+        """Deferred firing with the start time once a slot is free"""
+        with self.cond:
+            if self._free() and not self.waiters:
+                self.inflight += 1
+                return defer.succeed(time.time())
+
+            def cancel(d):
+                with self.cond:
+                    if d in self.waiters:
+                        self.waiters.remove(d)
+            d = defer.Deferred(cancel)
+            self.waiters.append(d)
+        self._wake()
+        return d
+
+    def release(self, started, status=None, retry_after=None, failed=False):
+        """Account a finished request and adapt the window"""
+        latency = time.time() - started
+        with self.cond:
+            self.inflight -= 1
+            if status in THROTTLE_STATUS:
+                self.window = max(LIMIT_MIN, self.window * LIMIT_BACKOFF)
+                pause = retry_after if retry_after is not None else LIMIT_DEFAULT_PAUSE
+                self.paused_until = max(self.paused_until, time.time() + pause)
+                get_metrics().increment("limiter.throttled", key=self.host)
+                print("[LIMITER] {} answered {}, window {:.1f}, pause {:.0f}s".format(
+                    self.host, status, self.window, pause))
+            elif failed:
+                self.window = max(LIMIT_MIN, self.window * LIMIT_LATENCY_BACKOFF)
+            else:
+                best = self.best_latency
+                if best is None or latency < best:
+                    self.best_latency = latency
+                else:
+                    self.best_latency = best + (latency - best) * LIMIT_LATENCY_DRIFT
+                if latency > LIMIT_LATENCY_FLOOR and best and latency > best * LIMIT_LATENCY_TOLERANCE:
+                    self.window = max(LIMIT_MIN, self.window * LIMIT_LATENCY_BACKOFF)
+                else:
+                    self.window = min(LIMIT_MAX, self.window + 1.0 / self.window)
+            window = self.window
+            self.cond.notify_all()
+        get_metrics().gauge("limiter.window", window, key=self.host)
+        self._wake()
+
+    def _wake(self):
+        """Hand free slots to queued Deferreds (any thread)"""
+        ready = []
+        delay = None
+        with self.cond:
+            while self.waiters and self._free():
+                self.inflight += 1
+                ready.append(self.waiters.popleft())
+            if self.waiters and not self.timer_pending:
+                pause = self.paused_until - time.time()
+                if pause > 0:
+                    self.timer_pending = True
+                    delay = pause
+        started = time.time()
+        for d in ready:
+            reactor.callFromThread(self._grant, d, started)
+        if delay is not None:
+            reactor.callFromThread(reactor.callLater, delay, self._timer)
+
+    def _grant(self, d, started):
+        if d.called:
+            # Cancelled while the slot was on its way
+            with self.cond:
+                self.inflight -= 1
+                self.cond.notify_all()
+            self._wake()
+        else:
+            d.callback(started)
+
+    def _timer(self):
+        with self.cond:
+            self.timer_pending = False
+        self._wake()
+
+
+class LimitedAdapter(DNSAdapter):
+    """
+    requests transport adapter taking a host slot for every request and
+    connecting through the DNS cache.
+    Requests the circuit breaker knows to fail are answered at once.
+    """
+
+    def send(self, request, **kwargs):
+        breaker = get_breaker()
+        cached = breaker.check(request.url)
+        if cached:
+            return cached_response(request, cached)
+        limiter = get_limiter(request.url)
+        started = limiter.acquire()
+        try:
+            response = super(LimitedAdapter, self).send(request, **kwargs)
+        except BaseException as e:
+            limiter.release(started, failed=True)
+            if isinstance(e, requests.exceptions.Timeout):
+                breaker.record(request.url, timeout=True)
+            elif isinstance(e, requests.exceptions.SSLError):
+                breaker.record(request.url)
+            elif isinstance(e, requests.exceptions.ConnectionError):
+                breaker.record(request.url, failed=True)
+            else:
+                breaker.abandon(request.url)
+            raise
+        # Streamed bodies are read after the slot is given back: the
+        # window tracks time to response headers
+        status = response.status_code
+        limiter.release(
+            started, status, parse_retry_after(response.headers.get("Retry-After")))
+        breaker.record(request.url, status)
+        return response
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_session = None
+
+
+def get_limiter(url):
+    """Return the limiter of the host of url"""
+    host = urlparse(url).netloc.lower()
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter(host)
+        return limiter
+
+
+def new_session():
+    """A requests session whose requests go through the host limiters"""
+    session = requests.Session()
+    adapter = LimitedAdapter(pool_connections=8, pool_maxsize=LIMIT_MAX)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide limited requests session"""
+    global _session
+    if _session is None:
+        _session = new_session()
+    return _session
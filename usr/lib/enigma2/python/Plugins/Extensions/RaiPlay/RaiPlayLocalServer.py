@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from os.path import exists, getsize
+from re import match
+from socketserver import ThreadingMixIn
+from uuid import uuid4
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Local Stream Server Module                  #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Localhost HTTP server shared by the plugin       #
+#    - Serves files while they are still downloading    #
+#    - Range requests inside the downloaded part        #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+LOCAL_HOST = "127.0.0.1"
+CHUNK_SIZE = 64 * 1024
+# How long a reader waits for bytes that are not on disk yet
+GROW_WAIT_SECONDS = 15
+GROW_POLL_SECONDS = 0.2
+# Give up on a reader after this many empty waits (writer stalled)
+GROW_STALL_ROUNDS = 8
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _LocalRequestHandler(BaseHTTPRequestHandler):
+    """Dispatch /<token>/<name> requests to the registered source"""
+    protocol_version = "HTTP/1.0"
+
+    def _source(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/", 1)
+        return self.server.owner.get_source(parts[0]) if parts else None
+
+    def do_GET(self):
+        source = self._source()
+        if source is None:
+            self.send_error(404)
+            return
+        try:
+            source.handle(self, head_only=False)
+        except (BrokenPipeError, ConnectionResetError):
+            # Player closed or seeked away
+            pass
+        except Exception as e:
+            print("[LOCAL SERVER] Error serving {}: {}".format(self.path, e))
+
+    def do_HEAD(self):
+        source = self._source()
+        if source is None:
+            self.send_error(404)
+            return
+        try:
+            source.handle(self, head_only=True)
+        except Exception as e:
+            print("[LOCAL SERVER] Error on HEAD {}: {}".format(self.path, e))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalStreamServer:
+    """
+    Localhost HTTP server shared by every local playback source.
+    Sources are registered under a random token and served at
+    http://127.0.0.1:<port>/<token>/<name>.
+    """
+
+    def __init__(self):
+        self.httpd = None
+        self.thread = None
+        self.sources = {}
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1] if self.httpd else 0
+
+    def start(self):
+        """Start the server thread if it is not running yet"""
+        with self.lock:
+            if self.httpd:
+                return True
+            try:
+                self.httpd = _ThreadingHTTPServer(
+                    (LOCAL_HOST, 0), _LocalRequestHandler)
+                self.httpd.owner = self
+                self.thread = threading.Thread(
+                    target=self.httpd.serve_forever)
+                self.thread.daemon = True
+                self.thread.start()
+                print("[LOCAL SERVER] Listening on port {}".format(self.port))
+                return True
+            except Exception as e:
+                print("[LOCAL SERVER] Cannot start server: {}".format(e))
+                self.httpd = None
+                return False
+
+    def stop(self):
+        """Stop the server and drop every registered source"""
+        with self.lock:
+            if self.httpd:
+                self.httpd.shutdown()
+                self.httpd.server_close()
+                self.httpd = None
+            self.sources = {}
+
+    def register(self, source, name="stream"):
+        """Register a source and return its local URL (None on failure)"""
+        if not self.start():
+            return None
+        token = uuid4().hex[:12]
+        with self.lock:
+            self.sources[token] = source
+        source.token = token
+        return "http://{}:{}/{}/{}".format(LOCAL_HOST, self.port, token, name)
+
+    def unregister(self, token):
+        with self.lock:
+            self.sources.pop(token, None)
+
+    def get_source(self, token):
+        with self.lock:
+            return self.sources.get(token)
+
+
+class GrowingFileSource:
+    """
+    Serve a file that a download job is still writing.
+
+    Reads past the end of the written data wait for the file to grow
+    until the download is finished. Range requests are honoured inside
+    the downloaded part, so the player can seek back and forth.
+    """
+
+    def __init__(self, file_path, is_finished, content_type="video/mp2t"):
+        """
+        Args:
+            file_path (str): File being downloaded
+            is_finished (callable): Returns True once the writer is done
+            content_type (str): MIME type announced to the player
+        """
+        self.file_path = file_path
+        self.is_finished = is_finished
+        self.content_type = content_type
+        self.token = None
+
+    def available(self):
+        try:
+            return getsize(self.file_path) if exists(self.file_path) else 0
+        except OSError:
+            return 0
+
+    def wait_for(self, offset, timeout=GROW_WAIT_SECONDS):
+        """Wait until byte 'offset' is on disk; return the available size"""
+        deadline = time.time() + timeout
+        size = self.available()
+        while size <= offset and not self.is_finished() and time.time() < deadline:
+            time.sleep(GROW_POLL_SECONDS)
+            size = self.available()
+        return size
+
+    def handle(self, handler, head_only=False):
+        start, end = 0, None
+        requested = handler.headers.get("Range")
+        if requested:
+            range_match = match(r"bytes=(\d*)-(\d*)", requested.strip())
+            if range_match and range_match.group(1):
+                start = int(range_match.group(1))
+                if range_match.group(2):
+                    end = int(range_match.group(2))
+
+        size = self.wait_for(start)
+        finished = self.is_finished()
+        if start >= size and (finished or start > 0):
+            # Seek outside the downloaded range
+            handler.send_response(416)
+            handler.send_header("Content-Range", "bytes */{}".format(size))
+            handler.end_headers()
+            return
+
+        if finished:
+            last = size - 1 if end is None else min(end, size - 1)
+            handler.send_response(206 if requested else 200)
+            handler.send_header("Content-Length", str(last - start + 1))
+            if requested:
+                handler.send_header(
+                    "Content-Range", "bytes {}-{}/{}".format(start, last, size))
+        elif start or (end is not None and end < size):
+            # Total size unknown while downloading: serve what is on disk,
+            # the player asks again for the rest
+            last = size - 1 if end is None else min(end, size - 1)
+            handler.send_response(206)
+            handler.send_header("Content-Length", str(last - start + 1))
+            handler.send_header(
+                "Content-Range", "bytes {}-{}/*".format(start, last))
+        else:
+            # From the start: the whole file as it grows, body ends on close
+            last = end
+            handler.send_response(200)
+        handler.send_header("Content-Type", self.content_type)
+        handler.send_header("Accept-Ranges", "bytes")
+        handler.end_headers()
+        if head_only:
+            return
+
+        position = start
+        with open(self.file_path, "rb") as f:
+            f.seek(start)
+            while last is None or position <= last:
+                want = CHUNK_SIZE if last is None else min(
+                    CHUNK_SIZE, last - position + 1)
+                data = f.read(want)
+                if data:
+                    handler.wfile.write(data)
+                    position += len(data)
+                    continue
+                if self.is_finished() and self.available() <= position:
+                    break
+                stalled = 0
+                while self.wait_for(position) <= position:
+                    stalled += 1
+                    if self.is_finished() or stalled >= GROW_STALL_ROUNDS:
+                        return
+
+
+_local_server = None
+
+
+def get_local_server():
+    """Return the process-wide local stream server"""
+    global _local_server
+    if _local_server is None:
+        _local_server = LocalStreamServer()
+    return _local_server
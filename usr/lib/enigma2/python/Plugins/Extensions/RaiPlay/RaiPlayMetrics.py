@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import deque
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Metrics Module                              #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - In-memory latency, counter and gauge metrics     #
+#    - Recent-sample percentiles per metric key         #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+# Samples kept per metric for percentiles
+METRICS_WINDOW = 50
+
+
+class LatencyStats:
+    """Count, min/max/mean and recent percentiles of a duration"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+        self.samples = deque(maxlen=METRICS_WINDOW)
+
+    def observe(self, seconds, ok=True):
+        if not ok:
+            self.errors += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "last": self.last,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9)
+        }
+
+
+class Metrics:
+    """
+    Process-wide metric registry. Metrics are keyed by a name and an
+    optional sub key (channel, host, ...), e.g. ("zap.resolve", "Rai 1").
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, name, seconds, key=None, ok=True):
+        with self.lock:
+            stats = self.latencies.get((name, key))
+            if stats is None:
+                stats = self.latencies[(name, key)] = LatencyStats()
+            stats.observe(seconds, ok)
+
+    def increment(self, name, key=None, amount=1):
+        with self.lock:
+            self.counters[(name, key)] = self.counters.get((name, key), 0) + amount
+
+    def gauge(self, name, value, key=None):
+        """Set a current value (queue depth, ...)"""
+        with self.lock:
+            self.gauges[(name, key)] = value
+
+    def latency(self, name, key=None):
+        """Snapshot of one latency metric (None if never observed)"""
+        with self.lock:
+            stats = self.latencies.get((name, key))
+            return stats.snapshot() if stats else None
+
+    def snapshot(self, prefix=""):
+        """All metrics whose name starts with prefix"""
+        with self.lock:
+            return {
+                "latency": {
+                    k: v.snapshot() for k, v in self.latencies.items()
+                    if k[0].startswith(prefix)
+                },
+                "counters": {
+                    k: v for k, v in self.counters.items()
+                    if k[0].startswith(prefix)
+                },
+                "gauges": {
+                    k: v for k, v in self.gauges.items()
+                    if k[0].startswith(prefix)
+                }
+            }
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Return the process-wide metric registry"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
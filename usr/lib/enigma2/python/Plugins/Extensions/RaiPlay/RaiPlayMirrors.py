@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from urllib.parse import urlparse
+
+from twisted.internet import defer
+
+from .RaiPlayExecutor import PRIORITY_MAINTENANCE, get_executor
+from .RaiPlayLimiter import get_session
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Mirror Selection Module                     #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Registry of equivalent URLs per logical request  #
+#    - Rolling latency and error rate per mirror        #
+#    - Healthiest mirror first, failover on error       #
+#    - Background probes of the unused mirrors          #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
+# Weight of the newest sample in the rolling latency and error rate
+MIRROR_DECAY = 0.3
+# Score = latency * (1 + MIRROR_ERROR_PENALTY * error rate)
+MIRROR_ERROR_PENALTY = 4.0
+# A mirror replaces the primary URL only when this much better
+MIRROR_PREFERENCE = 1.25
+MIRROR_PROBE_INTERVAL = 300
+MIRROR_PROBE_TIMEOUT = 5
+
+
+class MirrorStats:
+    __slots__ = ("latency", "errors")
+
+    def __init__(self):
+        self.latency = None
+        self.errors = 0.0
+
+    def update(self, seconds, ok):
+        self.errors += MIRROR_DECAY * ((0.0 if ok else 1.0) - self.errors)
+        if ok:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += MIRROR_DECAY * (seconds - self.latency)
+
+    def score(self):
+        """Lower is better; None while no answer was measured"""
+        if self.latency is None:
+            return None
+        return self.latency * (1 + MIRROR_ERROR_PENALTY * self.errors)
+
+
+class EndpointRegistry:
+    """
+    Logical requests served by several equivalent URLs.
+
+    Each URL template of an endpoint keeps a rolling latency and error
+    rate from real requests and background probes. Requests go to the
+    best scored mirror (the first one while nothing is known, or when
+    the others are not clearly better) and fail over in score order.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.stats = {}
+        self.probed = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, templates):
+        """URL templates (str.format fields for the request) of an endpoint"""
+        with self.lock:
+            self.endpoints[name] = list(templates)
+            for template in templates:
+                self.stats.setdefault(template, MirrorStats())
+
+    def ordered(self, name):
+        """Templates of an endpoint, best first"""
+        with self.lock:
+            templates = self.endpoints[name]
+            failed = self.stats[templates[0]].errors
+            scores = []
+            for index, template in enumerate(templates):
+                score = self.stats[template].score()
+                if score is None:
+                    # Unknown: the primary stays first, an untried mirror
+                    # goes right after the known ones
+                    score = 0.0 if index == 0 else float("inf")
+                elif index:
+                    score *= MIRROR_PREFERENCE
+                scores.append((score, False, index))
+            if failed >= 0.5:
+                # The primary fails: try the others first
+                scores[0] = (float("inf"), True, 0)
+        return [templates[index] for score, demoted, index in sorted(scores)]
+
+    def record(self, name, template, seconds, ok):
+        with self.lock:
+            self.stats[template].update(seconds, ok)
+        get_metrics().observe(
+            "mirror." + name, seconds, key=urlparse(template).netloc, ok=ok)
+
+    def fetch(self, name, fetch, *args):
+        """
+        fetch(url) on the mirrors of an endpoint, best first, with
+        template fields filled from args. Returns the first truthy
+        result; when every mirror fails the last error is raised, or
+        the last (empty) result returned.
+        """
+        templates = self.ordered(name)
+        self._probe_later(name, templates[1:], args)
+        error = None
+        result = None
+        for position, template in enumerate(templates):
+            url = template.format(*args) if args else template
+            start = time.time()
+            try:
+                result = fetch(url)
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+            self.record(name, template, time.time() - start, bool(result))
+            if result:
+                return result
+            if position < len(templates) - 1:
+                self._failed_over(name, url)
+        if error is not None:
+            raise error
+        return result
+
+    @defer.inlineCallbacks
+    def fetch_deferred(self, name, fetch, *args):
+        """fetch() for a fetch(url) returning a Deferred"""
+        templates = self.ordered(name)
+        self._probe_later(name, templates[1:], args)
+        for position, template in enumerate(templates):
+            url = template.format(*args) if args else template
+            start = time.time()
+            try:
+                result = yield fetch(url)
+            except defer.CancelledError:
+                raise
+            except Exception:
+                self.record(name, template, time.time() - start, False)
+                if position == len(templates) - 1:
+                    raise
+                self._failed_over(name, url)
+                continue
+            self.record(name, template, time.time() - start, True)
+            defer.returnValue(result)
+
+    def _failed_over(self, name, url):
+        print("[MIRRORS] {} failed on {}, trying the next mirror".format(name, url))
+        get_metrics().increment("mirror.failover", key=name)
+
+    def _probe_later(self, name, templates, args):
+        """Measure the mirrors a request does not use, now and then"""
+        now = time.time()
+        with self.lock:
+            if not templates or self.probed.get(name, 0) + MIRROR_PROBE_INTERVAL > now:
+                return
+            self.probed[name] = now
+        get_executor().submit(
+            self.probe, name, templates, args, priority=PRIORITY_MAINTENANCE)
+
+    def probe(self, name, templates, args=()):
+        """Fetch each template like a request would, to compare fairly"""
+        for template in templates:
+            url = template.format(*args) if args else template
+            start = time.time()
+            try:
+                response = get_session().get(
+                    url, headers={"User-Agent": USER_AGENT},
+                    timeout=MIRROR_PROBE_TIMEOUT)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            self.record(name, template, time.time() - start, ok)
+
+
+_registry = None
+
+
+def get_mirrors():
+    """Return the process-wide endpoint registry"""
+    global _registry
+    if _registry is None:
+        _registry = EndpointRegistry()
+    return _registry
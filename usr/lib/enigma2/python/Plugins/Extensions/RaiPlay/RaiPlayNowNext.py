@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from datetime import date, datetime
+
+from twisted.internet import reactor
+
+from .RaiPlayLimiter import get_session
+from .RaiPlayMirrors import get_mirrors
+from .lib.fast_json import loads
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Now/Next Provider Module                    #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Shared now/next data for live channels           #
+#    - One onAir request for every channel              #
+#    - Refresh aligned to programme boundaries          #
+#    - Conditional requests (ETag / Last-Modified)      #
+#    - Listeners get only the changed channels          #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
+NOWNEXT_TIMEOUT = 10
+# Wake up a little after a programme boundary, within these bounds
+NOWNEXT_SLACK_SECONDS = 20
+NOWNEXT_MIN_SECONDS = 60
+NOWNEXT_MAX_SECONDS = 15 * 60
+
+
+def _hour_to_epoch(hour, now=None):
+    """'HH:MM' today -> epoch; None if the value can't be parsed"""
+    try:
+        now = now or datetime.now()
+        hh, mm = [int(x) for x in hour.strip()[:5].split(":")]
+        return time.mktime(now.replace(hour=hh, minute=mm, second=0, microsecond=0).timetuple())
+    except (ValueError, AttributeError):
+        return None
+
+
+def _find_programs(data, day):
+    """Walk a palinsesti JSON and return the 'programmi' list of a day"""
+    if isinstance(data, dict):
+        if data.get("giorno") == day and isinstance(data.get("programmi"), list):
+            return data["programmi"]
+        values = data.values()
+    elif isinstance(data, list):
+        values = data
+    else:
+        return None
+    for value in values:
+        found = _find_programs(value, day)
+        if found is not None:
+            return found
+    return None
+
+
+class NowNextProvider:
+    """
+    Shared now/next data for the live channels.
+
+    onAir.json gives the current programme of every channel in a single
+    request. The day schedule of a channel (EPG_URL) is fetched once per
+    day, only when onAir lacks the next programme. Requests carry the
+    last ETag / Last-Modified so unchanged data costs a 304.
+    The refresh thread sleeps until the next programme boundary and
+    runs only while a screen is listening.
+    """
+
+    def __init__(self, on_air_url, epg_urls):
+        self.on_air_url = on_air_url
+        self.mirrors = get_mirrors()
+        self.mirrors.register("epg", epg_urls)
+        self.validators = {}
+        self.bodies = {}
+        # The validator/body pairs are shared by the refresh thread and
+        # the screens
+        self.http_lock = threading.Lock()
+        self.schedules = {}
+        self.entries = {}
+        self.next_refresh = 0
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    # -------------------- HTTP --------------------
+
+    def _conditional_get(self, url):
+        """Return the body of url, reusing the cached one on 304"""
+        with self.http_lock:
+            headers = {'User-Agent': USER_AGENT}
+            etag, modified = self.validators.get(url, (None, None))
+            if etag:
+                headers['If-None-Match'] = etag
+            if modified:
+                headers['If-Modified-Since'] = modified
+            response = get_session().get(
+                url, headers=headers, timeout=NOWNEXT_TIMEOUT)
+            if response.status_code == 304 and url in self.bodies:
+                return self.bodies[url]
+            response.raise_for_status()
+            self.validators[url] = (
+                response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            self.bodies[url] = response.content
+            return response.content
+
+    def _day_schedule(self, channel):
+        """Today's (start epoch, title) list for a channel, cached per day"""
+        day = date.today().strftime("%d-%m-%Y")
+        key = (channel, day)
+        if key not in self.schedules:
+            schedule = []
+            try:
+                data = loads(self.mirrors.fetch(
+                    "epg", self._conditional_get, channel.replace(" ", ""), day))
+                for program in _find_programs(data, day) or []:
+                    start = _hour_to_epoch(program.get("timePublished", ""))
+                    if start is not None:
+                        schedule.append((start, program.get("name", "")))
+            except Exception as e:
+                print("[NOW NEXT] No schedule for {}: {}".format(channel, e))
+            self.schedules = {k: v for k, v in self.schedules.items() if k[1] == day}
+            self.schedules[key] = sorted(schedule)
+        return self.schedules[key]
+
+    def on_air_data(self):
+        """Parsed onAir.json, revalidated with a conditional request"""
+        return loads(self._conditional_get(self.on_air_url))
+
+    # -------------------- refresh --------------------
+
+    def _parse_on_air(self, data):
+        entries = {}
+        for channel in data.get("on_air", []) or data.get("channels", []):
+            name = channel.get("channel", "")
+            current = channel.get("currentItem", {}) or {}
+            if not name or not current.get("name"):
+                continue
+            entry = {
+                'now': current.get("name", ""),
+                'now_start': current.get("hour", ""),
+                'next': "",
+                'next_start': ""
+            }
+            following = channel.get("nextItem", {}) or {}
+            if following.get("name"):
+                entry['next'] = following.get("name", "")
+                entry['next_start'] = following.get("hour", "")
+            else:
+                now = time.time()
+                for start, title in self._day_schedule(name):
+                    if start > now:
+                        entry['next'] = title
+                        entry['next_start'] = time.strftime("%H:%M", time.localtime(start))
+                        break
+            entries[name] = entry
+        return entries
+
+    def _next_boundary(self, entries):
+        now = time.time()
+        starts = [_hour_to_epoch(e['next_start']) for e in entries.values() if e['next_start']]
+        starts = [s for s in starts if s and s > now]
+        if not starts:
+            return now + NOWNEXT_MAX_SECONDS
+        wait = min(starts) - now + NOWNEXT_SLACK_SECONDS
+        return now + min(max(wait, NOWNEXT_MIN_SECONDS), NOWNEXT_MAX_SECONDS)
+
+    def refresh(self):
+        """Fetch now/next and notify listeners of the changed channels"""
+        try:
+            entries = self._parse_on_air(self.on_air_data())
+        except Exception as e:
+            print("[NOW NEXT] Refresh error: {}".format(e))
+            self.next_refresh = time.time() + NOWNEXT_MIN_SECONDS
+            return
+
+        with self.lock:
+            changed = {
+                name: entry for name, entry in entries.items()
+                if self.entries.get(name) != entry
+            }
+            self.entries = entries
+            listeners = list(self.listeners)
+        self.next_refresh = self._next_boundary(entries)
+        if changed:
+            print("[NOW NEXT] {} channels changed".format(len(changed)))
+            for callback in listeners:
+                reactor.callFromThread(callback, changed)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.listeners:
+                    self.thread = None
+                    return
+            if time.time() >= self.next_refresh:
+                self.refresh()
+            self.wakeup.wait(max(1, self.next_refresh - time.time()))
+            self.wakeup.clear()
+
+    # -------------------- listeners --------------------
+
+    def get(self, channel):
+        """Cached now/next entry for a channel name (None if unknown)"""
+        with self.lock:
+            return self.entries.get(channel)
+
+    def add_listener(self, callback):
+        """Register callback(changed_entries); starts the refresh thread"""
+        with self.lock:
+            if callback not in self.listeners:
+                self.listeners.append(callback)
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+        self.thread.start()
+
+    def remove_listener(self, callback):
+        with self.lock:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+        self.wakeup.set()
+
+
+_provider = None
+
+
+def get_now_next(api):
+    """Return the process-wide now/next provider for a RaiPlayAPI"""
+    global _provider
+    if _provider is None:
+        _provider = NowNextProvider(api.ON_AIR_URL, [api.EPG_URL, api.EPG_URL2])
+    return _provider
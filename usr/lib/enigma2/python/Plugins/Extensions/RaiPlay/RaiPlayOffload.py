@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import threading
+import time
+from os.path import dirname, join
+from pickle import UnpicklingError
+from shutil import which
+
+import requests
+from twisted.internet import defer, reactor
+
+from .RaiPlayBreaker import get_breaker
+from .RaiPlayExecutor import get_executor
+from .RaiPlayLimiter import get_limiter, get_session
+from .RaiPlayMetrics import get_metrics
+from .lib.parse_jobs import read_frame, run_job, write_frame
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Parse Offload Module                        #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Large catalogues parsed in a worker process      #
+#    - Only the fields shown come back over a pipe      #
+#    - Host limiter and circuit breaker still apply     #
+#    - In-process parsing on single core receivers      #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+OFFLOAD_WORKER = join(dirname(__file__), "lib", "parse_worker.py")
+# One core would run the worker and the main loop in turn
+OFFLOAD_MIN_CPUS = 2
+# Seconds to wait for the answer to one job
+OFFLOAD_TIMEOUT = 60
+# Broken workers in a row before parsing stays in-process
+OFFLOAD_MAX_FAILURES = 3
+
+# Keys read by getThumbnailUrl2
+THUMBNAIL_FIELDS = ("image", "images", "transparent-icon", "chImage")
+# Item fields kept of each offloaded document
+ALL_PROGRAMS_FIELDS = ("name", "info_url", "path_id", "type") + THUMBNAIL_FIELDS
+AZ_FIELDS = ("name", "nome", "PathID", "path_id") + THUMBNAIL_FIELDS
+SPORT_HIT_FIELDS = (
+    "data_type", "title", "media", "create_date", "publication_date",
+    "duration") + THUMBNAIL_FIELDS
+ARCHIVE_CARD_FIELDS = (
+    "title", "link", "duration", "content_url", "broadcast") + THUMBNAIL_FIELDS
+
+
+class OffloadError(Exception):
+    """The worker process could not answer"""
+
+
+class ParseOffload:
+    """
+    Fetch and parse of large documents in a separate process.
+
+    Decoding a catalogue of several MB holds the interpreter lock for
+    seconds even in a worker thread, and the Enigma2 main loop stalls
+    with it. With the option on and more than one core, run() hands the
+    job to a python3 process which fetches, parses and projects it and
+    sends back just the item fields; the calling thread only waits on
+    the pipe. The worker makes the request itself, so the host limiter
+    slot and the circuit breaker are accounted here around it. When the
+    worker cannot be used the job runs in-process, with the same code.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.process = None
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def configure(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            with self.lock:
+                self._stop()
+
+    def active(self):
+        """True when jobs go to the worker process"""
+        return (self.enabled and (os.cpu_count() or 1) >= OFFLOAD_MIN_CPUS
+                and self.failures < OFFLOAD_MAX_FAILURES)
+
+    def run(self, job):
+        """Result of a parse_jobs job (blocking: call it from a worker thread)"""
+        start = time.time()
+        if self.active():
+            try:
+                result = self._remote(job)
+                get_metrics().observe("offload.job", time.time() - start, key="worker")
+                return result
+            except OffloadError as e:
+                print("[OFFLOAD] Worker failed, parsing in-process: {}".format(e))
+                get_metrics().increment("offload.fallback")
+        result = run_job(job, get_session())
+        get_metrics().observe("offload.job", time.time() - start, key="local")
+        return result
+
+    def run_deferred(self, job, token=None):
+        """run() in an executor thread, as a Deferred fired on the reactor"""
+        future = get_executor().submit(self.run, job, token=token)
+        d = defer.Deferred(lambda d: future.cancel())
+
+        def fire(callback, value):
+            if not d.called:
+                callback(value)
+
+        def done(future):
+            try:
+                result = future.result()
+            except BaseException as e:
+                reactor.callFromThread(fire, d.errback, e)
+            else:
+                reactor.callFromThread(fire, d.callback, result)
+
+        future.add_done_callback(done)
+        return d
+
+    def _remote(self, job):
+        url = job["url"]
+        breaker = get_breaker()
+        cached = breaker.check(url)
+        if cached:
+            return {"status": cached, "latency": 0.0, "items": [], "found": {}}
+        limiter = get_limiter(url)
+        started = limiter.acquire()
+        try:
+            answer = self._call(job)
+        except BaseException:
+            limiter.release(started, failed=True)
+            breaker.abandon(url)
+            raise
+        if answer[0] == "ok":
+            result = answer[1]
+            # The window tracks time to response headers, as in-process
+            limiter.release(time.time() - result["latency"], result["status"])
+            breaker.record(url, result["status"])
+            return result
+        kind, message = answer[1], answer[2]
+        limiter.release(started, failed=True)
+        if kind == "timeout":
+            breaker.record(url, timeout=True)
+            raise requests.exceptions.Timeout(message)
+        if kind == "connection":
+            breaker.record(url, failed=True)
+            raise requests.exceptions.ConnectionError(message)
+        breaker.abandon(url)
+        raise requests.exceptions.RequestException(message)
+
+    def _call(self, job):
+        """Send one job to the worker and wait for its answer"""
+        with self.lock:
+            try:
+                if self.process is None or self.process.poll() is not None:
+                    self._start()
+                write_frame(self.process.stdin, job)
+                answer = read_frame(self.process.stdout.fileno(), OFFLOAD_TIMEOUT)
+            except (OSError, EOFError, ValueError, UnpicklingError) as e:
+                self._stop()
+                self.failures += 1
+                raise OffloadError(str(e) or e.__class__.__name__)
+            self.failures = 0
+            return answer
+
+    def _start(self):
+        """Start the worker process (lock held)"""
+        python = which("python3")
+        if python is None:
+            raise OSError("python3 not found")
+        self.process = subprocess.Popen(
+            [python, OFFLOAD_WORKER],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, close_fds=True)
+        print("[OFFLOAD] Parse worker started, pid {}".format(self.process.pid))
+
+    def _stop(self):
+        """Stop the worker process (lock held)"""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+
+
+_offload = None
+
+
+def get_offload():
+    """Return the process-wide parse offload"""
+    global _offload
+    if _offload is None:
+        _offload = ParseOffload()
+    return _offload
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+from .RaiPlayExecutor import PRIORITY_PREFETCH, CancelToken, get_executor
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Page Cache Module                           #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - LRU of loaded pages for paginated screens        #
+#    - Background prefetch of the next page             #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+PAGE_CACHE_SIZE = 6
+PAGE_FETCH_TIMEOUT = 30
+
+
+class PageCache:
+    """
+    Pages of one paginated screen.
+
+    get(page) returns a cached page, waits for a prefetch already in
+    flight, or fetches it synchronously. prefetch(page) loads a page in
+    background, never beyond last_page once the screen knows it.
+    """
+
+    def __init__(self, fetch, max_pages=PAGE_CACHE_SIZE):
+        """
+        Args:
+            fetch (callable): page number -> page data (no UI access)
+        """
+        self.fetch = fetch
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.inflight = {}
+        self.last_page = None
+        self.lock = threading.Lock()
+        self.token = CancelToken()
+        self.closed = False
+
+    def _store(self, page, data):
+        with self.lock:
+            self.inflight.pop(page, None)
+            if data is None or self.closed:
+                return
+            self.pages[page] = data
+            self.pages.move_to_end(page)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+
+    def _load(self, page):
+        data = None
+        try:
+            data = self.fetch(page)
+        except Exception as e:
+            print("[PAGE CACHE] Error loading page {}: {}".format(page, e))
+        self._store(page, data)
+        return data
+
+    def get(self, page):
+        with self.lock:
+            if page in self.pages:
+                self.pages.move_to_end(page)
+                return self.pages[page]
+            future = self.inflight.get(page)
+        if future is not None and future.cancel():
+            # Still queued behind other work: fetch it now instead
+            with self.lock:
+                self.inflight.pop(page, None)
+        elif future is not None:
+            try:
+                return future.result(timeout=PAGE_FETCH_TIMEOUT)
+            except Exception as e:
+                print("[PAGE CACHE] Prefetch of page {} failed: {}".format(page, e))
+        return self._load(page)
+
+    def prefetch(self, page):
+        if page < 1 or (self.last_page is not None and page > self.last_page):
+            return
+        with self.lock:
+            if self.closed or page in self.pages or page in self.inflight:
+                return
+            self.inflight[page] = get_executor().submit(
+                self._load, page, priority=PRIORITY_PREFETCH, token=self.token)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.pages.clear()
+        self.token.cancel()
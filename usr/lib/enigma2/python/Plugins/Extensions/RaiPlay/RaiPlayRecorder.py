@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import time
+from os import makedirs
+from os.path import exists, getsize, join
+from re import findall, search, sub
+from urllib.parse import urljoin
+
+import requests
+from twisted.internet import reactor
+from Components.config import config
+
+from .RaiPlayHLSProxy import HLS_HEADERS, HLS_TIMEOUT, parse_media_playlist
+from .RaiPlayLimiter import get_session
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Live Recorder Module                        #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Timer-driven recording of live channels          #
+#    - Channel URL resolved shortly before start        #
+#    - HLS segments appended to disk, no transcoding    #
+#    - Overlapping recordings within a budget           #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+# Resolve the relinker this many seconds before the start time
+RECORD_PRERESOLVE_SECONDS = 60
+RECORD_CHECK_SECONDS = 5
+# Budget shared by overlapping recordings
+MAX_CONCURRENT_RECORDINGS = 3
+RECORD_BANDWIDTH_BUDGET = 12000000
+RECORD_POLL_MIN_SECONDS = 1.0
+RECORD_RETRY_SECONDS = 3.0
+
+try:
+    from .notify_play import show_download_notification
+    NOTIFICATION_AVAILABLE = True
+except ImportError as e:
+    print("[RECORDER] Notification system not available:", e)
+    NOTIFICATION_AVAILABLE = False
+
+
+def select_variant(master_text, master_url, max_bandwidth):
+    """
+    Pick the best variant of a master playlist that fits max_bandwidth.
+    Falls back to the lowest variant when none fits.
+
+    Returns:
+        str: Absolute media playlist URL (master_url for media playlists)
+    """
+    if "#EXT-X-STREAM-INF" not in master_text:
+        return master_url
+
+    variants = []
+    bandwidth = 0
+    for line in master_text.splitlines():
+        line = line.strip()
+        if line.startswith("#EXT-X-STREAM-INF"):
+            bw_match = search(r"BANDWIDTH=(\d+)", line)
+            bandwidth = int(bw_match.group(1)) if bw_match else 0
+        elif line and not line.startswith("#"):
+            variants.append((bandwidth, urljoin(master_url, line)))
+
+    if not variants:
+        return master_url
+    variants.sort()
+    fitting = [v for v in variants if v[0] <= max_bandwidth]
+    return (fitting[-1] if fitting else variants[0])[1]
+
+
+def is_encrypted(media_text):
+    """True when a media playlist has segments behind an #EXT-X-KEY"""
+    return any(
+        "METHOD=NONE" not in attributes
+        for attributes in findall(r"#EXT-X-KEY:([^\r\n]*)", media_text))
+
+
+class SegmentCapture(threading.Thread):
+    """
+    Append the segments of a live HLS media playlist to a .ts file
+    until the end time. MPEG-TS segments concatenate into a valid
+    stream, so no ffmpeg process and no transcoding are needed. An
+    encrypted variant ends the recording as an error: its segments
+    would be written still encrypted.
+    """
+
+    def __init__(self, recorder, item):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.recorder = recorder
+        self.item = item
+        self.running = True
+
+    def run(self):
+        item = self.item
+        last_sequence = -1
+        written = 0
+        encrypted = False
+        session = get_session()
+        print("[RECORDER] Recording started: {}".format(item['title']))
+        try:
+            with open(item['file_path'], "ab") as out:
+                while self.running and time.time() < item['end']:
+                    wait = RECORD_POLL_MIN_SECONDS
+                    try:
+                        response = session.get(
+                            item['media_url'], headers=HLS_HEADERS,
+                            timeout=HLS_TIMEOUT, verify=False)
+                        response.raise_for_status()
+                        text = response.text
+                        if is_encrypted(text):
+                            print("[RECORDER] {}: encrypted stream, not recorded".format(
+                                item['title']))
+                            encrypted = True
+                            break
+                        segments = parse_media_playlist(text, response.url)
+                        for sequence, url, duration in segments:
+                            if sequence <= last_sequence:
+                                continue
+                            if not self.running or time.time() >= item['end']:
+                                break
+                            response = session.get(
+                                url, headers=HLS_HEADERS,
+                                timeout=HLS_TIMEOUT, verify=False)
+                            # An error page must not end up in the recording
+                            response.raise_for_status()
+                            data = response.content
+                            out.write(data)
+                            written += len(data)
+                            last_sequence = sequence
+                        out.flush()
+                        if "#EXT-X-ENDLIST" in text:
+                            break
+                        if segments:
+                            wait = max(RECORD_POLL_MIN_SECONDS, segments[-1][2] / 2)
+                    except requests.exceptions.HTTPError as e:
+                        print("[RECORDER] {}: {}".format(item['title'], e))
+                        wait = RECORD_RETRY_SECONDS
+                        if e.response is not None and e.response.status_code == 403:
+                            # Token expired: resolve the channel again
+                            self.recorder.resolve(item)
+                    except Exception as e:
+                        print("[RECORDER] {}: {}".format(item['title'], e))
+                        wait = RECORD_RETRY_SECONDS
+                    time.sleep(wait)
+        except Exception as e:
+            print("[RECORDER] Cannot write {}: {}".format(item['file_path'], e))
+        self.recorder.capture_finished(item, written, encrypted)
+
+
+class RaiPlayRecorder:
+    """
+    Scheduled recordings of live channels.
+
+    A scheduler thread checks the timers; shortly before a recording
+    starts it resolves the channel URL and picks a variant within the
+    bandwidth budget, then a SegmentCapture thread writes the stream.
+    """
+
+    def __init__(self, resolver):
+        """
+        Args:
+            resolver (callable): Turns a channel URL (relinker) into a
+                                 playable HLS URL
+        """
+        self.resolver = resolver
+        self.recordings = []
+        self.captures = {}
+        self.lock = threading.Lock()
+        self.worker = None
+        self.running = False
+        self.wakeup = threading.Event()
+
+        self.record_dir = config.movielist.last_videodir.value
+        if not self.record_dir.endswith("/"):
+            self.record_dir += "/"
+        self.recordings_file = join(self.record_dir, "raiplay_recordings.json")
+        self.load_recordings()
+
+    # -------------------- persistence --------------------
+
+    def load_recordings(self):
+        if not exists(self.recordings_file):
+            return
+        try:
+            with open(self.recordings_file, "r") as f:
+                self.recordings = json.load(f)
+            # A restart interrupts running recordings
+            for item in self.recordings:
+                if item['status'] == 'recording':
+                    item['status'] = 'error'
+        except Exception as e:
+            print("[RECORDER] Error loading recordings: {}".format(e))
+            self.recordings = []
+
+    def save_recordings(self):
+        try:
+            with open(self.recordings_file, "w") as f:
+                json.dump(self.recordings, f, indent=2)
+        except Exception as e:
+            print("[RECORDER] Error saving recordings: {}".format(e))
+
+    # -------------------- timers --------------------
+
+    def overlapping(self, begin, end):
+        """Scheduled or running recordings that overlap [begin, end)"""
+        return [
+            item for item in self.recordings
+            if item['status'] in ('scheduled', 'recording') and
+            item['begin'] < end and begin < item['end']
+        ]
+
+    def add_recording(self, title, url, begin, end):
+        """
+        Schedule a recording.
+
+        Returns:
+            str: Recording id, or None when the overlap budget is full
+        """
+        with self.lock:
+            if len(self.overlapping(begin, end)) >= MAX_CONCURRENT_RECORDINGS:
+                print("[RECORDER] Budget full, refusing: {}".format(title))
+                return None
+
+            record_id = str(int(time.time() * 1000))
+            name = sub(r'[<>:"/\\|?*\s]+', '_', title).strip('_')[:80]
+            stamp = time.strftime("%Y%m%d_%H%M", time.localtime(begin))
+            self.recordings.append({
+                'id': record_id,
+                'title': title,
+                'url': url,
+                'begin': int(begin),
+                'end': int(end),
+                'status': 'scheduled',
+                'media_url': None,
+                'file_path': join(self.record_dir, "{}_{}.ts".format(name, stamp))
+            })
+            self.save_recordings()
+        self.start()
+        print("[RECORDER] Scheduled {} at {}".format(title, stamp))
+        return record_id
+
+    def remove_recording(self, record_id):
+        with self.lock:
+            capture = self.captures.pop(record_id, None)
+            if capture:
+                capture.running = False
+            self.recordings = [
+                item for item in self.recordings if item['id'] != record_id]
+            self.save_recordings()
+
+    def get_recordings(self):
+        with self.lock:
+            return [dict(item) for item in self.recordings]
+
+    # -------------------- scheduler --------------------
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.wakeup.clear()
+            self.worker = threading.Thread(target=self._scheduler_loop)
+            self.worker.daemon = True
+        self.worker.start()
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            for capture in self.captures.values():
+                capture.running = False
+        self.wakeup.set()
+
+    def _scheduler_loop(self):
+        worker = threading.current_thread()
+        while True:
+            now = time.time()
+            with self.lock:
+                if not self.running or self.worker is not worker:
+                    return
+                pending = [item for item in self.recordings
+                           if item['status'] == 'scheduled']
+                if not pending:
+                    # Nothing left to start: add_recording() starts a new loop
+                    self.running = False
+                    return
+            for item in pending:
+                if item['end'] <= now:
+                    self._set_status(item, 'error')
+                elif not item['media_url'] and item['begin'] - now <= RECORD_PRERESOLVE_SECONDS:
+                    self.resolve(item)
+                elif item['media_url'] and item['begin'] <= now:
+                    self._start_capture(item)
+            self.wakeup.wait(RECORD_CHECK_SECONDS)
+
+    def resolve(self, item):
+        """Resolve relinker and variant (before the start, again on 403)"""
+        try:
+            url = self.resolver(item['url'])
+            response = get_session().get(
+                url, headers=HLS_HEADERS, timeout=HLS_TIMEOUT, verify=False)
+            response.raise_for_status()
+            share = len(self.overlapping(item['begin'], item['end'])) or 1
+            item['media_url'] = select_variant(
+                response.text, response.url, RECORD_BANDWIDTH_BUDGET // share)
+            print("[RECORDER] Resolved {} -> {}".format(
+                item['title'], item['media_url']))
+        except Exception as e:
+            # Retried on the next scheduler round
+            print("[RECORDER] Cannot resolve {}: {}".format(item['title'], e))
+
+    def _start_capture(self, item):
+        if not exists(self.record_dir):
+            makedirs(self.record_dir)
+        capture = SegmentCapture(self, item)
+        with self.lock:
+            self.captures[item['id']] = capture
+        self._set_status(item, 'recording')
+        capture.start()
+
+    def _set_status(self, item, status):
+        with self.lock:
+            item['status'] = status
+            self.save_recordings()
+
+    def capture_finished(self, item, written, failed=False):
+        with self.lock:
+            self.captures.pop(item['id'], None)
+        status = 'completed' if written and not failed else 'error'
+        self._set_status(item, status)
+        print("[RECORDER] Recording {}: {} ({} bytes)".format(
+            status, item['title'], written))
+        if NOTIFICATION_AVAILABLE:
+            size = getsize(item['file_path']) if exists(item['file_path']) else 0
+            reactor.callFromThread(
+                show_download_notification, item['title'], status, size)
+
+
+_recorder = None
+
+
+def get_recorder(resolver):
+    """Return the process-wide recorder, started if timers are pending"""
+    global _recorder
+    if _recorder is None:
+        _recorder = RaiPlayRecorder(resolver)
+        if any(item['status'] == 'scheduled' for item in _recorder.recordings):
+            _recorder.start()
+    return _recorder
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+from re import findall, search
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+from xml.etree import ElementTree
+
+from .RaiPlayCDN import get_cdn
+from .RaiPlayLimiter import get_session
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Rendition Resolver Module                   #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Relinker XML parsed into a typed answer          #
+#    - Bitrates listed by the HLS manifest name         #
+#    - Progressive MP4 renditions per bitrate           #
+#    - Direct MP4 at the requested quality, HLS else    #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
+# .../<id>_800,1200,1800,2400,.mp4.csmil/playlist.m3u8 lists the bitrates
+MANIFEST_PATTERN = r'/(?P<id>\w+)(?:_(?P<quality>[\d,]+))?(?:\.mp4)?(?:\.csmil)?/playlist\.m3u8'
+# The relinker redirects to the MP4 of a bitrate with this parameter
+MP4_RULE = "overrideUserAgentRule"
+MP4_RULE_VALUE = "mp4-{}"
+# Answer of the relinker when a rendition is not available
+UNAVAILABLE_MARKER = "video_no_available"
+RENDITION_TIMEOUT = 10
+# MP4 bitrates tried before falling back to HLS
+RENDITION_MAX_TRIES = 2
+# Nominal frame size of each bitrate (kbps) of the Rai encoding ladder
+RENDITION_SIZES = {
+    250: (352, 198),
+    400: (512, 288),
+    600: (512, 288),
+    700: (512, 288),
+    800: (700, 394),
+    1200: (736, 414),
+    1500: (920, 518),
+    1800: (1024, 576),
+    2400: (1280, 720),
+    3200: (1440, 810),
+    3600: (1440, 810),
+    5000: (1920, 1080),
+    10000: (1920, 1080)
+}
+
+
+class Rendition:
+    """
+    One way to fetch a video: a progressive MP4 or an HLS manifest.
+    redirect is set for relinker URLs still to be followed to the file.
+    """
+
+    __slots__ = ("kind", "bitrate", "url", "redirect")
+
+    def __init__(self, kind, bitrate, url, redirect=False):
+        self.kind = kind
+        self.bitrate = bitrate
+        self.url = url
+        self.redirect = redirect
+
+    @property
+    def height(self):
+        size = RENDITION_SIZES.get(self.bitrate)
+        return size[1] if size else None
+
+    def __repr__(self):
+        return "Rendition({}, {}, {})".format(self.kind, self.bitrate, self.url)
+
+
+def _text(node):
+    return (node.text or "").strip() if node is not None else ""
+
+
+def _strip_cdata(value):
+    match = search(r'<!\[CDATA\[(.*?)\]\]>', value)
+    return (match.group(1) if match else value).strip()
+
+
+def parse_relinker(xml_content):
+    """
+    Relinker XML answer as a dict: content_urls (list), bitrate (int or
+    None), drm and live (bool).
+    """
+    try:
+        root = ElementTree.fromstring(xml_content.strip())
+        content_urls = [
+            _strip_cdata(_text(node)) for node in root.iter("url")
+            if node.get("type") == "content" and _text(node)]
+        bitrate = _text(root.find("bitrate"))
+        drm = bool(_text(root.find("license_url")))
+        live = _text(root.find("is_live")).lower() in ("y", "yes", "true", "1")
+    except ElementTree.ParseError:
+        # Some answers nest CDATA markers in the text: read them as text
+        content_urls = [
+            _strip_cdata(value) for value in
+            findall(r'<url[^>]*type="content"[^>]*>(.*?)</url>', xml_content)]
+        match = search(r'<bitrate>\s*(\d+)', xml_content)
+        bitrate = match.group(1) if match else ""
+        drm = bool(search(r'<license_url>\s*\S', xml_content))
+        match = search(r'<is_live>\s*(\w+)', xml_content)
+        live = bool(match) and match.group(1).lower() in ("y", "yes", "true", "1")
+    return {
+        "content_urls": [u for u in content_urls if u],
+        "bitrate": int(bitrate) if bitrate.isdigit() else None,
+        "drm": drm,
+        "live": live
+    }
+
+
+def manifest_bitrates(manifest_url):
+    """Bitrates (kbps, ascending) named in an HLS manifest URL"""
+    match = search(MANIFEST_PATTERN, manifest_url)
+    if not match or not match.group("quality"):
+        return []
+    return sorted(set(int(q) for q in match.group("quality").split(",") if q))
+
+
+def mp4_url(relinker_url, bitrate):
+    """Relinker URL redirecting to the MP4 of one bitrate"""
+    parsed = urlparse(relinker_url)
+    query = parse_qs(parsed.query)
+    query.pop("output", None)
+    query[MP4_RULE] = [MP4_RULE_VALUE.format(bitrate)]
+    return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+
+
+def list_renditions(relinker_url, xml_content):
+    """Every rendition the relinker answer offers, MP4 ones unverified"""
+    info = parse_relinker(xml_content)
+    renditions = []
+    for content_url in info["content_urls"]:
+        if ".m3u8" in content_url or "format=m3u8" in content_url:
+            renditions.append(Rendition("hls", None, content_url))
+            if not info["drm"] and not info["live"]:
+                renditions.extend(
+                    Rendition("mp4", bitrate, mp4_url(relinker_url, bitrate), True)
+                    for bitrate in manifest_bitrates(content_url))
+        elif UNAVAILABLE_MARKER not in content_url:
+            renditions.append(Rendition(
+                "mp4" if ".mp4" in content_url else "other",
+                info["bitrate"], content_url))
+    return renditions
+
+
+def quality_bitrate(quality):
+    """'best' -> None, '1800p' / '1800' -> 1800"""
+    match = search(r'(\d+)', quality or "")
+    return int(match.group(1)) if match else None
+
+
+def _mp4_order(renditions, quality):
+    """MP4 renditions, the one matching quality first"""
+    mp4 = sorted(
+        (r for r in renditions if r.redirect),
+        key=lambda r: r.bitrate, reverse=True)
+    wanted = quality_bitrate(quality)
+    if wanted is None:
+        return mp4
+    # The best one not above the request, then the lower ones
+    below = [r for r in mp4 if r.bitrate <= wanted]
+    return below or mp4[-1:]
+
+
+def _verify_mp4(url, headers):
+    """Final URL of a relinker MP4 redirect, None when not offered"""
+    response = get_session().head(
+        url, headers=headers, timeout=RENDITION_TIMEOUT, allow_redirects=True)
+    final_url = response.url
+    if response.status_code >= 400 or UNAVAILABLE_MARKER in final_url:
+        return None
+    content_type = response.headers.get("Content-Type", "")
+    if ".mp4" not in final_url and "video/mp4" not in content_type:
+        return None
+    return final_url
+
+
+def pick_rendition(relinker_url, xml_content, quality="best", headers=None):
+    """
+    Rendition to download: a direct MP4 at the requested quality when the
+    relinker offers one, else the HLS manifest, else None.
+    """
+    headers = headers or {"User-Agent": USER_AGENT}
+    renditions = list_renditions(relinker_url, xml_content)
+    for rendition in _mp4_order(renditions, quality)[:RENDITION_MAX_TRIES]:
+        try:
+            final_url = _verify_mp4(rendition.url, headers)
+        except Exception as e:
+            print("[RENDITIONS] MP4 {} not reachable: {}".format(rendition.bitrate, e))
+            continue
+        if final_url:
+            print("[RENDITIONS] Direct MP4 at {} kbps: {}".format(rendition.bitrate, final_url))
+            get_metrics().increment("renditions.mp4", key=str(rendition.bitrate))
+            return Rendition("mp4", rendition.bitrate, final_url)
+    # Same rendition on several CDN edges: take the fastest
+    for kind in ("mp4", "hls"):
+        offered = [r for r in renditions if r.kind == kind and not r.redirect]
+        if offered:
+            url = get_cdn().select([r.url for r in offered])
+            chosen = next((r for r in offered if r.url == url), offered[0])
+            get_metrics().increment("renditions." + kind)
+            return Rendition(kind, chosen.bitrate, url)
+    return None
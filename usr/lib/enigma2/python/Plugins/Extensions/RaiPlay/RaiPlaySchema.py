@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+from .RaiPlayItems import Item
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Schema Extraction Module                    #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Declarative rules for the known page shapes      #
+#    - AZ dicts, genre sliders, multimedia sets,        #
+#      program lists, cards and items                   #
+#    - One walk per document, normalised records        #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+AZ_KEYS = ('0-9',) + tuple(chr(ord('A') + i) for i in range(26))
+
+
+class ItemRule:
+    """
+    How one kind of raw item becomes an Item (name, url, icon, sub-type).
+
+    Args:
+        url_keys (tuple): first non-empty one is the path
+        type_keys (tuple): first present one is the sub-type
+        type_default (str): sub-type when none of type_keys is present
+        icon (str): "thumbnail" (api.getThumbnailUrl2(item)) or
+            "image" (api.getFullUrl(item["image"]))
+        require_name (bool): drop items without a name
+    """
+
+    def __init__(self, url_keys, type_keys=("type",), type_default="",
+                 icon="thumbnail", require_name=False):
+        self.url_keys = url_keys
+        self.type_keys = type_keys
+        self.type_default = type_default
+        self.image_icon = icon == "image"
+        self.require_name = require_name
+        self.records = self._compile()
+
+    def _compile(self):
+        """
+        Build records(items, api) -> list, with the key lookups unrolled
+        and the whole item loop in one frame.
+        """
+        u1, u2, u3 = (tuple(self.url_keys) + (None, None))[:3]
+        t1, t2 = (tuple(self.type_keys) + (None,))[:2]
+        default = self.type_default
+        image_icon = self.image_icon
+        require_name = self.require_name
+
+        def records(items, api):
+            fix_path = api.fixPath
+            icon_of = api.getFullUrl if image_icon else api.getThumbnailUrl2
+            result = []
+            append = result.append
+            for item in items:
+                get = item.get
+                name = get("name", "")
+                if require_name and not name:
+                    continue
+                raw_url = get(u1) or (u2 and get(u2)) or (u3 and get(u3))
+                append(Item(
+                    name,
+                    fix_path(raw_url) if raw_url else None,
+                    icon_of(get("image", "")) if image_icon else icon_of(item),
+                    item[t1] if t1 in item else get(t2, default)))
+            return result
+        return records
+
+
+AZ_ITEM = ItemRule(("path_id", "PathID"), type_default="PLR programma Page",
+                   require_name=True)
+LIST_ITEM = ItemRule(("path_id", "url", "PathID"), type_keys=("type", "sub_type"))
+GENRE_ITEM = ItemRule(("path_id", "url"), type_keys=("sub_type",), icon="image")
+SET_ITEM = ItemRule(("path_id", "url"))
+PROGRAM_ITEM = ItemRule(("path_id", "PathID"))
+
+# Block type -> (key of the item list, rule)
+CATEGORY_BLOCKS = {
+    "RaiPlay Slider Generi Block": ("contents", GENRE_ITEM),
+    "RaiPlay Multimedia Block": ("sets", SET_ITEM),
+    "RaiPlay Lista Programmi Block": ("contents", PROGRAM_ITEM)
+}
+
+# Item containers of a news category, in order of preference:
+# (key, None) is a flat item list, (key, children) a list of blocks whose
+# first list-valued child holds the items
+NEWS_CONTAINERS = (
+    ("contents", ("contents", "cards")),
+    ("cards", None),
+    ("items", None)
+)
+
+
+def iter_items(node, containers):
+    """Raw items of the first container of 'containers' present in node"""
+    for key, children in containers:
+        value = node.get(key)
+        if not isinstance(value, list):
+            continue
+        if children is None:
+            for item in value:
+                yield item
+            return
+        for block in value:
+            if not isinstance(block, dict):
+                continue
+            for child in children:
+                items = block.get(child)
+                if isinstance(items, list):
+                    for item in items:
+                        yield item
+                    break
+        return
+
+
+def _az_structures(response):
+    """A-Z dicts of a page: top level, 'contents' or a block's 'contents'"""
+    if any(key in response for key in AZ_KEYS):
+        yield response
+    contents = response.get("contents")
+    if isinstance(contents, dict):
+        yield contents
+    blocks = response.get("blocks")
+    if isinstance(blocks, list):
+        for block in blocks:
+            contents = block.get("contents")
+            if isinstance(contents, dict) and any(key in contents for key in AZ_KEYS):
+                yield contents
+
+
+def extract_category(response, api):
+    """
+    Records of an on-demand category page.
+
+    The first A-Z structure with entries wins, then a top level 'items'
+    list, typed 'blocks', or 'contents' blocks of cards.
+
+    Args:
+        response (dict): decoded page JSON
+        api: object with fixPath, getFullUrl and getThumbnailUrl2
+    """
+    for structure in _az_structures(response):
+        records = []
+        for key in AZ_KEYS:
+            if structure.get(key):
+                records.extend(AZ_ITEM.records(structure[key], api))
+        if records:
+            return records
+
+    items = response.get("items")
+    if isinstance(items, list):
+        return LIST_ITEM.records(items, api)
+
+    blocks = response.get("blocks")
+    if isinstance(blocks, list):
+        records = []
+        for block in blocks:
+            rule = CATEGORY_BLOCKS.get(block.get("type", ""))
+            if rule:
+                records.extend(rule[1].records(block.get(rule[0], []), api))
+        return records
+
+    records = []
+    contents = response.get("contents")
+    if isinstance(contents, list):
+        for block in contents:
+            cards = block.get("contents") if isinstance(block, dict) else None
+            if isinstance(cards, list):
+                records.extend(PROGRAM_ITEM.records(cards, api))
+    return records
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from re import search
+
+from .RaiPlayExecutor import PRIORITY_PREFETCH, CancelToken, get_executor
+from .RaiPlayMetrics import get_metrics
+
+"""
+#########################################################
+#                                                       #
+#  Rai Play Zap Accelerator Module                      #
+#  Version: 1.9                                         #
+#  Created by Lululla                                   #
+#  License: CC BY-NC-SA 4.0                             #
+#  https://creativecommons.org/licenses/by-nc-sa/4.0/   #
+#  Last Modified: 15:35 - 2025-11-02                    #
+#                                                       #
+#  Features:                                            #
+#    - Live channel URLs resolved in background         #
+#    - Refresh before the stream token expires          #
+#    - Per-channel resolution latency metrics           #
+#                                                       #
+#  Usage of this code without proper attribution        #
+#  is strictly prohibited.                              #
+#  For modifications and redistribution,                #
+#  please maintain this credit header.                  #
+#########################################################
+"""
+__author__ = "Lululla"
+
+ZAP_CHECK_SECONDS = 15
+# Used when the resolved URL carries no expiry of its own
+ZAP_DEFAULT_TTL = 5 * 60
+# Re-resolve this long before the token expires
+ZAP_REFRESH_MARGIN = 60
+ZAP_CHANNELS_TTL = 60 * 60
+
+
+def token_expiry(url, resolved_at):
+    """
+    Expiry of a resolved stream URL: Akamai style 'exp=<epoch>' or
+    'expires=<epoch>' tokens, otherwise resolved_at + ZAP_DEFAULT_TTL.
+    """
+    exp_match = search(r"(?:[?&~]|\b)(?:exp|expires)=(\d{9,})", url or "")
+    if exp_match:
+        return int(exp_match.group(1))
+    return resolved_at + ZAP_DEFAULT_TTL
+
+
+class ZapResolver:
+    """
+    Keep a warm playable URL for every live channel.
+
+    While a Live TV screen is open, each channel relinker is resolved as
+    background prefetch work and resolved again before its token expires,
+    so a channel change can start the player without a relinker round
+    trip.
+    """
+
+    def __init__(self, resolve, get_channels):
+        """
+        Args:
+            resolve (callable): relinker URL -> (play_url, license_key)
+            get_channels (callable): () -> list of (title, relinker_url)
+        """
+        self.resolve = resolve
+        self.get_channels = get_channels
+        self.channels = []
+        self.channels_time = 0
+        self.entries = {}
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.generation = 0
+        self.token = None
+
+    def bind(self, resolve, get_channels):
+        """Use the callables of the screen that is showing the channels"""
+        with self.lock:
+            self.resolve = resolve
+            self.get_channels = get_channels
+            # The channel list comes from the new screen
+            self.channels_time = 0
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            # A loop left over from a previous start exits on its own
+            self.generation += 1
+            self.token = CancelToken()
+        thread = threading.Thread(target=self._run, args=(self.generation,))
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            token, self.token = self.token, None
+            # Queued resolutions are dropped with the token
+            self.pending.clear()
+            # Bound methods keep the closed screen alive
+            self.resolve = None
+            self.get_channels = None
+        self.wakeup.set()
+        if token:
+            token.cancel()
+
+    def _run(self, generation):
+        while self.running and generation == self.generation:
+            try:
+                with self.lock:
+                    get_channels = self.get_channels
+                if get_channels and time.time() - self.channels_time > ZAP_CHANNELS_TTL:
+                    self.channels = get_channels()
+                    self.channels_time = time.time()
+                self._schedule()
+            except Exception as e:
+                print("[ZAP] Error: {}".format(e))
+            self.wakeup.wait(ZAP_CHECK_SECONDS)
+            self.wakeup.clear()
+
+    def _schedule(self):
+        """Submit channels that are unresolved or close to expiry"""
+        now = time.time()
+        with self.lock:
+            if not self.running or self.resolve is None:
+                return
+            for title, url in self.channels:
+                entry = self.entries.get(url)
+                if url in self.pending:
+                    continue
+                if entry and entry['expires'] - now > ZAP_REFRESH_MARGIN:
+                    continue
+                self.pending.add(url)
+                get_executor().submit(
+                    self._resolve_channel, title, url, self.resolve,
+                    priority=PRIORITY_PREFETCH, token=self.token)
+
+    def _resolve_channel(self, title, url, resolve):
+        start = time.time()
+        ok = False
+        try:
+            play_url, license_key = resolve(url)
+            if play_url and play_url != url:
+                resolved = time.time()
+                with self.lock:
+                    self.entries[url] = {
+                        'url': play_url,
+                        'license': license_key,
+                        'expires': token_expiry(play_url, resolved)
+                    }
+                ok = True
+                print("[ZAP] {} resolved in {:.2f}s".format(title, resolved - start))
+        except Exception as e:
+            print("[ZAP] Cannot resolve {}: {}".format(title, e))
+        finally:
+            get_metrics().observe(
+                "zap.resolve", time.time() - start, key=title, ok=ok)
+            with self.lock:
+                self.pending.discard(url)
+
+    def get_warm(self, url):
+        """
+        Warm (play_url, license_key) for a channel URL, or None when it
+        is unknown or about to expire.
+        """
+        url = str(url)
+        with self.lock:
+            entry = self.entries.get(url)
+        if not any(url == channel_url for title, channel_url in self.channels):
+            return None
+        if not entry or entry['expires'] - time.time() < ZAP_REFRESH_MARGIN / 2:
+            get_metrics().increment("zap.cold")
+            return None
+        get_metrics().increment("zap.warm")
+        return entry['url'], entry['license']
+
+    def latency(self, title):
+        """Resolution latency snapshot for a channel"""
+        return get_metrics().latency("zap.resolve", key=title)
+
+
+_resolver = None
+
+
+def get_zap_resolver(resolve, get_channels):
+    """Return the process-wide zap resolver, bound to these callables"""
+    global _resolver
+    if _resolver is None:
+        _resolver = ZapResolver(resolve, get_channels)
+    else:
+        _resolver.bind(resolve, get_channels)
+    return _resolver
+
+
+def warm_url(url):
+    """Warm (play_url, license_key) if the zap resolver knows url"""
+    return _resolver.get_warm(url) if _resolver else None
@@ -11,6 +11,7 @@ from urllib.parse import quote
 import base64
 import datetime
 import re
+import socket
 import ssl
 import sys
 import unicodedata
@@ -25,6 +26,10 @@ from enigma import getDesktop
 from os import system, stat, statvfs, listdir, remove, chmod, popen
 from os.path import isdir, exists, realpath, dirname, join, isfile
 
+from .RaiPlayBreaker import CircuitOpenError, get_breaker
+from .RaiPlayDeadline import budget_timeout
+from .RaiPlayLimiter import get_session
+
 requests.packages.urllib3.disable_warnings(
     requests.packages.urllib3.exceptions.InsecureRequestWarning)
 
@@ -1202,10 +1207,10 @@ def getUrlSiVer(url, verify=True):
     """Fetch URL content with optional SSL verification"""
     try:
         headers = {'User-Agent': RequestAgent()}
-        response = requests.get(
+        response = get_session().get(
             url,
             headers=headers,
-            timeout=10,
+            timeout=budget_timeout(10),
             verify=verify)
         response.raise_for_status()
         return response.text
@@ -1214,13 +1219,46 @@ def getUrlSiVer(url, verify=True):
         return None
 
 
+def getUrlBytes(url, verify=True):
+    """Fetch URL content as bytes, for JSON decoded without a text copy"""
+    try:
+        headers = {'User-Agent': RequestAgent()}
+        response = get_session().get(
+            url,
+            headers=headers,
+            timeout=budget_timeout(10),
+            verify=verify)
+        response.raise_for_status()
+        return response.content
+    except Exception as e:
+        print("Error fetching URL " + str(url) + ": " + str(e))
+        return None
+
+
+def getUrlStream(url, verify=True):
+    """Open URL for streamed reading; the caller closes the response"""
+    try:
+        headers = {'User-Agent': RequestAgent()}
+        response = get_session().get(
+            url,
+            headers=headers,
+            timeout=budget_timeout(10),
+            verify=verify,
+            stream=True)
+        response.raise_for_status()
+        return response
+    except Exception as e:
+        print("Error fetching URL " + str(url) + ": " + str(e))
+        return None
+
+
 def getUrlNoVer(url, verify=True):
     try:
         headers = {'User-Agent': RequestAgent()}
-        response = requests.get(
+        response = get_session().get(
             url,
             headers=headers,
-            timeout=10,
+            timeout=budget_timeout(10),
             verify=verify)
         response.raise_for_status()
         return response.text
@@ -1233,16 +1271,37 @@ def getUrl(url):
     req = Request(url)
     req.add_header('User-Agent', RequestAgent())
     link = url
+    breaker = get_breaker()
+    try:
+        if breaker.check(url):
+            return ""
+    except CircuitOpenError as e:
+        print(e)
+        return ""
     try:
         response = urlopen(req, timeout=10)
         link = response.read().decode(errors='ignore')
         response.close()
+        breaker.record(url, response.status)
         return link
 
     except Exception as e:
         print(e)
+        if isinstance(e, HTTPError):
+            breaker.record(url, e.code)
+            return ""
+        reason = getattr(e, 'reason', e)
+        if not isinstance(reason, ssl.SSLError):
+            # Only a certificate problem is worth an unverified retry
+            if isinstance(reason, (socket.timeout, TimeoutError)):
+                breaker.record(url, timeout=True)
+            elif isinstance(e, URLError):
+                breaker.record(url, failed=True)
+            else:
+                breaker.abandon(url)
+            return ""
+        breaker.record(url)
         try:
-            import ssl
             gcontext = ssl._create_unverified_context()
             response = urlopen(req, timeout=10, context=gcontext)
             link = response.read().decode(errors='ignore')
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+JSON decoding straight from the response bytes.
+
+orjson, else ujson, is used when the image ships one of them; the
+standard library otherwise. Bytes go to the decoder as they are, so no
+charset detection or str copy of the body is ever made (RFC 8259 JSON
+is UTF-8, json.loads detects UTF-16/32 and a BOM by itself).
+
+A document the accelerated decoder rejects (NaN, a BOM, lone
+surrogates) is decoded again by the standard library, which accepts
+those as before or raises the usual ValueError.
+"""
+
+import json
+
+try:
+    import orjson
+    JSON_BACKEND = "orjson"
+    _fast_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        JSON_BACKEND = "ujson"
+        _fast_loads = ujson.loads
+    except ImportError:
+        JSON_BACKEND = "json"
+        _fast_loads = None
+
+
+def loads(data):
+    """Decode a JSON document given as bytes or str"""
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(data)
+        except (ValueError, TypeError):
+            pass
+    return json.loads(data)
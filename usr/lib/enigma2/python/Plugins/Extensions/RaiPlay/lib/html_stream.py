@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming extraction of element attributes from large HTML pages.
+
+rainews.it pages carry their data as HTML-escaped JSON inside one
+attribute (<rainews-player data='...'>,
+<rainews-aggregator-broadcast-archive data="...">). The extractor reads
+the response in chunks, tracks each wanted attribute incrementally and
+stops reading as soon as everything it needs is complete, so the rest
+of the page is never downloaded or kept in memory.
+"""
+
+import codecs
+import re
+
+import requests
+
+from .html_conv import html_unescape
+
+STREAM_CHUNK_SIZE = 16 * 1024
+# Tail kept between chunks so short patterns split across chunks still match
+STREAM_OVERLAP = 512
+
+
+class _AttrTarget:
+    """Value of attribute 'attr' of the first <tag> element"""
+
+    def __init__(self, tag, attr):
+        self.open_re = re.compile(
+            r"<" + re.escape(tag) + r"\b[^>]*?\s" + re.escape(attr) +
+            r"\s*=\s*([\"'])", re.IGNORECASE)
+        self.value_start = None
+        self.quote = None
+        self.search_from = 0
+
+    def scan(self, buf):
+        """
+        Returns (value, hold): value once complete, otherwise the buffer
+        offset that must be kept for the next round.
+        """
+        if self.value_start is None:
+            match = self.open_re.search(buf)
+            if not match:
+                return None, max(0, len(buf) - STREAM_OVERLAP)
+            self.value_start = match.end()
+            self.quote = match.group(1)
+            self.search_from = self.value_start
+        end = buf.find(self.quote, self.search_from)
+        if end < 0:
+            self.search_from = len(buf)
+            return None, self.value_start
+        return html_unescape(buf[self.value_start:end]), len(buf)
+
+    def shift(self, offset):
+        if self.value_start is not None:
+            self.value_start -= offset
+            self.search_from -= offset
+
+
+class _PatternTarget:
+    """Group 1 of a short regex (shorter than STREAM_OVERLAP)"""
+
+    def __init__(self, pattern):
+        self.regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+
+    def scan(self, buf):
+        match = self.regex.search(buf)
+        if match:
+            return match.group(1), len(buf)
+        return None, max(0, len(buf) - STREAM_OVERLAP)
+
+    def shift(self, offset):
+        pass
+
+
+class StreamExtractor:
+    """
+    Feed decoded text chunks; results fill in as targets complete.
+
+    Args:
+        attrs (dict): name -> (tag, attribute), value is HTML-unescaped
+        patterns (dict): name -> regex whose group 1 is the value
+        stop_on (iterable): names that end the read as soon as one of
+            them is found; the other targets are only collected until
+            then (default: wait for every target)
+    """
+
+    def __init__(self, attrs=None, patterns=None, stop_on=None):
+        self.targets = {}
+        for name, (tag, attr) in (attrs or {}).items():
+            self.targets[name] = _AttrTarget(tag, attr)
+        for name, pattern in (patterns or {}).items():
+            self.targets[name] = _PatternTarget(pattern)
+        self.stop_on = tuple(stop_on) if stop_on else None
+        self.results = {}
+        self.buf = ""
+
+    @property
+    def done(self):
+        if self.stop_on:
+            return any(name in self.results for name in self.stop_on)
+        return len(self.results) == len(self.targets)
+
+    def feed(self, text):
+        """Add a chunk; returns True when no more input is needed"""
+        self.buf += text
+        hold = len(self.buf)
+        for name, target in self.targets.items():
+            if name in self.results:
+                continue
+            value, keep_from = target.scan(self.buf)
+            if value is not None:
+                self.results[name] = value
+            else:
+                hold = min(hold, keep_from)
+        if self.done:
+            self.buf = ""
+            return True
+        if hold:
+            self.buf = self.buf[hold:]
+            for target in self.targets.values():
+                target.shift(hold)
+        return False
+
+
+def extract_from_response(response, attrs=None, patterns=None, stop_on=None,
+                          chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Run a StreamExtractor over a requests response opened with
+    stream=True. The connection is closed as soon as the extractor is
+    done.
+
+    Returns:
+        tuple: (results dict, bytes read)
+    """
+    extractor = StreamExtractor(attrs, patterns, stop_on)
+    decoder = codecs.getincrementaldecoder(
+        response.encoding or "utf-8")(errors="replace")
+    read = 0
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            read += len(chunk)
+            if extractor.feed(decoder.decode(chunk)):
+                break
+        else:
+            extractor.feed(decoder.decode(b"", final=True))
+    finally:
+        response.close()
+    return extractor.results, read
+
+
+def stream_extract(url, attrs=None, patterns=None, stop_on=None,
+                   headers=None, params=None, timeout=15, verify=True,
+                   session=None):
+    """
+    GET url and extract attributes/patterns without reading the whole page.
+    'session' is the requests session to use (default: module level get).
+
+    Returns:
+        dict: name -> value for every target found (empty on HTTP error)
+    """
+    try:
+        response = (session or requests).get(
+            url, headers=headers, params=params, timeout=timeout,
+            verify=verify, stream=True)
+        response.raise_for_status()
+    except Exception as e:
+        print("[HTML STREAM] Error fetching {}: {}".format(url, e))
+        return {}
+    results, read = extract_from_response(response, attrs, patterns, stop_on)
+    print("[HTML STREAM] {}: {} bytes read, found {}".format(
+        url, read, sorted(results)))
+    return results
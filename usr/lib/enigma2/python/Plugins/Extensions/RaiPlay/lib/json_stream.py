@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental parsing of large JSON catalogues.
+
+The document is read in chunks and only the structure around the wanted
+arrays is tracked; every element of those arrays is decoded on its own
+(json raw_decode, C speed) as soon as it is complete and handed to the
+caller, which keeps just the fields it needs. The raw text, the decoded
+str and the full object tree of the document never coexist in memory.
+
+Paths are tuples of object keys leading to an array, "*" matches any
+key: ("contents", "*") is every letter list of {"contents": {"A": [..]}},
+("hits",) the search results, () a top level array.
+"""
+
+import codecs
+import re
+from json import JSONDecoder, loads
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_STRUCTURAL = re.compile(r'[{}\[\],:"]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SPACE = re.compile(r'\s*')
+_DELIMITERS = " \t\r\n,]"
+_decoder = JSONDecoder()
+
+
+def _path_matches(keys, paths):
+    for path in paths:
+        if len(path) == len(keys) and all(
+                p == "*" or p == k for p, k in zip(path, keys)):
+            return True
+    return False
+
+
+class JSONItemStream:
+    """
+    Feed decoded text; feed() returns the array elements completed by it.
+    """
+
+    def __init__(self, paths):
+        self.paths = [tuple(p) for p in paths]
+        self.buf = ""
+        self.pos = 0
+        # Frames: [kind, key, expecting_key, target]
+        self.stack = []
+        self.element_start = False
+
+    def _keys(self):
+        """Object keys from the root, None if an array is in between"""
+        keys = []
+        for kind, key, expecting_key, target in self.stack:
+            if kind != "{":
+                return None
+            keys.append(key)
+        return keys
+
+    def feed(self, text, final=False):
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        items = []
+        buf = self.buf
+        while True:
+            if self.element_start:
+                pos = _SPACE.match(buf, self.pos).end()
+                if pos >= len(buf):
+                    break
+                if buf[pos] == "]":
+                    self.element_start = False
+                    self.pos = pos
+                    continue
+                try:
+                    value, end = _decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise
+                    self.pos = pos
+                    break
+                if not final and (end >= len(buf) or (
+                        buf[pos] not in '{["tfn' and buf[end] not in _DELIMITERS)):
+                    # A number may continue in the next chunk
+                    self.pos = pos
+                    break
+                items.append(value)
+                self.element_start = False
+                self.pos = end
+                continue
+
+            match = _STRUCTURAL.search(buf, self.pos)
+            if not match:
+                self.pos = len(buf)
+                break
+            char = match.group()
+            pos = match.start()
+            frame = self.stack[-1] if self.stack else None
+            if char == '"':
+                string = _STRING.match(buf, pos)
+                if not string:
+                    self.pos = pos
+                    break
+                if frame and frame[0] == "{" and frame[2]:
+                    frame[1] = loads(string.group())
+                self.pos = string.end()
+                continue
+            self.pos = pos + 1
+            if char == "{":
+                self.stack.append(["{", None, True, False])
+            elif char == "[":
+                keys = self._keys()
+                target = keys is not None and _path_matches(keys, self.paths)
+                self.stack.append(["[", None, False, target])
+                self.element_start = target
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+            elif char == ":":
+                if frame:
+                    frame[2] = False
+            elif char == ",":
+                if frame and frame[0] == "{":
+                    frame[2] = True
+                elif frame and frame[3]:
+                    self.element_start = True
+        return items
+
+
+def iter_json_items(chunks, paths, encoding="utf-8"):
+    """
+    Yield the elements of the arrays at 'paths' from an iterable of byte
+    chunks.
+    """
+    stream = JSONItemStream(paths)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        for item in stream.feed(decoder.decode(chunk)):
+            yield item
+    for item in stream.feed(decoder.decode(b"", final=True), final=True):
+        yield item
+
+
+def iter_response_items(response, paths, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield array elements from a requests response opened with
+    stream=True; the response is closed when the generator ends.
+    """
+    try:
+        for item in iter_json_items(
+                response.iter_content(chunk_size=chunk_size), paths,
+                response.encoding or "utf-8"):
+            yield item
+    finally:
+        response.close()
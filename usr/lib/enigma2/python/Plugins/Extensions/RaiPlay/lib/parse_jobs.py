@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Fetch, parse and projection of large documents described by a job.
+
+The same code runs in the plugin and in the parse worker process
+(parse_worker.py), so it only depends on the standard library, requests
+and the other lib modules. A job is a dict:
+
+    url, method   the request ("GET" or "POST")
+    request       keyword arguments of the request (headers, params,
+                  json, timeout, verify)
+    paths         json_stream paths of the wanted arrays
+    nested        keys of arrays inside each element whose elements are
+                  the items instead (("cards",): the cards of each block)
+    where         {key: value} an item must match
+    fields        keys kept of each item, all when empty
+    html          {name: (tag, attr)} attributes read from an HTML page;
+                  the JSON document is then the one named by "document"
+                  and the other values come back in "found"
+    keep_document the document text is returned in "found" as well
+
+run_job() returns {"status", "latency", "items", "found"}: the HTTP
+status, the seconds to the response headers, the projected items and
+the HTML attributes. Items are small dicts, cheap to pickle: only the
+fields the screens read cross the process boundary.
+"""
+
+import os
+import pickle
+import select
+import struct
+import time
+
+from .html_stream import extract_from_response
+from .json_stream import JSONItemStream, iter_response_items
+
+FRAME_HEADER = struct.Struct(">I")
+# Python 3.0+ reads it, whatever the python3 of the image
+FRAME_PROTOCOL = 2
+FRAME_CHUNK_SIZE = 256 * 1024
+
+
+def new_job(url, paths, fields=(), method="GET", where=None, nested=(),
+            html=None, document=None, keep_document=False, **request):
+    """Job dict of a request; request keywords are passed to requests"""
+    return {
+        "url": url,
+        "method": method,
+        "request": request,
+        "paths": [tuple(p) for p in paths],
+        "nested": tuple(nested),
+        "where": dict(where or {}),
+        "fields": tuple(fields),
+        "html": dict(html or {}),
+        "document": document,
+        "keep_document": keep_document
+    }
+
+
+def project(item, job):
+    """item reduced to the job fields; None when it does not match"""
+    if not isinstance(item, dict):
+        return None
+    for key, value in job["where"].items():
+        if item.get(key) != value:
+            return None
+    if not job["fields"]:
+        return item
+    return {key: item[key] for key in job["fields"] if key in item}
+
+
+def _items(elements, job):
+    for element in elements:
+        if job["nested"]:
+            if not isinstance(element, dict):
+                continue
+            for key in job["nested"]:
+                for item in element.get(key) or ():
+                    item = project(item, job)
+                    if item is not None:
+                        yield item
+        else:
+            item = project(element, job)
+            if item is not None:
+                yield item
+
+
+def run_job(job, session):
+    """Fetch and parse a job with a requests session"""
+    start = time.time()
+    response = session.request(
+        job["method"], job["url"], stream=True, **job["request"])
+    result = {
+        "status": response.status_code,
+        "latency": time.time() - start,
+        "items": [],
+        "found": {}
+    }
+    if response.status_code >= 400:
+        response.close()
+        return result
+    if not job["html"]:
+        result["items"] = list(_items(
+            iter_response_items(response, job["paths"]), job))
+        return result
+    found, read = extract_from_response(response, attrs=job["html"])
+    document = found.get(job["document"])
+    if not job["keep_document"]:
+        found.pop(job["document"], None)
+    result["found"] = found
+    if document:
+        stream = JSONItemStream(job["paths"])
+        result["items"] = list(_items(stream.feed(document, final=True), job))
+    return result
+
+
+def write_frame(stream, obj):
+    """Send obj as a length-prefixed pickle"""
+    data = pickle.dumps(obj, FRAME_PROTOCOL)
+    stream.write(FRAME_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _read_exact(fd, size, deadline):
+    chunks = []
+    while size:
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError("no answer on the pipe")
+        chunk = os.read(fd, min(size, FRAME_CHUNK_SIZE))
+        if not chunk:
+            raise EOFError("pipe closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(fd, timeout=None):
+    """
+    Read one length-prefixed pickle from a file descriptor; EOFError when
+    the other side closed it, TimeoutError after timeout seconds.
+    """
+    deadline = time.time() + timeout if timeout is not None else None
+    size, = FRAME_HEADER.unpack(_read_exact(fd, FRAME_HEADER.size, deadline))
+    return pickle.loads(_read_exact(fd, size, deadline))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Parse worker process.
+
+Started by RaiPlayOffload with the python3 of the image, outside
+Enigma2: reads parse_jobs jobs from stdin and answers each one on
+stdout, both as length-prefixed pickles. Answers are ("ok", result) or
+("error", kind, message) with kind "timeout", "connection" or "other".
+Messages printed while working go to stderr (the Enigma2 log), stdout
+carries only the answers. The process leaves when stdin is closed or
+after WORKER_IDLE seconds without a job; the plugin starts it again
+on the next one.
+"""
+
+import importlib
+import os
+import sys
+import types
+
+WORKER_IDLE = 300
+# Decoding never competes with the Enigma2 main loop or playback
+WORKER_NICE = 5
+
+
+def _load_jobs():
+    """parse_jobs, with this directory loaded as a package"""
+    package = types.ModuleType("raiplay_lib")
+    package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules["raiplay_lib"] = package
+    return importlib.import_module("raiplay_lib.parse_jobs")
+
+
+def _error_kind(error):
+    import requests
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    return "other"
+
+
+def main():
+    answers = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    try:
+        os.nice(WORKER_NICE)
+    except OSError:
+        pass
+    jobs = _load_jobs()
+    import requests
+    session = requests.Session()
+    while True:
+        try:
+            job = jobs.read_frame(0, WORKER_IDLE)
+        except (EOFError, TimeoutError):
+            return
+        try:
+            answer = ("ok", jobs.run_job(job, session))
+        except Exception as e:
+            answer = ("error", _error_kind(e), str(e))
+        try:
+            jobs.write_frame(answers, answer)
+        except OSError:
+            return
+
+
+if __name__ == "__main__":
+    main()
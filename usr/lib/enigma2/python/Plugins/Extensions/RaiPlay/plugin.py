@@ -39,17 +39,17 @@ import codecs
 import chardet
 import html as _html
 import sys
-import threading
 import time
 import traceback
 from datetime import date, datetime, timedelta
-from json import dump, dumps, load, loads
+from json import dump, dumps, load
 from os import access, W_OK, makedirs, remove, system
 from os.path import exists, isdir, join
 from re import DOTALL, findall, match, search
 from urllib.parse import parse_qs, urljoin, urlparse, urlencode, urlunparse
 
 import requests
+from twisted.internet import defer, reactor
 from twisted.web.client import downloadPage
 
 from Components.ActionMap import ActionMap
@@ -94,9 +94,41 @@ from enigma import (
 
 from . import _, __version__
 from . import Utils
+from .RaiPlayAsync import AsyncRaiPlayAPI
+from .RaiPlayBreaker import get_breaker
+from .RaiPlayCDN import get_cdn
+from .RaiPlayDeadline import (
+    PLAY_DEADLINE,
+    budget_timeout,
+    configure_hedging,
+    deadline_scope,
+    hedged_get
+)
 from .RaiPlayDownloadManager import RaiPlayDownloadManager
+from .RaiPlayEPGStore import get_epg_warehouse
+from .RaiPlayExecutor import CancelToken, get_executor, when_all
+from .RaiPlayHLSProxy import DISK_BUFFER_ROOT, start_hls_proxy
+from .RaiPlayItems import Item
+from .RaiPlayLimiter import get_session
+from .RaiPlayLocalServer import GrowingFileSource, get_local_server
+from .RaiPlayMirrors import get_mirrors
+from .RaiPlayNowNext import get_now_next
+from .RaiPlayOffload import (
+    ALL_PROGRAMS_FIELDS,
+    ARCHIVE_CARD_FIELDS,
+    AZ_FIELDS,
+    SPORT_HIT_FIELDS,
+    get_offload
+)
+from .RaiPlayPageCache import PageCache
+from .RaiPlayZap import get_zap_resolver, warm_url
+from .RaiPlayRecorder import get_recorder
+from .RaiPlaySchema import NEWS_CONTAINERS, extract_category, iter_items
+from .lib.fast_json import loads
 from .lib.helpers.helper import Helper
 from .lib.html_conv import html_unescape
+from .lib.html_stream import extract_from_response, stream_extract
+from .lib.parse_jobs import new_job
 
 # Import notification system
 try:
@@ -168,6 +200,35 @@ default_dir = config.movielist.last_videodir.value if isdir(
     config.movielist.last_videodir.value) else default_movie_path()
 config.plugins.raiplay.lastdir = ConfigSelection(
     default=default_dir, choices=[])
+config.plugins.raiplay.progressive = ConfigYesNo(default=True)
+config.plugins.raiplay.hlsproxy = ConfigYesNo(default=False)
+config.plugins.raiplay.hlsproxy_segments = ConfigSelection(
+    default="4", choices=[str(n) for n in range(2, 11)])
+config.plugins.raiplay.hlsproxy_buffer = ConfigSelection(
+    default="ram", choices=[("ram", _("RAM")), ("disk", _("Disk (/tmp)"))])
+config.plugins.raiplay.live_rewind = ConfigSelection(
+    default="0", choices=[
+        ("0", _("Off")), ("10", _("10 min")), ("30", _("30 min")),
+        ("60", _("60 min")), ("120", _("120 min"))])
+config.plugins.raiplay.live_rewind_size = ConfigSelection(
+    default="1024", choices=[
+        ("256", "256 MB"), ("512", "512 MB"), ("1024", "1 GB"),
+        ("2048", "2 GB"), ("4096", "4 GB")])
+config.plugins.raiplay.negative_cache = ConfigSelection(
+    default="300", choices=[
+        ("0", _("Off")), ("60", _("1 min")), ("300", _("5 min")),
+        ("900", _("15 min")), ("3600", _("60 min"))])
+config.plugins.raiplay.negative_cache.addNotifier(
+    lambda element: get_breaker().configure(int(element.value)))
+config.plugins.raiplay.hedging = ConfigYesNo(default=True)
+config.plugins.raiplay.hedging.addNotifier(
+    lambda element: configure_hedging(element.value))
+config.plugins.raiplay.cdn_rewrite = ConfigYesNo(default=False)
+config.plugins.raiplay.cdn_rewrite.addNotifier(
+    lambda element: get_cdn().configure(element.value))
+config.plugins.raiplay.offload_parsing = ConfigYesNo(default=False)
+config.plugins.raiplay.offload_parsing.addNotifier(
+    lambda element: get_offload().configure(element.value))
 
 
 if config.plugins.raiplay.debug.value:
@@ -215,6 +276,17 @@ DEFAULT_ICON = join(plugin_path, "res/pics/icon.png")
 pluglogo = join(plugin_path, "res/pics/logo.png")
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36"
 ntimeout = 10
+# Play & Download: bytes on disk before the player is started
+PROGRESSIVE_PREBUFFER = 2 * 1024 * 1024
+PROGRESSIVE_START_TIMEOUT = 60
+# rainews.it pages: JSON carried in element attributes, read by html_stream
+AGGREGATOR_DATA = {'data': ('rainews-aggregator-broadcast-archive', 'data')}
+PLAYER_DATA = {'player': ('rainews-player', 'data')}
+PAGINATOR_ATTRS = {
+    'pageindex': ('rainews-paginator', 'pageindex'),
+    'pagesize': ('rainews-paginator', 'pagesize'),
+    'length': ('rainews-paginator', 'length')
+}
 
 png_amb = join(plugin_res, "ambiente.png")
 png_artis = join(plugin_res, "artiespettacolo.png")
@@ -328,21 +400,19 @@ def extract_real_video_url(page_url):
             "User-Agent": USER_AGENT,
             "Referer": "https://www.raiplay.it/"
         }
-        response = requests.get(page_url, headers=headers, timeout=10)
+        response = hedged_get(
+            get_session(), page_url, "page", budget_timeout(10),
+            headers=headers, stream=True)
         response.raise_for_status()
 
         if 'application/json' in response.headers.get('Content-Type', ''):
-            data = response.json()
+            data = loads(response.content)
         else:
-            json_match = search(
-                r'<rainews-aggregator-broadcast-archive\s+data="([^"]+)"',
-                response.text
-            )
-            if json_match:
-                json_str = html_unescape(json_match.group(1))
-                data = loads(json_str)
-            else:
+            # Stop reading the page once the aggregator data is complete
+            found, read = extract_from_response(response, attrs=AGGREGATOR_DATA)
+            if 'data' not in found:
                 return None
+            data = loads(found['data'])
 
         paths = [
             ["video", "content_url"],
@@ -380,6 +450,33 @@ def extract_real_video_url(page_url):
     return None
 
 
+def extract_rainews_video_url(page_url):
+    """
+    Video URL of a rainews.it page: <rainews-player> data, else a
+    content_url JSON field or a <source> tag. The page is read only
+    until the player data is found; the others are kept meanwhile.
+    """
+    found = stream_extract(
+        page_url,
+        attrs=PLAYER_DATA,
+        patterns={
+            'content_url': r'"?content_url"?\s*:\s*"([^"]+)"',
+            'source': r'<source\s+src="([^"]+)"\s+type="video/[^"]+"'
+        },
+        stop_on=('player',),
+        headers={"User-Agent": USER_AGENT},
+        timeout=budget_timeout(10),
+        session=get_session())
+    if 'player' in found:
+        try:
+            video_url = loads(found['player']).get("content_url", "")
+            if video_url:
+                return video_url
+        except Exception as e:
+            print("[ERROR] parsing player JSON: " + str(e))
+    return found.get('content_url') or found.get('source')
+
+
 def normalize_url(url):
     """Normalizes the URL to ensure it is valid"""
     if not url:
@@ -427,82 +524,69 @@ class setPlaylist(MenuList):
         else:
             self.l.setFont(0, gFont('Regular', 24))
             self.l.setItemHeight(45)
+        self.l.setBuildFunc(RaiPlaySetListEntry)
+
+
+# Row layout per screen width: icon pos, icon size, text pos, text size
+ROW_LAYOUTS = {
+    2560: ((10, 15), (40, 40), (80, 0), (2000, 60)),
+    1920: ((5, 5), (40, 40), (70, 0), (1150, 50))
+}
+ROW_LAYOUT_DEFAULT = ((3, 10), (40, 40), (50, 0), (670, 50))
+_row_template = []
+_skins = {}
+
+
+def load_skin(name):
+    """Skin XML from skin_path, read once per process"""
+    skin = _skins.get(name)
+    if skin is None:
+        with codecs.open(join(skin_path, name), "r", encoding="utf-8") as f:
+            skin = _skins[name] = f.read()
+    return skin
 
 
 def RaiPlaySetListEntry(name):
-    res = [name]
-    pngx = resolveFilename(
-        SCOPE_PLUGINS,
-        "Extensions/{}/res/pics/setting.png".format('RaiPlay'))
-    if screenwidth.width() == 2560:
-        res.append(
-            MultiContentEntryPixmapAlphaTest(
-                pos=(
-                    10, 15), size=(
-                    40, 40), png=loadPNG(pngx)))
-        res.append(
-            MultiContentEntryText(
-                pos=(
-                    80,
-                    0),
-                size=(
-                    2000,
-                    60),
-                font=0,
-                text=name,
-                color=0xa6d1fe,
-                flags=RT_HALIGN_LEFT | RT_VALIGN_CENTER))
-    elif screenwidth.width() == 1920:
-        res.append(
-            MultiContentEntryPixmapAlphaTest(
-                pos=(
-                    5, 5), size=(
-                    40, 40), png=loadPNG(pngx)))
-        res.append(
-            MultiContentEntryText(
-                pos=(
-                    70,
-                    0),
-                size=(
-                    1150,
-                    50),
-                font=0,
-                text=name,
-                color=0xa6d1fe,
-                flags=RT_HALIGN_LEFT | RT_VALIGN_CENTER))
-    else:
-        res.append(
-            MultiContentEntryPixmapAlphaTest(
-                pos=(
-                    3, 10), size=(
-                    40, 40), png=loadPNG(pngx)))
-        res.append(
-            MultiContentEntryText(
-                pos=(
-                    50,
-                    0),
-                size=(
-                    670,
-                    50),
-                font=0,
-                text=name,
-                color=0xa6d1fe,
-                flags=RT_HALIGN_LEFT | RT_VALIGN_CENTER))
-    return res
+    """
+    Row of a setPlaylist. Called by the list for the rows it draws; the
+    row icon and the layout are decoded once per process.
+    """
+    if not _row_template:
+        pngx = resolveFilename(
+            SCOPE_PLUGINS,
+            "Extensions/{}/res/pics/setting.png".format('RaiPlay'))
+        _row_template.append(loadPNG(pngx))
+        _row_template.append(
+            ROW_LAYOUTS.get(screenwidth.width(), ROW_LAYOUT_DEFAULT))
+    png, (icon_pos, icon_size, text_pos, text_size) = _row_template
+    return [
+        name,
+        MultiContentEntryPixmapAlphaTest(pos=icon_pos, size=icon_size, png=png),
+        MultiContentEntryText(
+            pos=text_pos,
+            size=text_size,
+            font=0,
+            text=name,
+            color=0xa6d1fe,
+            flags=RT_HALIGN_LEFT | RT_VALIGN_CENTER)
+    ]
 
 
 def show_list(data, listas):
-    icount = 0
-    plist = []
-    for line in data:
-        name = str(data[icount])
-        plist.append(RaiPlaySetListEntry(name))
-        icount += 1
-    listas.setList(plist)
+    # Rows are built by RaiPlaySetListEntry only when drawn
+    listas.setList([(str(name),) for name in data])
     if hasattr(listas, 'instance') and listas.instance is not None:
         listas.instance.invalidate()
 
 
+def update_list_entry(listas, index, name):
+    """Redraw a single row of a list filled by show_list"""
+    if index >= len(listas.list):
+        return
+    listas.list[index] = (str(name),)
+    listas.l.invalidateEntry(index)
+
+
 class RaiPlaySettings(Setup):
     def __init__(self, session, parent=None):
         Setup.__init__(
@@ -558,6 +642,9 @@ class SafeScreen(Screen):
         self.last_index = -1
         self.icons = []
         self.api = RaiPlayAPI()
+        self.async_api = AsyncRaiPlayAPI(self.api)
+        # Background work of this screen, cancelled when it closes
+        self.tasks = CancelToken()
         self.picload = ePicLoad()
         self['text'] = setPlaylist([])
         if "text" in self:
@@ -895,6 +982,14 @@ class SafeScreen(Screen):
 
         return self.api.DEFAULT_ICON_URL
 
+    def getDownloadManager(self):
+        """Return the session download manager, creating it if needed."""
+        if not hasattr(self.session, 'download_manager'):
+            print("[DEBUG] Creating new download manager instance...")
+            self.session.download_manager = RaiPlayDownloadManager(
+                self.session)
+        return self.session.download_manager
+
     def addToDownloadQueue(self, title, url):
         """Adds a video to the download queue"""
         print(f"[DEBUG] addToDownloadQueue called: {title}")
@@ -902,10 +997,7 @@ class SafeScreen(Screen):
 
         try:
             # Ensure download manager exists
-            if not hasattr(self.session, 'download_manager'):
-                print("[DEBUG] Creating new download manager instance...")
-                self.session.download_manager = RaiPlayDownloadManager(
-                    self.session)
+            self.getDownloadManager()
 
             if not self.session.download_manager:
                 print("[DEBUG] ERROR: Download manager is None!")
@@ -952,13 +1044,177 @@ class SafeScreen(Screen):
                 MessageBox.TYPE_ERROR,
                 timeout=5)
 
-    def playDirect(self, name, url):
+    def addAllToDownloadQueue(self, entries):
+        """
+        Queue every (title, url) entry of the current set in one batch.
+        Page lookups and relinker resolution run in a background thread.
+        """
+        entries = [(title, url) for title, url in entries if url]
+        if not entries:
+            self.session.open(
+                MessageBox,
+                _("No video URL available"),
+                MessageBox.TYPE_ERROR,
+                timeout=5)
+            return
+
+        manager = self.getDownloadManager()
+        if not manager:
+            self.session.open(
+                MessageBox,
+                _("Error: Download manager not available"),
+                MessageBox.TYPE_ERROR)
+            return
+
+        print("[DEBUG] Bulk download of {} entries".format(len(entries)))
+        if 'info' in self:
+            self['info'].setText(_('Adding downloads... Please wait'))
+
+        # Read on the main thread: the worker threads never touch the queue
+        known_ids = manager.queued_content_ids()
+
+        def resolve_done(resolved, skipped):
+            reactor.callFromThread(
+                self.bulkDownloadResolved, manager, resolved, skipped)
+
+        def queue_resolved(futures):
+            if self.tasks.cancelled:
+                return
+            try:
+                titles = [title for title, url in entries]
+                urls = [future.result() for future in futures]
+                manager.resolve_downloads(
+                    list(zip(titles, urls)), resolve_done, known_ids=known_ids,
+                    token=self.tasks)
+            except Exception as e:
+                print("[ERROR] bulk download: " + str(e))
+                traceback.print_exc()
+                resolve_done([], len(entries))
+
+        executor = get_executor()
+        when_all([
+            executor.submit(normalize_url, url, token=self.tasks)
+            for title, url in entries
+        ], queue_resolved)
+
+    def bulkDownloadResolved(self, manager, resolved, skipped):
+        """Queue the resolved entries of a bulk download on the main thread."""
+        try:
+            added, already_queued = manager.add_downloads(resolved)
+        except Exception as e:
+            print("[ERROR] bulk download: " + str(e))
+            traceback.print_exc()
+            added, already_queued = 0, len(resolved)
+        self.bulkDownloadDone(added, skipped + already_queued)
+
+    def bulkDownloadDone(self, added, skipped):
+        """Report the result of a bulk download on the main thread."""
+        if self.closing:
+            return
+        if 'info' in self:
+            self['info'].setText(_('Select video'))
+        message = _("Added to queue: {}").format(added)
+        if skipped:
+            message += "\n" + _("Already queued or unavailable: {}").format(
+                skipped)
+        self.session.open(
+            MessageBox,
+            message,
+            MessageBox.TYPE_INFO,
+            timeout=5)
+
+    def playAndDownload(self, name, url):
+        """
+        Play & Download with a single network stream: the download is
+        written as a growing TS file and the player reads it through the
+        local stream server.
+        """
+        if not config.plugins.raiplay.progressive.value:
+            self.playDirect(name, url)
+            # Add small delay before starting download
+            self.download_timer = eTimer()
+            self.download_timer.callback.append(
+                lambda: self.addToDownloadQueue(name, url))
+            self.download_timer.start(1000, True)  # 1 second delay
+            return
+
+        try:
+            manager = self.getDownloadManager()
+            download_id = manager.add_download(
+                name, normalize_url(url), progressive=True)
+            item = manager.get_download(download_id) if download_id else None
+            if not item:
+                raise RuntimeError(_("Error adding download"))
+
+            manager.start_download(item)
+            source = GrowingFileSource(
+                item['file_path'],
+                lambda: manager.is_download_finished(download_id))
+            local_url = get_local_server().register(source, "stream.ts")
+            if not local_url:
+                raise RuntimeError(_("Local stream server not available"))
+
+            print("[DEBUG] Progressive playback from: " + local_url)
+            self.progressive = (name, local_url, source, download_id, time.time())
+            self.progressive_timer = eTimer()
+            self.progressive_timer.callback.append(self.checkProgressiveStart)
+            self.progressive_timer.start(500, False)
+            if 'info' in self:
+                self['info'].setText(_('Buffering... Please wait'))
+        except Exception as e:
+            print("[ERROR] progressive play & download: " + str(e))
+            traceback.print_exc()
+            self.session.open(
+                MessageBox,
+                _("Error playing stream: {}").format(str(e)),
+                MessageBox.TYPE_ERROR)
+
+    def checkProgressiveStart(self):
+        """Start the player once enough of the download is on disk."""
+        name, local_url, source, download_id, started = self.progressive
+        if self.closing:
+            self.progressive_timer.stop()
+            self.stopProgressive(source)
+            return
+        manager = self.getDownloadManager()
+        finished = manager.is_download_finished(download_id)
+        buffered = source.available()
+
+        if buffered < PROGRESSIVE_PREBUFFER and not finished:
+            if time.time() - started < PROGRESSIVE_START_TIMEOUT:
+                return
+        self.progressive_timer.stop()
+        if 'info' in self:
+            self['info'].setText('')
+
+        if buffered == 0:
+            self.stopProgressive(source)
+            self.session.open(
+                MessageBox,
+                _("Error playing stream: {}").format(_("no data received")),
+                MessageBox.TYPE_ERROR)
+            return
+        self.session.openWithCallback(
+            lambda *args: self.stopProgressive(source),
+            Playstream2, name, local_url)
+
+    def stopProgressive(self, source):
+        """Drop the local URL of a Play & Download source."""
+        get_local_server().unregister(source.token)
+
+    def playDirect(self, name, url, live=False):
         """Direct playback with provided URL."""
         try:
             print(f"[DEBUG] playDirect called: {name}")
             print(f"[DEBUG] Original URL: {url}")
 
-            url = normalize_url(url)
+            # A live channel pre-resolved by the zap resolver skips the
+            # relinker: Playstream2 takes its warm URL and license key
+            if live and warm_url(url):
+                print("[DEBUG] Warm live channel, relinker skipped")
+            else:
+                with deadline_scope(PLAY_DEADLINE):
+                    url = normalize_url(url)
             print(f"[DEBUG] Normalized URL: {url}")
 
             url = strwithmeta(url, {
@@ -974,7 +1230,7 @@ class SafeScreen(Screen):
                 pass
 
             print(f"[DEBUG] Opening Playstream2 with: {safe_name}")
-            self.session.open(Playstream2, safe_name, url)
+            self.session.open(Playstream2, safe_name, url, live)
 
         except Exception as e:
             print(f'[ERROR] playing direct: {str(e)}')
@@ -995,6 +1251,7 @@ class SafeScreen(Screen):
             return
         self.closing = True
         print("[DEBUG][SafeScreen] Cleaning up " + self.__class__.__name__)
+        self.tasks.cancel()
         try:
             # Add explicit cleanup of UI elements
             if 'text' in self:
@@ -1005,9 +1262,14 @@ class SafeScreen(Screen):
                     'videos',
                     'names',
                     'urls',
+                    'icons',
                     '_history',
                     'items',
-                    'blocks']:
+                    'blocks',
+                    'programs',
+                    'results',
+                    'all_videos',
+                    'displayed_videos']:
                 if hasattr(self, attr):
                     setattr(self, attr, [])
 
@@ -1077,6 +1339,7 @@ class RaiPlayAPI:
         self.MAIN_URL = 'https://www.raiplay.it/'
         self.MEDIA_URL = 'https://mediapolisvod.rai.it'
         self.MENU_URL = "https://www.rai.it/dl/RaiPlay/2016/menu/PublishingBlock-20b274b1-23ae-414f-b3bf-4bdc13b86af2.html?homejson"
+        self.MENU_URL2 = "https://www.raiplay.it/dl/RaiPlay/2016/menu/PublishingBlock-20b274b1-23ae-414f-b3bf-4bdc13b86af2.html?homejson"
 
         self.DEFAULT_ICON_URL = "https://images-eu.ssl-images-amazon.com/images/I/41%2B5P94pGPL.png"
         self.NOTHUMB_URL = "https://www.rai.it/cropgd/256x144/dl/components/img/imgPlaceholder.png"
@@ -1095,6 +1358,7 @@ class RaiPlayAPI:
         self.CHANNELS_URL2 = "https://www.rai.it/dl/RaiPlay/2016/PublishingBlock-9a2ff311-fcf0-4539-8f8f-c4fee2a71d58.html?json"
         self.CHANNELS_THEATRE = "https://www.raiplay.it/raiplay/tipologia/musica-e-teatro/index.json"
         self.EPG_URL = "https://www.rai.it/dl/palinsesti/Page-e120a813-1b92-4057-a214-15943d95aa68-json.html?canale={}&giorno={}"
+        self.EPG_URL2 = "https://www.raiplay.it/dl/palinsesti/Page-e120a813-1b92-4057-a214-15943d95aa68-json.html?canale={}&giorno={}"
         self.EPG_REPLAY_URL = "https://www.raiplay.it/palinsesto/app/old/{}/{}.json"
         self.PROGRAMS_ALL_URL = "https://www.raiplay.it/genere/Programmi---Tutti-20269973-8d0d-4cc4-9f82-66bd9fa2b03a.json"
         # PALINSESTO_URL_HTML = "https://www.raiplay.it/palinsesto/guidatv/lista/[idCanale]/[dd-mm-yyyy].html"
@@ -1116,6 +1380,11 @@ class RaiPlayAPI:
         self.RAISPORT_CATEGORIES_URL = "https://www.rainews.it/category/6dd7493b-f116-45de-af11-7d28a3f33dd2.json"
         self.RAISPORT_SEARCH_URL = "https://www.rainews.it/atomatic/news-search-service/api/v3/search"
 
+        # www.raiplay.it serves the www.rai.it /dl/ documents too
+        self.mirrors = get_mirrors()
+        self.mirrors.register("menu", [self.MENU_URL, self.MENU_URL2])
+        self.mirrors.register("channels", [self.CHANNELS_URL, self.CHANNELS_URL2])
+
         self.debug_dir = '/tmp/raiplay_debug/'
         try:
             if not exists(self.debug_dir):
@@ -1180,9 +1449,9 @@ class RaiPlayAPI:
         url = self.RAISPORT_CATEGORIES_URL
         try:
             print("[DEBUG] Downloading categories JSON")
-            response = requests.get(url, timeout=15)
+            response = get_session().get(url, timeout=15)
             response.raise_for_status()
-            data = response.json()
+            data = loads(response.content)
             if DEBUG_MODE:
                 # Save the structure for debugging
                 file_path = join(self.debug_dir, "raisport_categories.json")
@@ -1341,8 +1610,9 @@ class RaiPlayAPI:
             new_url = urlunparse(parsed._replace(query=new_query))
 
             print("[Relinker] Fetching XML from: " + new_url)
-            response = requests.get(
-                new_url, headers=self.HTTP_HEADER, timeout=15)
+            response = hedged_get(
+                get_session(), new_url, "relinker", budget_timeout(15),
+                headers=self.HTTP_HEADER)
             response.raise_for_status()
             content = response.text
 
@@ -1352,21 +1622,23 @@ class RaiPlayAPI:
                     f.write(content)
                 print("[Relinker] Saved XML to /tmp/relinker.xml")
 
-            # Parse XML response
-            url_match = search(r'<url type="content">(.*?)</url>', content)
-            if not url_match:
-                print("[Relinker] No content URL found in XML")
-                return url, None
+            # Parse XML response: one content URL per CDN edge offered
+            content_urls = []
+            for content_url in findall(r'<url type="content">(.*?)</url>', content):
+                print("[Relinker] Raw content URL: " + content_url)
 
-            content_url = url_match.group(1)
-            print("[Relinker] Raw content URL: " + content_url)
+                # Extract URL from CDATA if present
+                if "<![CDATA[" in content_url:
+                    cdata_match = search(r'<!\[CDATA\[(.*?)\]\]>', content_url)
+                    if cdata_match:
+                        content_url = cdata_match.group(1)
+                        print("[Relinker] Extracted CDATA URL: " + content_url)
+                content_urls.append(content_url)
 
-            # Extract URL from CDATA if present
-            if "<![CDATA[" in content_url:
-                cdata_match = search(r'<!\[CDATA\[(.*?)\]\]>', content_url)
-                if cdata_match:
-                    content_url = cdata_match.group(1)
-                    print("[Relinker] Extracted CDATA URL: " + content_url)
+            content_url = get_cdn().select(content_urls)
+            if not content_url:
+                print("[Relinker] No content URL found in XML")
+                return url, None
 
             # Check for DRM license
             license_key = None
@@ -1421,7 +1693,7 @@ class RaiPlayAPI:
                 return False, None
 
             print("[DEBUG] Fetching URL: %s" % url)
-            response = requests.get(
+            response = get_session().get(
                 url,
                 headers=self.HTTP_HEADER,
                 timeout=15,
@@ -1448,10 +1720,10 @@ class RaiPlayAPI:
 
         return urljoin(self.MAIN_URL, url)
 
-    def getLiveTVChannels(self):
-        """Fetch live TV channels and add archived videos.
+    def getDiretteChannels(self):
+        """Fetch the live TV channels ("dirette") only.
         """
-        data = Utils.getUrlSiVer(self.CHANNELS_URL)
+        data = self.mirrors.fetch("channels", Utils.getUrlBytes)
         live_channels = []
         if data:
             try:
@@ -1467,15 +1739,43 @@ class RaiPlayAPI:
                     })
             except BaseException:
                 pass
+        return live_channels
+
+    def getLiveTVChannels(self):
+        """Fetch live TV channels and add archived videos.
+        """
+        live_channels = self.getDiretteChannels()
 
         # Add archived videos
         archive_videos = self.getArchivedVideos()
         return live_channels + archive_videos
 
+    def getReplayChannels(self):
+        """Fetch the TV channels available in the replay guide.
+        """
+        data = self.mirrors.fetch("channels", Utils.getUrlBytes)
+        if not data:
+            return []
+
+        result = []
+        try:
+            for channel in loads(data).get("dirette", []):
+                title = channel.get("channel", "")
+                if not title:
+                    continue
+                result.append({
+                    'display': title,  # Original display name
+                    'api': title.replace(" ", ""),  # API expects no spaces
+                    'icon': self.getThumbnailUrl2(channel)
+                })
+        except Exception as e:
+            print("[DEBUG] [getReplayChannels] JSON parse error:", e)
+        return result
+
     def getLiveRadioChannels(self):
         """Fetch live radio channels from the radio JSON feed.
         """
-        data = Utils.getUrlSiVer(self.CHANNELS_RADIO_URL)
+        data = Utils.getUrlBytes(self.CHANNELS_RADIO_URL)
         if not data:
             return []
 
@@ -1513,21 +1813,19 @@ class RaiPlayAPI:
         """
         archive_url = self.RAISPORT_ARCHIVIO_URL
         print("[DEBUG] Fetching archive URL:", archive_url)
-        data = Utils.getUrlSiVer(archive_url)
-
-        if not data:
-            print("[DEBUG] No data received from archive URL.")
-            return []
+        found = stream_extract(
+            archive_url,
+            attrs=AGGREGATOR_DATA,
+            headers={"User-Agent": USER_AGENT},
+            timeout=10,
+            session=get_session())
 
         try:
-            m = search(
-                r'<rainews-aggregator-broadcast-archive[^>]+data="([^"]+)"',
-                data)
-            if not m:
+            if 'data' not in found:
                 print("[DEBUG] No suitable JSON found in HTML.")
                 return []
 
-            raw_json = _html.unescape(m.group(1))
+            raw_json = found['data']
             print("[DEBUG] Extracted JSON length:", len(raw_json))
             if DEBUG_MODE:
                 with open(self.debug_dir + "raw_json.txt", "w", encoding="utf-8") as f:
@@ -1620,7 +1918,7 @@ class RaiPlayAPI:
         """
         url = self.EPG_REPLAY_URL.format(channel_api_name, date_api)
         try:
-            data = Utils.getUrlSiVer(url)
+            data = Utils.getUrlBytes(url)
             if not data:
                 print("[DEBUG] No data returned from URL:", url)
                 return []
@@ -1694,13 +1992,19 @@ class RaiPlayAPI:
 
     def getOnDemandMenu(self):
         """Retrieve the on-demand menu categories and special entries."""
-        url = self.MENU_URL
-        data = Utils.getUrlSiVer(url)
+        data = self.mirrors.fetch("menu", Utils.getUrlBytes)
         if not data:
             return []
 
         try:
-            response = loads(data)
+            return self.parseOnDemandMenu(loads(data))
+        except Exception as e:
+            print("[DEBUG]Error in getOnDemandMenu: " + str(e))
+            return []
+
+    def parseOnDemandMenu(self, response):
+        """Menu categories and special entries of the decoded menu JSON."""
+        try:
             result = []
             seen_urls = set()
 
@@ -1821,7 +2125,7 @@ class RaiPlayAPI:
 
             return result
         except Exception as e:
-            print("[DEBUG]Error in getOnDemandMenu: " + str(e))
+            print("[DEBUG]Error in parseOnDemandMenu: " + str(e))
             return []
 
     def getOnDemandCategory(self, url):
@@ -1831,7 +2135,7 @@ class RaiPlayAPI:
         # Prepare the URL
         url = self.prepare_url(url)
         print("[DEBUG] Fetching category: {}".format(url))
-        data = Utils.getUrlSiVer(url)
+        data = Utils.getUrlBytes(url)
         if not data:
             print("[ERROR] No data received for URL: {}".format(url))
             return []
@@ -1839,187 +2143,7 @@ class RaiPlayAPI:
         try:
             response = loads(data)
             print("[DEBUG] JSON response keys: " + str(list(response.keys())))
-            items = []
-            az_structures = []
-
-            # 1. Check if there is a direct AZ structure
-            az_keys = ['0-9'] + [chr(ord('A') + i) for i in range(26)]
-            if any(key in response for key in az_keys):
-                print("[DEBUG] Found direct AZ structure")
-                az_structures.append(response)
-
-            # 2. Check if there is an AZ structure inside 'contents'
-            if "contents" in response and isinstance(
-                    response["contents"], dict):
-                print("[DEBUG] Found AZ structure inside 'contents'")
-                az_structures.append(response["contents"])
-
-            # 3. Check if there is an AZ structure inside 'blocks'
-            if "blocks" in response and isinstance(response["blocks"], list):
-                for block in response["blocks"]:
-                    if "contents" in block and isinstance(
-                            block["contents"], dict):
-                        if any(key in block["contents"] for key in az_keys):
-                            print("[DEBUG] Found AZ structure inside block")
-                            az_structures.append(block["contents"])
-
-            # Process all AZ structures found
-            for az_structure in az_structures:
-                for key in az_keys:
-                    if key in az_structure and az_structure[key]:
-                        for item in az_structure[key]:
-                            name = item.get("name", "")
-                            if not name:
-                                continue
-
-                            raw_url = item.get(
-                                "path_id") or item.get("PathID") or ""
-                            url_fixed = self.fixPath(
-                                raw_url) if raw_url else None
-                            icon_url = self.getThumbnailUrl2(item)
-
-                            items.append({
-                                "name": name,
-                                "url": url_fixed,
-                                "icon": icon_url,
-                                "sub-type": item.get("type", "PLR programma Page")
-                            })
-
-                # If we already found items, return them immediately
-                if items:
-                    print(
-                        "[DEBUG] Found {} items in AZ structure".format(
-                            len(items)))
-                    return items
-
-            # Case 1: Direct list of items
-            if "items" in response and isinstance(response["items"], list):
-                for i, item in enumerate(response["items"]):
-                    print(
-                        "[DEBUG] Item #{}: {}".format(
-                            i, item.get(
-                                "name", "no-name")))
-                    raw_url = item.get("path_id") or item.get(
-                        "url") or item.get("PathID") or ""
-                    url_fixed = self.fixPath(raw_url) if raw_url else None
-                    icon_url = self.getThumbnailUrl2(item)
-                    item_data = {
-                        "name": item.get("name", ""),
-                        "url": url_fixed,
-                        "icon": icon_url,
-                        "sub-type": item.get("type", item.get("sub_type", ""))
-                    }
-                    items.append(item_data)
-
-            # Case 2: Response with blocks structure
-            elif "blocks" in response and isinstance(response["blocks"], list):
-                print("[DEBUG] Found 'blocks' structure")
-                for block in response["blocks"]:
-                    block_type = block.get("type", "")
-                    print(
-                        "[DEBUG] Processing block type: {}".format(block_type))
-                    if block_type == "RaiPlay Slider Generi Block":
-                        for j, item in enumerate(block.get("contents", [])):
-                            raw_url = item.get(
-                                "path_id") or item.get("url") or ""
-                            url_fixed = self.fixPath(
-                                raw_url) if raw_url else None
-                            icon_url = self.getFullUrl(item.get("image", ""))
-                            item_data = {
-                                "name": item.get("name", ""),
-                                "url": url_fixed,
-                                "icon": icon_url,
-                                "sub-type": item.get("sub_type", "")
-                            }
-                            print("[DEBUG] Adding genre item: {} URL:{} ICON:{}".format(
-                                item_data["name"], item_data["url"], item_data["icon"]))
-                            items.append(item_data)
-
-                    elif block_type == "RaiPlay Multimedia Block":
-                        for j, item in enumerate(block.get("sets", [])):
-
-                            print(
-                                "[DEBUG] Set #{}: {}".format(
-                                    j, item.get(
-                                        "name", "no-name")))
-
-                            icon_url = self.getThumbnailUrl2(item)
-
-                            raw_url = item.get(
-                                "path_id") or item.get("url") or ""
-
-                            url_fixed = self.fixPath(
-                                raw_url) if raw_url else None
-                            item_data = {
-                                "name": item.get("name", ""),
-                                "url": url_fixed,
-                                "icon": icon_url,
-                                "sub-type": item.get("type", "")
-                            }
-                            items.append(item_data)
-
-                    elif block_type == "RaiPlay Lista Programmi Block":
-                        for content in block.get("contents", []):
-
-                            raw_url = content.get(
-                                "path_id") or content.get("PathID") or ""
-
-                            url_fixed = self.fixPath(
-                                raw_url) if raw_url else None
-                            icon_url = self.getThumbnailUrl2(content)
-                            item_data = {
-                                "name": content.get("name", ""),
-                                "url": url_fixed,
-                                "icon": icon_url,
-                                "sub-type": content.get("type", "")
-                            }
-                            items.append(item_data)
-
-            # Case 3: Nested 'contents' structure
-            elif "contents" in response and isinstance(response["contents"], list):
-                print("[DEBUG] Found 'contents' array")
-                for content_block in response["contents"]:
-                    if "contents" in content_block and isinstance(
-                            content_block["contents"], list):
-
-                        for item in content_block["contents"]:
-
-                            raw_url = item.get(
-                                "path_id") or item.get("PathID") or ""
-
-                            url_fixed = self.fixPath(
-                                raw_url) if raw_url else None
-                            icon_url = self.getThumbnailUrl2(item)
-                            item_data = {
-                                "name": item.get("name", ""),
-                                "url": url_fixed,
-                                "icon": icon_url,
-                                "sub-type": item.get("type", "")
-                            }
-                            items.append(item_data)
-
-            # Case 4: Alphabetical AZ list
-            elif any(key in response for key in ["A", "B", "0-9"]):
-                print("[DEBUG] Found AZ list structure")
-                az_keys = ['0-9'] + [chr(ord('A') + i) for i in range(26)]
-                for key in az_keys:
-                    if key in response and response[key]:
-                        for item in response[key]:
-                            name = item.get("name", "")
-                            if not name:
-                                continue
-                            raw_url = item.get(
-                                "path_id") or item.get("PathID") or ""
-                            url_fixed = self.fixPath(
-                                raw_url) if raw_url else None
-                            icon_url = self.getThumbnailUrl2(item)
-                            item_data = {
-                                "name": name,
-                                "url": url_fixed,
-                                "icon": icon_url,
-                                "sub-type": item.get("type", "PLR programma Page")
-                            }
-                            items.append(item_data)
+            items = extract_category(response, self)
             print("[DEBUG] Found {} items in category".format(len(items)))
             return items
 
@@ -2128,7 +2252,7 @@ class RaiPlayAPI:
         """Retrieve detailed information about a program including blocks and typology."""
         # url = self.prepare_url(url)
         url = self.getFullUrl(url)
-        data = Utils.getUrlSiVer(url)
+        data = Utils.getUrlBytes(url)
         if not data:
             return None
 
@@ -2179,7 +2303,7 @@ class RaiPlayAPI:
     def getProgramItems(self, url):
         """Retrieve program elements for radio programs."""
         url = self.getFullUrl(url)
-        data = Utils.getUrlSiVer(url)
+        data = Utils.getUrlBytes(url)
         if not data:
             return []
 
@@ -2228,92 +2352,86 @@ class RaiPlayAPI:
                 "User-Agent": USER_AGENT,
                 "Referer": "https://www.rainews.it/notiziari/{}/".format(tg_channel)}
 
-            # Perform the HTTP request
-            response = requests.get(
-                archive_url,
-                params=params,
-                headers=headers,
-                timeout=15,
-                verify=False)
-            response.raise_for_status()
-            content = response.text
-
-            # DEBUG: Save the HTML for analysis
-            if DEBUG_MODE:
-                file_path = join(
-                    self.debug_dir,
-                    "{}_archive_{}.html".format(
-                        tg_channel,
-                        page))
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                print("[DEBUG] Saved archive page -> {}".format(file_path))
+            # Read the page only up to the paginator and the archive data,
+            # keep the cards of its content blocks
+            attrs = dict(AGGREGATOR_DATA)
+            attrs.update(PAGINATOR_ATTRS)
+            try:
+                result = get_offload().run(new_job(
+                    archive_url, [("contents",)], ARCHIVE_CARD_FIELDS,
+                    nested=("cards",), html=attrs, document='data',
+                    keep_document=DEBUG_MODE, headers=headers,
+                    params=params, timeout=15, verify=False))
+            except Exception as e:
+                print("[HTML STREAM] Error fetching {}: {}".format(archive_url, e))
+                result = None
+            found = result["found"] if result and result["status"] < 400 else {}
 
             # Extract pagination information
             pagination_info = {}
-            pagination_match = search(
-                r'<rainews-paginator\s+pageindex="(\d+)"\s+pagesize="(\d+)"\s+length="(\d+)"',
-                content)
-            if pagination_match:
-                total_items = int(pagination_match.group(3))
-                page_size = int(pagination_match.group(2))
+            try:
+                total_items = int(found['length'])
+                page_size = int(found['pagesize'])
                 pagination_info = {
-                    "current_page": int(pagination_match.group(1)),
+                    "current_page": int(found['pageindex']),
                     "page_size": page_size,
                     "total_items": total_items,
                     "total_pages": (total_items + page_size - 1) // page_size
                 }
+            except (KeyError, ValueError, ZeroDivisionError):
+                pass
 
-            # 1. Extract JSON from <rainews-aggregator-broadcast-archive> tag
-            json_match = search(
-                r'<rainews-aggregator-broadcast-archive\s+data="([^"]+)"',
-                content
-            )
-
-            if not json_match:
+            # 1. JSON from the <rainews-aggregator-broadcast-archive> tag
+            if not result or not result["items"]:
                 print("JSON data not found in HTML!")
                 return {"videos": [], "pagination": {}}
 
-            # Decode JSON (remove HTML escaping)
-            json_str = html_unescape(json_match.group(1))
-            data = loads(json_str)
+            # DEBUG: Save the archive JSON for analysis
+            if DEBUG_MODE and 'data' in found:
+                file_path = join(
+                    self.debug_dir,
+                    "{}_archive_{}.json".format(
+                        tg_channel,
+                        page))
+                with open(file_path, "w", encoding="utf-8") as f:
+                    f.write(found['data'])
+                print("[DEBUG] Saved archive data -> {}".format(file_path))
 
-            # 2. Extract video editions from JSON
+            # 2. Extract video editions from the cards
             videos = []
-            for content_block in data.get("contents", []):
-                for card in content_block.get("cards", []):
-                    broadcast = card.get("broadcast", {})
-                    edition = broadcast.get("edition", {})
-
-                    # Use the 'link' field for the video page URL
-                    video_path = card.get("link", "")
-                    if not video_path:
-                        continue
+            for card in result["items"]:
+                broadcast = card.get("broadcast", {})
+                edition = broadcast.get("edition", {})
 
-                    video_page_url = "https://www.rainews.it" + video_path
+                # Use the 'link' field for the video page URL
+                video_path = card.get("link", "")
+                if not video_path:
+                    continue
 
-                    # Extract information for display
-                    title = card.get("title", edition.get("title", "No title"))
-                    date_str = "{} {}".format(
-                        edition.get(
-                            "date", ""), edition.get(
-                            "hour", ""))
-                    duration = card.get("duration", "")
+                video_page_url = "https://www.rainews.it" + video_path
 
-                    # Use the existing function for thumbnail
-                    img_url = self.getThumbnailUrl2(card)
+                # Extract information for display
+                title = card.get("title", edition.get("title", "No title"))
+                date_str = "{} {}".format(
+                    edition.get(
+                        "date", ""), edition.get(
+                        "hour", ""))
+                duration = card.get("duration", "")
 
-                    # Add content_url directly if available
-                    content_url = card.get("content_url", "")
+                # Use the existing function for thumbnail
+                img_url = self.getThumbnailUrl2(card)
 
-                    videos.append({
-                        "title": title,
-                        "date": date_str,
-                        "duration": duration,
-                        "page_url": video_page_url,
-                        "content_url": content_url,
-                        "icon": img_url
-                    })
+                # Add content_url directly if available
+                content_url = card.get("content_url", "")
+
+                videos.append({
+                    "title": title,
+                    "date": date_str,
+                    "duration": duration,
+                    "page_url": video_page_url,
+                    "content_url": content_url,
+                    "icon": img_url
+                })
 
             return {
                 "videos": videos,
@@ -2342,27 +2460,19 @@ class RaiPlayAPI:
             return []
 
         try:
-            response = requests.get(
+            # Only the <rainews-player> data is needed, the rest of the
+            # page is never downloaded
+            found = stream_extract(
                 tg_urls[tg_channel],
+                attrs=PLAYER_DATA,
                 headers=self.HTTP_HEADER,
-                timeout=10)
-            response.raise_for_status()
-            content = response.text
-
-            # Extract the content of <rainews-player> tag using regex
-            player_match = search(
-                r'<rainews-player\s+data=\'(.*?)\'', content, DOTALL)
-            if not player_match:
+                timeout=10,
+                session=get_session())
+            if 'player' not in found:
                 return []
 
-            # Decode HTML entities
-            player_json = player_match.group(1)
-            player_json = player_json.replace(
-                '&quot;', '"').replace(
-                '&#x3D;', '=')
-
             # Convert to Python object
-            player_data = loads(player_json)
+            player_data = loads(found['player'])
 
             # Extract video details
             return [
@@ -2385,7 +2495,7 @@ class RaiPlayAPI:
     def getSportCategories(self):
         """Retrieve the main sports categories from the RAISport API."""
         try:
-            data = Utils.getUrlSiVer(self.RAISPORT_CATEGORIES_URL)
+            data = Utils.getUrlBytes(self.RAISPORT_CATEGORIES_URL)
             if not data:
                 return []
 
@@ -2435,7 +2545,7 @@ class RaiPlayAPI:
     def getSportSubcategories(self, category_key):
         """Get subcategories for a specific sport category"""
         try:
-            data = Utils.getUrlSiVer(self.RAISPORT_CATEGORIES_URL)
+            data = Utils.getUrlBytes(self.RAISPORT_CATEGORIES_URL)
             if not data:
                 return []
 
@@ -2519,14 +2629,9 @@ class RaiPlayAPI:
         try:
             print(
                 "[API] Sending request to: https://www.rainews.it/atomatic/news-search-service/api/v3/search")
-            response = requests.post(
-                self.RAISPORT_SEARCH_URL,
-                headers=headers,
-                json=payload,
-                timeout=15
-            )
+            result = get_offload().run(self.sport_search_job(payload, headers))
 
-            print("[API] Response status: " + str(response.status_code))
+            print("[API] Response status: " + str(result["status"]))
             """
             # import urllib.parse
             # debug_url = "https://www.rainews.it/atomatic/news-search-service/api/v3/search?"
@@ -2539,18 +2644,14 @@ class RaiPlayAPI:
                   # "-H 'Content-Type: application/json' "
                   # "-d '" + dumps(payload) + "'")
             """
-            if response.status_code != 200:
-                print("[API] Error response: " + response.text[:500])
+            if result["status"] != 200:
+                print("[API] Error response: " + str(result["status"]))
                 return {"videos": []}
 
-            data = response.json()
-            print("[API] Response data: " +
-                  str(dumps(data, indent=2)[:500]) + "...")
             videos = []
-            hits = data.get("hits", [])
 
-            # Process only video items
-            for h in hits:
+            # Process only video items, decoded one hit at a time
+            for h in result["items"]:
                 if h.get("data_type") == "video":
                     media = h.get("media", {})
                     video_url = media.get("mediapolis", "")
@@ -2584,21 +2685,48 @@ class RaiPlayAPI:
         """Retrieve a page of sport videos"""
         try:
             print("[Sport] Loading page {} for key: {}".format(page + 1, key))
+            request = self.sport_search_request(key, page, page_size)
+            if not request:
+                return []
+            payload, headers = request
+
+            # Send request, filter only videos while the hits stream in
+            result = get_offload().run(self.sport_search_job(payload, headers))
+
+            if result["status"] != 200:
+                print("[Sport] API error: {}".format(result["status"]))
+                return []
+
+            return result["items"]
+
+        except Exception as e:
+            print("[API] Error getting page " + str(page) + ": " + str(e))
+            return []
+
+    def sport_search_job(self, payload, headers):
+        """parse_jobs job of a sport search page: its video hits"""
+        return new_job(
+            self.RAISPORT_SEARCH_URL, [("hits",)], SPORT_HIT_FIELDS,
+            method="POST", where={"data_type": "video"},
+            headers=headers, json=payload, timeout=15)
 
+    def sport_search_request(self, key, page=0, page_size=50):
+        """(payload, headers) of a sport search page, None if unknown key"""
+        try:
             # Load categories if needed
             if not hasattr(
                     self,
                     'categories_data') or not self.categories_data:
                 self.categories_data = self.load_categories_cached()
                 if not self.categories_data:
-                    return []
+                    return None
 
             # Find the category node
             category_node = self.find_category_by_unique_name(
                 self.categories_data, key)
             if not category_node:
                 print("[Sport] Category not found: {}".format(key))
-                return []
+                return None
 
             # Prepare request
             dominio = "RaiNews|Category-6dd7493b-f116-45de-af11-7d28a3f33dd2"
@@ -2620,28 +2748,11 @@ class RaiPlayAPI:
                 "User-Agent": USER_AGENT,
                 "X-Requested-With": "XMLHttpRequest"
             }
-
-            # Send request
-            response = requests.post(
-                self.RAISPORT_SEARCH_URL,
-                headers=headers,
-                json=payload,
-                timeout=15
-            )
-
-            if response.status_code != 200:
-                print("[Sport] API error: {}".format(response.status_code))
-                return []
-
-            data = response.json()
-            hits = data.get("hits", [])
-
-            # Filter only videos
-            return [h for h in hits if h.get("data_type") == "video"]
+            return payload, headers
 
         except Exception as e:
-            print("[API] Error getting page " + str(page) + ": " + str(e))
-            return []
+            print("[Sport] Error preparing page " + str(page) + ": " + str(e))
+            return None
 
     def debug_images(self, item):
         """Log all possible image paths in an item for debugging"""
@@ -2714,9 +2825,7 @@ class RaiPlayAPI:
 class RaiPlayMain(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
 
@@ -2780,7 +2889,8 @@ class RaiPlayMain(SafeScreen):
         self['info'].setText(_('Initializing...'))
         self.loading_timer.start(1000, True)
 
-        threading.Thread(target=self.load_program_categories).start()
+        self.load_program_categories()
+        get_epg_warehouse(self.api).refresh_async()
 
         self.updatePoster()
 
@@ -2797,9 +2907,18 @@ class RaiPlayMain(SafeScreen):
         self.session.open(RaiPlaySettings)
 
     def load_program_categories(self):
-        """Load categories synchronously"""
+        """Fetch the on-demand menu on the reactor"""
+        d = self.tasks.track(self.async_api.getOnDemandMenu())
+        d.addCallback(self.gotProgramCategories)
+        d.addErrback(self.programCategoriesError)
+
+    def programCategoriesError(self, failure):
+        print("[DEBUG]Error loading program categories: {}".format(
+            failure.getErrorMessage()))
+        self.categories_loaded = True
+
+    def gotProgramCategories(self, raw_categories):
         try:
-            raw_categories = self.api.getOnDemandMenu()
             self.program_categories = []
 
             for cat in raw_categories:
@@ -2940,9 +3059,7 @@ class RaiPlayMain(SafeScreen):
 class RaiPlayLiveTV(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self['poster'] = Pixmap()
@@ -2953,7 +3070,11 @@ class RaiPlayLiveTV(SafeScreen):
             'cancel': self.close,
             'info': self.infohelp
         }, -2)
+        self.now_next = get_now_next(self.api)
+        self.zap = get_zap_resolver(self.api.process_relinker, self.zapChannels)
         self.onLayoutFinish.append(self._gotPageLoad)
+        self.onClose.append(self.stopNowNext)
+        self.onClose.append(self.zap.stop)
 
     def _gotPageLoad(self):
         """Load live TV channels and prepare the list."""
@@ -2961,6 +3082,7 @@ class RaiPlayLiveTV(SafeScreen):
         self.urls = []
         self.categories = []
         self.dates = []
+        self.channel_titles = []
 
         for item in self.api.getLiveTVChannels():
             prefix = ""
@@ -2978,9 +3100,15 @@ class RaiPlayLiveTV(SafeScreen):
             self.icons.append(item['icon'])
             self.categories.append(item['category'])
             self.dates.append(date_str)
+            self.channel_titles.append(item['title'])
 
-        show_list(self.names, self['text'])
+        # Rows show the cached now/next; the provider reports changes
+        show_list(
+            [self.rowText(idx) for idx in range(len(self.names))],
+            self['text'])
         self['info'].setText(_('Select category'))
+        self.now_next.add_listener(self.nowNextChanged)
+        self.zap.start()
 
         restored = self.restore_state()
         if restored:
@@ -2990,6 +3118,36 @@ class RaiPlayLiveTV(SafeScreen):
                 self["text"].moveToIndex(0)
         self.selectionChanged()
 
+    def rowText(self, idx):
+        name = self.names[idx]
+        if self.categories[idx] != 'live_tv':
+            return name
+        entry = self.now_next.get(self.channel_titles[idx])
+        if not entry:
+            return name
+        text = "{} | {}".format(name.strip(), entry['now'])
+        if entry['next']:
+            text += "  > {} {}".format(entry['next_start'], entry['next'])
+        return text
+
+    def nowNextChanged(self, changed):
+        """Redraw only the rows whose programme changed"""
+        if self.closing or not self.names:
+            return
+        for idx, title in enumerate(self.channel_titles):
+            if title in changed and self.categories[idx] == 'live_tv':
+                update_list_entry(self['text'], idx, self.rowText(idx))
+
+    def zapChannels(self):
+        """(title, url) of the live channels for the zap resolver"""
+        return [
+            (item['title'], normalize_url(item['url']))
+            for item in self.api.getDiretteChannels() if item['url']
+        ]
+
+    def stopNowNext(self):
+        self.now_next.remove_listener(self.nowNextChanged)
+
     def okRun(self):
         """Main method - displays the play/download menu for videos"""
         print("[DEBUG] okRun called in RaiPlayLiveTV")
@@ -3024,6 +3182,7 @@ class RaiPlayLiveTV(SafeScreen):
 
         self.selected_name = name
         self.selected_url = url
+        self.selected_live = self.categories[idx] == 'live_tv'
 
         # Show menu with options
         menu = [
@@ -3031,6 +3190,9 @@ class RaiPlayLiveTV(SafeScreen):
             (_("Download"), "download"),
             (_("Play & Download"), "both")
         ]
+        if self.selected_live:
+            menu.append((_("Schedule Recording"), "record"))
+        menu.append((_("Scheduled Recordings"), "recordings"))
 
         self.session.openWithCallback(
             self.menuCallback,
@@ -3064,30 +3226,111 @@ class RaiPlayLiveTV(SafeScreen):
 
         if action == "play":
             print("[DEBUG] User selected PLAY")
-            self.playDirect(self.selected_name, self.selected_url)
+            self.playDirect(
+                self.selected_name, self.selected_url, live=self.selected_live)
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
+        elif action == "record":
+            self.scheduleRecording()
+        elif action == "recordings":
+            self.showRecordings()
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
+    def getRecorder(self):
+        return get_recorder(self.getDownloadManager().get_real_video_url)
+
+    def scheduleRecording(self):
+        """Ask start offset, then duration, for the selected channel"""
+        menu = [
+            (_("Now"), "0"),
+            (_("In 15 minutes"), "15"),
+            (_("In 30 minutes"), "30"),
+            (_("In 1 hour"), "60"),
+            (_("In 2 hours"), "120"),
+            (_("In 3 hours"), "180")
+        ]
+        self.session.openWithCallback(
+            self.recordingStartCallback,
+            MessageBox,
+            _("Start recording {}:").format(self.selected_name),
+            list=menu
+        )
+
+    def recordingStartCallback(self, choice):
+        if choice is None:
+            return
+        self.record_begin = time.time() + int(choice) * 60
+        menu = [
+            (_("30 minutes"), "30"),
+            (_("1 hour"), "60"),
+            (_("1 hour 30 minutes"), "90"),
+            (_("2 hours"), "120"),
+            (_("3 hours"), "180")
+        ]
+        self.session.openWithCallback(
+            self.recordingDurationCallback,
+            MessageBox,
+            _("Recording length:"),
+            list=menu
+        )
+
+    def recordingDurationCallback(self, choice):
+        if choice is None:
+            return
+        begin = self.record_begin
+        end = begin + int(choice) * 60
+        title = self.selected_name.replace("[LIVE] ", "").strip()
+        record_id = self.getRecorder().add_recording(
+            title, self.selected_url, begin, end)
+        if record_id:
+            message = _("Recording scheduled: {}\n{} - {}").format(
+                title,
+                time.strftime("%d/%m %H:%M", time.localtime(begin)),
+                time.strftime("%H:%M", time.localtime(end)))
+            self.session.open(
+                MessageBox, message, MessageBox.TYPE_INFO, timeout=5)
+        else:
+            self.session.open(
+                MessageBox,
+                _("Too many recordings at the same time"),
+                MessageBox.TYPE_ERROR)
+
+    def showRecordings(self):
+        """List recordings; selecting one removes it"""
+        recordings = self.getRecorder().get_recordings()
+        if not recordings:
+            self.session.open(
+                MessageBox, _("No scheduled recordings"),
+                MessageBox.TYPE_INFO, timeout=5)
+            return
+        menu = [
+            ("{} {} [{}]".format(
+                time.strftime("%d/%m %H:%M", time.localtime(item['begin'])),
+                item['title'], _(item['status'])), item['id'])
+            for item in recordings
+        ]
+        self.session.openWithCallback(
+            self.removeRecordingCallback,
+            MessageBox,
+            _("Select a recording to remove it:"),
+            list=menu
+        )
+
+    def removeRecordingCallback(self, choice):
+        if choice is None:
+            return
+        self.getRecorder().remove_recording(choice)
+
 
 class RaiPlayLiveRadio(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self['poster'] = Pixmap()
@@ -3201,16 +3444,9 @@ class RaiPlayLiveRadio(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -3218,9 +3454,7 @@ class RaiPlayLiveRadio(SafeScreen):
 class RaiPlayReplayDates(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self['poster'] = Pixmap()
@@ -3235,8 +3469,8 @@ class RaiPlayReplayDates(SafeScreen):
 
     def _gotPageLoad(self):
         """Populate the list with the last 8 dates for replay selection"""
-        self.names = []
-        self.dates = []
+        self.names = [_("Search in the last week")]
+        self.dates = ["search"]
 
         today = date.today()
         for i in range(8):  # Last 8 days
@@ -3258,15 +3492,25 @@ class RaiPlayReplayDates(SafeScreen):
             return
 
         date_info = self.dates[idx]
+        if date_info == "search":
+            self.session.openWithCallback(
+                self.searchCallback,
+                VirtualKeyBoard,
+                title=_("Enter search query"),
+                text=""
+            )
+            return
         self.session.open(RaiPlayReplayChannels, date_info)
 
+    def searchCallback(self, text=None):
+        if text and len(text) > 2:
+            self.session.open(RaiPlayReplaySearch, text)
+
 
 class RaiPlayReplayPrograms(SafeScreen):
     def __init__(self, session, channel_info, date):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.channel_info = channel_info
@@ -3292,7 +3536,8 @@ class RaiPlayReplayPrograms(SafeScreen):
         date_api = datetime.strptime(self.date, "%d%m%y").strftime("%d-%m-%Y")
         print("[DEBUG] Converted date for API comparison:", date_api)
 
-        programs = self.api.get_programs(self.channel_info["api"], date_api)
+        programs = get_epg_warehouse(self.api).get_programs(
+            self.channel_info["api"], date_api)
 
         for p in programs:
             self.names.append(p["title"])
@@ -3384,26 +3629,43 @@ class RaiPlayReplayPrograms(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
 
+class RaiPlayReplaySearch(RaiPlayReplayPrograms):
+    """Replay programs of the last week whose title matches a query"""
+
+    def __init__(self, session, query):
+        RaiPlayReplayPrograms.__init__(
+            self, session, {'display': _("Search"), 'api': ""}, query)
+
+    def _gotPageLoad(self):
+        self.names = []
+        self.urls = []
+        self.icons = []
+        for p in get_epg_warehouse(self.api).search(self.date):
+            day = datetime.strptime(p["day"], "%Y-%m-%d").strftime("%d/%m")
+            self.names.append("{} [{}] {}".format(day, p["channel"], p["title"]))
+            self.urls.append(p["url"])
+            self.icons.append(p["icon"])
+
+        if self.names:
+            show_list(self.names, self['text'])
+            self['info'].setText(_('Select program'))
+            self["text"].moveToIndex(0)
+        else:
+            self['info'].setText(_('No programs found'))
+        self.selectionChanged()
+
+
 class RaiPlayReplayChannels(SafeScreen):
     def __init__(self, session, date_info):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.items = []
@@ -3422,28 +3684,17 @@ class RaiPlayReplayChannels(SafeScreen):
 
     def _gotPageLoad(self):
         """Load available replay TV channels for the given date."""
-        url = self.api.CHANNELS_URL
-        data = Utils.getUrlSiVer(url)
-        if not data:
+        channels = self.api.getReplayChannels()
+        if not channels:
             print("[DEBUG] No data returned from URL")
             self['info'].setText(_('Error loading data'))
             return
         try:
-            response = loads(data)
-            channels = response.get("dirette", [])
             for channel in channels:
-                title = channel.get("channel", "")
-                if not title:
-                    continue
-
                 # Store both display name and API name
-                self.names.append(title)
-                self.channels.append({
-                    'display': title,  # Original display name
-                    'api': title.replace(" ", "")  # API expects no spaces
-                })
-                icon = self.api.getThumbnailUrl2(channel)
-                self.icons.append(icon)
+                self.names.append(channel['display'])
+                self.channels.append(channel)
+                self.icons.append(channel['icon'])
 
             if not self.names:
                 self['info'].setText(_('No TV channels available'))
@@ -3479,9 +3730,7 @@ class RaiPlayReplayChannels(SafeScreen):
 class RaiPlayOnDemand(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.categories = []
@@ -3550,9 +3799,7 @@ class RaiPlayOnDemand(SafeScreen):
 class RaiPlayProgramBlocks(SafeScreen):
     def __init__(self, session, name, program_data):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -3632,9 +3879,7 @@ class RaiPlayProgramBlocks(SafeScreen):
 class RaiPlayBlockItems(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -3732,7 +3977,8 @@ class RaiPlayBlockItems(SafeScreen):
         menu = [
             (_("Play"), "play"),
             (_("Download"), "download"),
-            (_("Play & Download"), "both")
+            (_("Play & Download"), "both"),
+            (_("Download All"), "download_all")
         ]
 
         self.session.openWithCallback(
@@ -3765,16 +4011,13 @@ class RaiPlayBlockItems(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
+        elif action == "download_all":
+            print("[DEBUG] User selected DOWNLOAD ALL")
+            self.addAllToDownloadQueue(
+                [(video['title'], video.get('url', '')) for video in self.videos])
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -3782,9 +4025,7 @@ class RaiPlayBlockItems(SafeScreen):
 class RaiPlayOnDemandCategory(SafeScreen):
     def __init__(self, session, name, url, sub_type):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -3831,13 +4072,11 @@ class RaiPlayOnDemandCategory(SafeScreen):
                 icon_url = item.get('icon', "")
                 if not icon_url:
                     icon_url = self.api.getThumbnailUrl2(item)
-                item_data = {
-                    'name': item.get('name', ""),
-                    'url': url_full,
-                    'icon': item.get('icon', ""),
-                    'sub-type': item.get('sub-type', "")
-                }
-                self.items.append(item_data)
+                self.items.append(Item(
+                    item.get('name', ""),
+                    url_full,
+                    item.get('icon', ""),
+                    item.get('sub-type', "")))
                 # CRITICAL: Populate icons list for poster widget
                 self.icons.append(icon_url)
 
@@ -3924,7 +4163,7 @@ class RaiPlayOnDemandCategory(SafeScreen):
         elif sub_type == "RaiPlay Video Item":
             # Direct play from okRun without intermediate screen
             pathId = self.api.getFullUrl(url)
-            data = Utils.getUrlSiVer(pathId)
+            data = Utils.getUrlBytes(pathId)
             if not data:
                 self['info'].setText(_('Error loading video data'))
                 return
@@ -4002,16 +4241,9 @@ class RaiPlayOnDemandCategory(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -4019,9 +4251,7 @@ class RaiPlayOnDemandCategory(SafeScreen):
 class RaiPlayOnDemandAZ(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -4082,9 +4312,7 @@ class RaiPlayOnDemandAZ(SafeScreen):
 class RaiPlayOnDemandIndex(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -4107,7 +4335,7 @@ class RaiPlayOnDemandIndex(SafeScreen):
         Load the program list for the selected index letter and populate UI list
         """
         pathId = self.api.getFullUrl(self.url)
-        data = Utils.getUrlSiVer(pathId)
+        data = Utils.getUrlBytes(pathId)
         if not data:
             self['info'].setText(_('Error loading data'))
             return
@@ -4156,9 +4384,7 @@ class RaiPlayOnDemandIndex(SafeScreen):
 class RaiPlayAllPrograms(SafeScreen):
     def __init__(self, session, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.url = url
@@ -4175,41 +4401,54 @@ class RaiPlayAllPrograms(SafeScreen):
         self.onLayoutFinish.append(self._gotPageLoad)
 
     def _gotPageLoad(self):
+        self.tasks.track(self.loadPrograms())
+
+    @defer.inlineCallbacks
+    def loadPrograms(self):
         """Load all programs and organize them by first letter"""
-        data = Utils.getUrlSiVer(self.url)
-        if not data:
+        try:
+            # Programs of every letter list in 'contents', decoded one at a
+            # time as the document streams in (in the parse worker when
+            # enabled), only the fields used below are kept
+            result = yield get_offload().run_deferred(new_job(
+                self.url, [("contents", "*")], ALL_PROGRAMS_FIELDS,
+                headers={'User-Agent': Utils.RequestAgent()},
+                timeout=budget_timeout(10)), token=self.tasks)
+        except defer.CancelledError:
+            print("[DEBUG][AllPrograms] Loading cancelled")
+            return
+        except Exception as e:
+            print("Error fetching URL " + str(self.url) + ": " + str(e))
+            result = None
+        if self.closing:
+            return
+        if not result or result["status"] >= 400:
             self['info'].setText(_('Error loading data'))
             return
 
         try:
-            response = loads(data)
             programs = []
 
-            # Extract all programs from the contents
-            if "contents" in response and isinstance(
-                    response["contents"], dict):
-                for letter, items in response["contents"].items():
-                    for program in items:
-                        # Get the correct URL - use info_url if available,
-                        # otherwise use path_id
-                        program_url = program.get(
-                            "info_url", program.get("path_id", ""))
-                        if program_url and not program_url.startswith("http"):
-                            program_url = self.api.getFullUrl(program_url)
-
-                        # Ensure it's a JSON URL
-                        if program_url and not program_url.endswith('.json'):
-                            program_url += '.json'
-
-                        programs.append({
-                            'name': program.get("name", ""),
-                            'url': program_url,
-                            'icon': self.api.getThumbnailUrl2(program),
-                            'sub-type': program.get("type", "PLR programma Page")
-                        })
+            for program in result["items"]:
+                # Get the correct URL - use info_url if available,
+                # otherwise use path_id
+                program_url = program.get(
+                    "info_url", program.get("path_id", ""))
+                if program_url and not program_url.startswith("http"):
+                    program_url = self.api.getFullUrl(program_url)
+
+                # Ensure it's a JSON URL
+                if program_url and not program_url.endswith('.json'):
+                    program_url += '.json'
+
+                programs.append(Item(
+                    program.get("name", ""),
+                    program_url,
+                    self.api.getThumbnailUrl2(program),
+                    program.get("type", "PLR programma Page")))
 
             # Sort programs alphabetically
-            programs.sort(key=lambda x: x['name'].lower())
+            programs.sort(key=lambda x: x.name.lower())
 
             # Group programs by first letter
             self.programs_by_letter = {}
@@ -4260,9 +4499,7 @@ class RaiPlayAllPrograms(SafeScreen):
 class RaiPlayProgramsByLetter(SafeScreen):
     def __init__(self, session, letter, programs):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.letter = letter
@@ -4304,7 +4541,7 @@ class RaiPlayProgramsByLetter(SafeScreen):
         program = self.programs[idx]
 
         # First, try to get the content directly
-        content_data = Utils.getUrlSiVer(program['url'])
+        content_data = Utils.getUrlBytes(program['url'])
         if not content_data:
             self.session.open(
                 MessageBox,
@@ -4388,9 +4625,7 @@ class RaiPlayProgramsByLetter(SafeScreen):
 class RaiPlayOnDemandProgram(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -4412,7 +4647,7 @@ class RaiPlayOnDemandProgram(SafeScreen):
         """Load and process program details"""
         url = self.api.prepare_url(self.url)
         print("[DEBUG][Program] Loading program details from: " + url)
-        data = Utils.getUrlSiVer(url)
+        data = Utils.getUrlBytes(url)
         if not data:
             self['info'].setText(_('Error loading data'))
             return
@@ -4573,9 +4808,7 @@ class RaiPlayOnDemandProgram(SafeScreen):
 class RaiPlayContentSet(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -4594,7 +4827,7 @@ class RaiPlayContentSet(SafeScreen):
     def _gotPageLoad(self):
         """Load videos from content set"""
         print("[DEBUG][ContentSet] Loading content set: " + self.url)
-        data = Utils.getUrlSiVer(self.url)
+        data = Utils.getUrlBytes(self.url)
         if not data:
             self['info'].setText(_('Error loading data'))
             return
@@ -4708,7 +4941,8 @@ class RaiPlayContentSet(SafeScreen):
         menu = [
             (_("Play"), "play"),
             (_("Download"), "download"),
-            (_("Play & Download"), "both")
+            (_("Play & Download"), "both"),
+            (_("Download All"), "download_all")
         ]
 
         self.session.openWithCallback(
@@ -4741,16 +4975,13 @@ class RaiPlayContentSet(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
+        elif action == "download_all":
+            print("[DEBUG] User selected DOWNLOAD ALL")
+            self.addAllToDownloadQueue(
+                [(video['title'], video.get('url', '')) for video in self.videos])
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -4758,9 +4989,7 @@ class RaiPlayContentSet(SafeScreen):
 class RaiPlayOnDemandProgramItems(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -4780,7 +5009,7 @@ class RaiPlayOnDemandProgramItems(SafeScreen):
 
     def _gotPageLoad(self):
         pathId = self.api.getFullUrl(self.url)
-        data = Utils.getUrlSiVer(pathId)
+        data = Utils.getUrlBytes(pathId)
         if not data:
             self['info'].setText(_('Error loading data'))
             return
@@ -4884,7 +5113,8 @@ class RaiPlayOnDemandProgramItems(SafeScreen):
         menu = [
             (_("Play"), "play"),
             (_("Download"), "download"),
-            (_("Play & Download"), "both")
+            (_("Play & Download"), "both"),
+            (_("Download All"), "download_all")
         ]
 
         self.session.openWithCallback(
@@ -4917,16 +5147,13 @@ class RaiPlayOnDemandProgramItems(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
+        elif action == "download_all":
+            print("[DEBUG] User selected DOWNLOAD ALL")
+            self.addAllToDownloadQueue(
+                [(video['title'], video.get('url', '')) for video in self.videos])
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -4934,9 +5161,7 @@ class RaiPlayOnDemandProgramItems(SafeScreen):
 class RaiPlayOnAir(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.names = []
@@ -4953,11 +5178,9 @@ class RaiPlayOnAir(SafeScreen):
 
     def loadData(self):
         """Load and display currently airing programs"""
-        url = self.api.ON_AIR_URL  # "https://www.raiplay.it/palinsesto/onAir.json"
         try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            # Shared with the Live TV now/next, 304 when unchanged
+            data = get_now_next(self.api).on_air_data()
 
             self.programs = []
 
@@ -5100,16 +5323,9 @@ class RaiPlayOnAir(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -5118,9 +5334,7 @@ class RaiPlayAZPrograms(SafeScreen):
     def __init__(self, session, program_type):
         self.session = session
         self.program_type = program_type
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.names = []
@@ -5138,6 +5352,10 @@ class RaiPlayAZPrograms(SafeScreen):
         self.onLayoutFinish.append(self.loadData)
 
     def loadData(self):
+        self.tasks.track(self.loadPrograms())
+
+    @defer.inlineCallbacks
+    def loadPrograms(self):
         """Load A-Z program list with improved structure handling"""
         try:
             print("[DEBUG][AZ] Loading " + self.program_type + " programs")
@@ -5152,56 +5370,47 @@ class RaiPlayAZPrograms(SafeScreen):
             url += "?t=" + str(int(time.time()))
 
             print("[DEBUG][AZ] Fetching URL: {}".format(url))
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            result = yield get_offload().run_deferred(new_job(
+                url, [("*",), ()], AZ_FIELDS, timeout=15), token=self.tasks)
+            if self.closing:
+                return
+            if result["status"] >= 400:
+                raise Exception("HTTP {} for {}".format(result["status"], url))
+
+            self.programs = []
+
+            # Dictionary of letter lists (A, B, ..., 0-9) or a plain list,
+            # programs decoded one at a time as the document streams in
+            for program in result["items"]:
+                self.add_program(program)
+
+            if not self.programs:
+                # Unknown layout: load the whole document and search it
+                data = yield self.async_api.http.get_json(url, timeout=15)
+                if self.closing:
+                    return
+                if isinstance(data, (dict, list)):
+                    self.programs = self.extract_programs_alternative(data)
+
+                if not self.programs:
+                    self['info'].setText(_('No programs found in A-Z list'))
+                    if isinstance(data, dict):
+                        print("[DEBUG][AZ] No programs found. JSON keys: " +
+                              str(list(data.keys())))
+                    else:
+                        print("[DEBUG][AZ] No programs found. JSON keys: N/A")
+                    return
 
-            # Debug: save JSON for analysis
+            # Debug: save the program list for analysis
             if DEBUG_MODE:
                 debug_path = join(
                     self.api.debug_dir,
                     "az_{}.json".format(
                         self.program_type))
                 with open(debug_path, "w", encoding="utf-8") as f:
-                    dump(data, f, indent=2)
+                    dump(self.programs, f, indent=2)
                 print("[DEBUG][AZ] Saved JSON to {}".format(debug_path))
 
-            self.programs = []
-
-            # Handle different JSON structures
-            if isinstance(data, dict):
-                # Dictionary format: keys are letters (A, B, ..., 0-9)
-                print("[DEBUG][AZ] Processing dictionary format")
-                for letter, items in data.items():
-                    if isinstance(items, list):
-                        for program in items:
-                            self.add_program(program)
-                    else:
-                        print("[WARNING] Unexpected data type for letter " +
-                              str(letter) + ": " + str(type(items)))
-            elif isinstance(data, list):
-                # Array format: list of programs
-                print("[DEBUG][AZ] Processing array format")
-                for program in data:
-                    self.add_program(program)
-            else:
-                print("[ERROR] Unknown JSON format: " + str(type(data)))
-                self['info'].setText(_('Unknown data format'))
-                return
-
-            if not self.programs:
-                # Try alternative parsing method
-                self.programs = self.extract_programs_alternative(data)
-
-            if not self.programs:
-                self['info'].setText(_('No programs found in A-Z list'))
-                if isinstance(data, dict):
-                    print("[DEBUG][AZ] No programs found. JSON keys: " +
-                          str(list(data.keys())))
-                else:
-                    print("[DEBUG][AZ] No programs found. JSON keys: N/A")
-                return
-
             # Sort alphabetically
             self.programs.sort(key=lambda x: x["title"].lower())
 
@@ -5219,6 +5428,8 @@ class RaiPlayAZPrograms(SafeScreen):
                 if self.names:
                     self["text"].moveToIndex(0)
             self.selectionChanged()
+        except defer.CancelledError:
+            print("[DEBUG][AZ] Loading cancelled")
         except Exception as e:
             print("[DEBUG][AZ] Error loading data: {}".format(str(e)))
             self['info'].setText(
@@ -5375,9 +5586,7 @@ class RaiPlayAZPrograms(SafeScreen):
 class RaiPlayNewsCategories(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.names = []
@@ -5509,9 +5718,7 @@ class RaiPlayNewsCategories(SafeScreen):
 class RaiPlayNewsCategory(SafeScreen):
     def __init__(self, session, name, url, path):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -5567,63 +5774,9 @@ class RaiPlayNewsCategory(SafeScreen):
                 self.handle_thematic_structure(response)
                 return
 
-            # CASE 1: Response with "contents" structure
-            if "contents" in response and isinstance(
-                    response["contents"], list):
-                print("[DEBUG][NewsCategory] Found 'contents' array")
-                for content_block in response["contents"]:
-                    if "contents" in content_block and isinstance(
-                            content_block["contents"], list):
-                        for item in content_block["contents"]:
-                            self.add_news_item(item)
-                    elif "cards" in content_block and isinstance(content_block["cards"], list):
-                        for card in content_block["cards"]:
-                            self.add_news_item(card)
-
-            # CASE 2: Response with direct "cards" structure
-            elif "cards" in response and isinstance(response["cards"], list):
-                print("[DEBUG][NewsCategory] Found direct 'cards' array")
-                for card in response["cards"]:
-                    self.add_news_item(card)
-
-            # CASE 3: Response with "items" structure
-            elif "items" in response and isinstance(response["items"], list):
-                print("[DEBUG][NewsCategory] Found 'items' array")
-                for item in response["items"]:
-                    self.add_news_item(item)
-
-            # CASE 4: New structure for thematic archive
-            elif "tematiche" in response and isinstance(response["tematiche"], list):
-                print("[DEBUG][NewsCategory] Found new thematic structure")
-                self.handle_new_thematic_structure(response)
-                return  # Exit after handling new structure
-
-            if not self.items:
-                print("[DEBUG][NewsCategory] No items found. Response keys: " +
-                      str(list(response.keys())))
-                self['info'].setText(_('No items found in this category'))
-                return
-
-            # If there are no thematics, search for direct contents
-            if not self.items:
-                print(
-                    "[NewsCategory] No subcategories found, searching for direct content")
-                if "contents" in response and isinstance(
-                        response["contents"], list):
-                    for content_block in response["contents"]:
-                        cards = content_block.get("cards", [])
-                        for card in cards:
-                            self.add_news_item(card)
-
-                # If still no items, try alternative parsing
-                if not self.items:
-                    if "cards" in response and isinstance(
-                            response["cards"], list):
-                        for card in response["cards"]:
-                            self.add_news_item(card)
-                    elif "items" in response and isinstance(response["items"], list):
-                        for item in response["items"]:
-                            self.add_news_item(item)
+            # 'contents' blocks of items or cards, direct 'cards' or 'items'
+            for item in iter_items(response, NEWS_CONTAINERS):
+                self.add_news_item(item)
 
             if not self.items:
                 print("[DEBUG][NewsCategory] No items found. Response keys: " +
@@ -5686,7 +5839,7 @@ class RaiPlayNewsCategory(SafeScreen):
             print(
                 "[DEBUG][ThematicArchive] Loading archive: " +
                 str(archive_url))
-            archive_data = Utils.getUrlSiVer(archive_url)
+            archive_data = Utils.getUrlBytes(archive_url)
             if not archive_data:
                 self['info'].setText(_('No archive data found'))
                 return
@@ -5799,7 +5952,7 @@ class RaiPlayNewsCategory(SafeScreen):
             }
 
             try:
-                api_response = requests.post(
+                api_response = get_session().post(
                     "https://www.rainews.it/atomatic/news-search-service/api/v3/search",
                     headers=headers,
                     json=payload,
@@ -5809,7 +5962,7 @@ class RaiPlayNewsCategory(SafeScreen):
                     raise Exception(
                         "API error: " + str(api_response.status_code))
 
-                api_data = api_response.json()
+                api_data = loads(api_response.content)
                 hits = api_data.get("hits", [])
 
                 # Process only videos
@@ -5874,35 +6027,6 @@ class RaiPlayNewsCategory(SafeScreen):
             self['info'].setText(_('Error processing thematic content'))
             traceback.print_exc()
 
-    def handle_new_thematic_structure(self, response):
-        """Handles the new thematic structure (e.g., Environment)"""
-        try:
-            print("[DEBUG][NewThematic] Handling new thematic structure")
-            main_theme = response.get("mainThemeName", "")
-            main_theme_unique = response.get("mainThemeUniqueName", "")
-            category_domain = response.get("categoryDomain", "RaiNews")
-
-            if not main_theme or not main_theme_unique:
-                self['info'].setText(_('No main theme found'))
-                return
-
-            # Prepare the payload for the API request
-            self.archive_payload = {
-                "page": 1,
-                "pageSize": 50,
-                "mode": "archive",
-                "filters": {
-                    "tematica": [main_theme + "|" + main_theme_unique],
-                    "dominio": category_domain
-                }
-            }
-            self.archive_title = main_theme
-            self.openArchiveScreen(main_theme, self.archive_payload)
-        except Exception as e:
-            print("[DEBUG][NewThematic] Error: " + str(e))
-            self['info'].setText(_('Error processing archive'))
-            traceback.print_exc()
-
     def add_news_item(self, item):
         """Add a news item to the list"""
         name = item.get("title") or item.get("name") or ""
@@ -5923,14 +6047,13 @@ class RaiPlayNewsCategory(SafeScreen):
         icon = self.api.getThumbnailUrl2(item)
 
         # Add to results
-        self.items.append({
-            "name": name,
-            "url": content_url,
-            "page_url": page_url,
-            "icon": icon,
-            "date": item.get("create_date", item.get("date", "")),
-            "type": "video"
-        })
+        self.items.append(Item(
+            name,
+            content_url,
+            icon,
+            date=item.get("create_date", item.get("date", "")),
+            page_url=page_url,
+            kind="video"))
 
     def okRun(self):
         if not self.names or not hasattr(self, 'items'):
@@ -5955,9 +6078,7 @@ class RaiPlayNewsCategory(SafeScreen):
 class RaiPlayNewsAPIArchive(SafeScreen):
     def __init__(self, session, name, api_payload):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -5976,7 +6097,9 @@ class RaiPlayNewsAPIArchive(SafeScreen):
             'prevBouquet': self.prevPage,
             'info': self.infohelp
         }, -2)
+        self.pages = PageCache(self.fetchPage)
         self.onLayoutFinish.append(self.loadData)
+        self.onClose.append(self.pages.close)
 
     def restore_state(self):
         """Disable state restoration for this screen"""
@@ -5988,56 +6111,72 @@ class RaiPlayNewsAPIArchive(SafeScreen):
         print("[DEBUG][APIArchive] Skipping state saving")
         pass
 
-    def loadData(self):
-        """Reset state before loading data"""
-        self.videos = []
-        self.names = []
-        self['info'].setText(_('Loading archive data...'))
-        print("[DEBUG][APIArchive] Loading archive for: {}".format(self.name))
-        print("[DEBUG][APIArchive] Payload: {}".format(
-            dumps(self.api_payload, indent=2)))
-
+    def fetchPage(self, page):
+        """
+        Download one archive page (runs in the page cache thread too).
+        Returns the video list, or None on HTTP error.
+        """
         headers = {
             "Accept": "application/json, text/javascript, */*; q=0.01",
             "Content-Type": "application/json; charset=UTF-8",
             "User-Agent": USER_AGENT,
             "X-Requested-With": "XMLHttpRequest"
         }
+        payload = dict(self.api_payload, page=page)
 
-        self.api_payload["page"] = self.current_page
+        response = get_session().post(
+            "https://www.rainews.it/atomatic/news-search-service/api/v3/search",
+            headers=headers,
+            json=payload,
+            timeout=15)
 
-        try:
-            response = requests.post(
-                "https://www.rainews.it/atomatic/news-search-service/api/v3/search",
-                headers=headers,
-                json=self.api_payload,
-                timeout=15)
+        if response.status_code != 200:
+            return None
 
-            if response.status_code != 200:
-                self['info'].setText(_('Error loading archive data'))
-                return
+        data = loads(response.content)
+        hits = data.get("hits", [])
+        if len(hits) < self.page_size:
+            # Short page: nothing after this one
+            self.pages.last_page = page
 
-            data = response.json()
-            hits = data.get("hits", [])
+        videos = []
+        for hit in hits:
+            if hit.get("data_type") == "video":
+                media = hit.get("media", {})
+                content_url = media.get("mediapolis", "")
+                if not content_url:
+                    continue
 
-            self.videos = []
-            for hit in hits:
-                if hit.get("data_type") == "video":
-                    media = hit.get("media", {})
-                    content_url = media.get("mediapolis", "")
-                    if not content_url:
-                        continue
+                if not content_url.startswith("http"):
+                    content_url = "https://mediapolisvod.rai.it" + content_url
 
-                    if not content_url.startswith("http"):
-                        content_url = "https://mediapolisvod.rai.it" + content_url
+                videos.append({
+                    "title": hit.get("title", ""),
+                    "url": content_url,
+                    "date": hit.get("create_date", ""),
+                    "icon": self.api.getThumbnailUrl2(hit),
+                    "duration": media.get("duration", "")
+                })
+        return videos
 
-                    self.videos.append({
-                        "title": hit.get("title", ""),
-                        "url": content_url,
-                        "date": hit.get("create_date", ""),
-                        "icon": self.api.getThumbnailUrl2(hit),
-                        "duration": media.get("duration", "")
-                    })
+    def loadData(self):
+        """Reset state before loading data"""
+        self.videos = []
+        self.names = []
+        self['info'].setText(_('Loading archive data...'))
+        print("[DEBUG][APIArchive] Loading archive for: {}".format(self.name))
+        print("[DEBUG][APIArchive] Payload: {}".format(
+            dumps(self.api_payload, indent=2)))
+
+        try:
+            videos = self.pages.get(self.current_page)
+            if videos is None:
+                self['info'].setText(_('Error loading archive data'))
+                return
+
+            self.videos = list(videos)
+            # Next page is ready by the time the user asks for it
+            self.pages.prefetch(self.current_page + 1)
 
             if not self.videos:
                 self['info'].setText(_('No videos available'))
@@ -6074,6 +6213,9 @@ class RaiPlayNewsAPIArchive(SafeScreen):
                     str(e)))
 
     def nextPage(self):
+        last_page = self.pages.last_page
+        if last_page is not None and self.current_page >= last_page:
+            return
         self["text"].setList([])
         self.current_page += 1
         self.loadData()
@@ -6088,43 +6230,7 @@ class RaiPlayNewsAPIArchive(SafeScreen):
         """Extract the video URL from the page and play it"""
         self['info'].setText(_('Extracting video URL...'))
         try:
-            page_data = Utils.getUrlSiVer(video["page_url"])
-            if not page_data:
-                self['info'].setText(_('Error loading video page'))
-                return
-
-            # Find the video URL in the page
-            video_url = None
-
-            # Method 1: Search for the rainews-player component
-            player_match = search(
-                r'<rainews-player\s+data=\'([^\']+)\'',
-                page_data
-            )
-            if player_match:
-                try:
-                    player_json = player_match.group(1).replace('&quot;', '"')
-                    player_data = loads(player_json)
-                    video_url = player_data.get("content_url", "")
-                except Exception as e:
-                    print("[ERROR] parsing player JSON: " + str(e))
-
-            # Method 2: Search for direct URL in JSON
-            if not video_url:
-                json_match = search(
-                    r'"content_url"\s*:\s*"([^"]+)"', page_data)
-                if json_match:
-                    video_url = json_match.group(1)
-
-            # Method 3: Search for direct video source
-            if not video_url:
-                source_match = search(
-                    r'<source\s+src="([^"]+)"\s+type="video/[^"]+"',
-                    page_data
-                )
-                if source_match:
-                    video_url = source_match.group(1)
-
+            video_url = extract_rainews_video_url(video["page_url"])
             if video_url:
                 if not video_url.startswith("http"):
                     video_url = "https://www.rainews.it" + video_url
@@ -6151,9 +6257,7 @@ class RaiPlayNewsAPIArchive(SafeScreen):
 class RaiPlayTG(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.names = []
@@ -6204,9 +6308,7 @@ class RaiPlayTG(SafeScreen):
 class RaiPlayTGList(SafeScreen):
     def __init__(self, session, channel):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.channel = channel
@@ -6332,16 +6434,9 @@ class RaiPlayTGList(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -6349,9 +6444,7 @@ class RaiPlayTGList(SafeScreen):
 class RaiPlayTGArchive(SafeScreen):
     def __init__(self, session, channel):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.channel = channel
@@ -6368,7 +6461,14 @@ class RaiPlayTGArchive(SafeScreen):
             'prevBouquet': self.prevPage,
             'info': self.infohelp
         }, -2)
+        self.pages = PageCache(self.fetchPage)
         self.onLayoutFinish.append(self.loadData)
+        self.onClose.append(self.pages.close)
+
+    def fetchPage(self, page):
+        """Archive page for the page cache; empty pages are not cached"""
+        archive_data = self.api.get_tg_archive(self.channel, page)
+        return archive_data if archive_data.get("videos") else None
 
     def loadData(self):
         """
@@ -6376,13 +6476,17 @@ class RaiPlayTGArchive(SafeScreen):
         """
         self['info'].setText(_('Loading archive data...'))
 
-        archive_data = self.api.get_tg_archive(self.channel, self.current_page)
+        archive_data = self.pages.get(self.current_page) or {}
         self.videos = archive_data.get("videos", [])
         pagination = archive_data.get("pagination", {})
 
         self.total_pages = pagination.get("total_pages", 1)
         self.total_items = pagination.get("total_items", 0)
 
+        # Paginator metadata bounds the prefetch
+        self.pages.last_page = self.total_pages
+        self.pages.prefetch(self.current_page + 1)
+
         if not self.videos:
             self['info'].setText(_('No editions available'))
             return
@@ -6509,16 +6613,9 @@ class RaiPlayTGArchive(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -6526,9 +6623,7 @@ class RaiPlayTGArchive(SafeScreen):
 class RaiPlayTGR(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.names = []
@@ -6653,9 +6748,7 @@ class RaiPlayTGR(SafeScreen):
 class RaiPlayTGDirectArchive(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -6872,39 +6965,7 @@ class RaiPlayTGDirectArchive(SafeScreen):
         """Extract the actual video URL from the video page"""
         self['info'].setText(_('Extracting video URL...'))
         try:
-            page_data = Utils.getUrlSiVer(video["page_url"])
-            if not page_data:
-                self['info'].setText(_('Error loading video page'))
-                return
-
-            # Find the video URL in the page
-            video_url = None
-
-            # Method 1: Look for content_url in JSON
-            json_match = search(r'content_url\s*:\s*"([^"]+)"', page_data)
-            if json_match:
-                video_url = json_match.group(1)
-
-            # Method 2: Look for rainews-player data
-            if not video_url:
-                player_match = search(
-                    r'<rainews-player\s+data=\'([^\']+)\'', page_data)
-                if player_match:
-                    try:
-                        player_json = player_match.group(
-                            1).replace('&quot;', '"')
-                        player_data = loads(player_json)
-                        video_url = player_data.get("content_url", "")
-                    except BaseException:
-                        pass
-
-            # Method 3: Look for video source
-            if not video_url:
-                source_match = search(
-                    r'<source\s+src="([^"]+)"\s+type="video/[^"]+"', page_data)
-                if source_match:
-                    video_url = source_match.group(1)
-
+            video_url = extract_rainews_video_url(video["page_url"])
             if video_url:
                 if not video_url.startswith("http"):
                     video_url = "https://www.rainews.it" + video_url
@@ -7015,9 +7076,7 @@ class RaiPlayTGDirectArchive(SafeScreen):
 class tgrRai2(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -7145,9 +7204,7 @@ class tgrRai2(SafeScreen):
 class tgrRai3(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.name = name
@@ -7248,9 +7305,7 @@ class tgrRai3(SafeScreen):
 class tgrRai4(SafeScreen):
     def __init__(self, session, name, url):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -7383,16 +7438,9 @@ class tgrRai4(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -7400,9 +7448,7 @@ class tgrRai4(SafeScreen):
 class RaiPlaySport(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.navigation_stack = []
@@ -7528,9 +7574,7 @@ class RaiPlaySport(SafeScreen):
 class RaiPlaySportVideos(SafeScreen):
     def __init__(self, session, name, key, dominio, parent=None):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = True
         self.name = name
@@ -7559,9 +7603,10 @@ class RaiPlaySportVideos(SafeScreen):
         if not self.loading:
             self.loading = True
             self['info'].setText(_('Loading all videos... Please wait'))
-            threading.Thread(target=self.loadVideosThread).start()
+            self.tasks.track(self.loadVideos())
 
-    def loadVideosThread(self):
+    @defer.inlineCallbacks
+    def loadVideos(self):
         """Load ALL available videos removing duplicates"""
         try:
             print("[DEBUG][Sport] Loading ALL videos for key: " + str(self.key))
@@ -7570,16 +7615,18 @@ class RaiPlaySportVideos(SafeScreen):
             unique_videos = []  # List for unique videos
 
             while page < max_pages:
-                videos = self.api.get_sport_videos_page(
+                videos = yield self.async_api.get_sport_videos_page(
                     self.key,
                     page,
                     self.page_size
                 )
 
+                if self.cancel_loading or self.closing:
+                    return
                 if not videos:
                     break
 
-                # Filter duplicates and add unique videos
+                # Filter duplicates and keep only the fields shown/played
                 for video in videos:
                     # Create a unique identifier based on title and date
                     title = video.get("title", "")
@@ -7591,10 +7638,14 @@ class RaiPlaySportVideos(SafeScreen):
                     # If this video was not already seen, add it
                     if video_id not in self.seen_videos:
                         self.seen_videos.add(video_id)
-                        unique_videos.append(video)
+                        unique_videos.append(Item(
+                            title,
+                            video.get("media", {}).get("mediapolis", ""),
+                            self.get_video_icon(video),
+                            date=date_str,
+                            duration=video.get("duration", "")))
 
                 page += 1
-                time.sleep(0.1)
 
                 self['title'].setText(
                     "Loading all videos... Please wait - " +
@@ -7606,13 +7657,7 @@ class RaiPlaySportVideos(SafeScreen):
 
             # Sort videos by date (most recent first)
             try:
-                unique_videos.sort(
-                    key=lambda v: v.get(
-                        "create_date",
-                        v.get(
-                            "publication_date",
-                            "")),
-                    reverse=True)
+                unique_videos.sort(key=lambda v: v.date, reverse=True)
 
             except Exception as e:
                 print("[DEBUG][Sport] Sorting error: " + str(e))
@@ -7623,6 +7668,8 @@ class RaiPlaySportVideos(SafeScreen):
 
             # Show the first page
             self.showCurrentPage()
+        except defer.CancelledError:
+            print("[DEBUG][Sport] Loading cancelled")
         except Exception as e:
             print("[DEBUG][Sport] Error loading videos: " + str(e))
             self.session.open(
@@ -7648,11 +7695,9 @@ class RaiPlaySportVideos(SafeScreen):
 
         # 3. Add videos of the current page
         for video in page_videos:
-            title = video.get("title", "No title")
-            date_str = video.get(
-                "create_date", video.get(
-                    "publication_date", ""))
-            duration = video.get("duration", "")
+            title = video.name or "No title"
+            date_str = video.date
+            duration = video.duration
 
             try:
                 dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
@@ -7670,7 +7715,7 @@ class RaiPlaySportVideos(SafeScreen):
 
             self.displayed_videos.append(video)
             self.names.append(display_title)
-            self.icons.append(self.get_video_icon(video))
+            self.icons.append(video.icon)
 
         # 4. Add "Next page" if there are more pages
         if self.current_page < self.total_pages - 1:
@@ -7724,8 +7769,7 @@ class RaiPlaySportVideos(SafeScreen):
     def playVideo(self, video):
         """Play a video"""
         try:
-            media = video.get("media", {})
-            content_url = media.get("mediapolis", "")
+            content_url = video.get("url", "")
             if not content_url:
                 raise ValueError(_("Video URL not found"))
 
@@ -7786,8 +7830,7 @@ class RaiPlaySportVideos(SafeScreen):
 
         # Get video information
         name = item.get("title", "No title")
-        media = item.get("media", {})
-        url = media.get("mediapolis", "")
+        url = item.get("url", "")
 
         if not url:
             print(f"[DEBUG] No URL found for video: {name}")
@@ -7847,16 +7890,9 @@ class RaiPlaySportVideos(SafeScreen):
         elif action == "download":
             print("[DEBUG] User selected DOWNLOAD")
             self.addToDownloadQueue(self.selected_name, self.selected_url)
-        elif action == "play & download":
+        elif action in ("both", "play & download"):
             print("[DEBUG] User selected BOTH")
-            self.playDirect(self.selected_name, self.selected_url)
-            # Add small delay before starting download
-            timer = eTimer()
-            timer.callback.append(
-                lambda: self.addToDownloadQueue(
-                    self.selected_name,
-                    self.selected_url))
-            timer.start(1000, True)  # 1 second delay
+            self.playAndDownload(self.selected_name, self.selected_url)
         else:
             print(f"[DEBUG] Unknown action: {action}")
 
@@ -7864,9 +7900,7 @@ class RaiPlaySportVideos(SafeScreen):
 class RaiPlayPrograms(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.names = []
@@ -8044,9 +8078,7 @@ class RaiPlaySearch(SafeScreen):
     def __init__(self, session, program_categories):
         self.session = session
         self.program_categories = program_categories
-        skin = join(skin_path, 'settings.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('settings.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         self.names = []
@@ -8116,12 +8148,11 @@ class RaiPlaySearch(SafeScreen):
                         program_url = self.api.prepare_url(
                             program.get('url', ''))
 
-                        self.results.append({
-                            'title': program['name'],
-                            'url': program_url,
-                            'icon': program.get('icon', self.api.DEFAULT_ICON_URL),
-                            'sub-type': program.get('sub-type', '')
-                        })
+                        self.results.append(Item(
+                            program['name'],
+                            program_url,
+                            program.get('icon', self.api.DEFAULT_ICON_URL),
+                            program.get('sub-type', '')))
 
             if not self.results:
                 self['info'].setText(_('No programs found for: ') + self.query)
@@ -8321,18 +8352,20 @@ class Playstream2(
     ALLOW_SUSPEND = True
     screen_timeout = 5000
 
-    def __init__(self, session, name, url):
+    def __init__(self, session, name, url, live=False):
         Screen.__init__(self, session)
         self.session = session
         self.skinName = 'MoviePlayer'
         self.api = RaiPlayAPI()
         self.name = name
         self.url = url
+        self.live = live
         self.state = self.STATE_PLAYING
         self.allowPiP = False
         self.service = None
         self.license_key = None
         self.servicetype = '4097'
+        self.hls_proxy = None
         for base in [
             InfoBarMenu, InfoBarNotifications, InfoBarBase,
             TvInfoBarShowHide, InfoBarAudioSelection, InfoBarSubtitleSupport
@@ -8362,12 +8395,14 @@ class Playstream2(
                 "stop": self.leavePlayer,
                 "cancel": self.cancel,
                 "back": self.cancel,
+                "blue": self.showBufferHealth,
                 "playpauseService": self.playpauseService
             },
             -1
         )
         self.srefInit = self.session.nav.getCurrentlyPlayingServiceReference()
         self.onFirstExecBegin.append(self.startPlayback)
+        self.onClose.append(self.stopHLSProxy)
 
     def startPlayback(self):
         """Start playback with the appropriate method"""
@@ -8375,15 +8410,31 @@ class Playstream2(
             print("[DEBUG][Player] Starting: {}".format(self.name))
             print("[DEBUG][Player] URL: {}".format(self.url))
 
+            # Live channels pre-resolved by the zap resolver start at once
+            warm = warm_url(self.url)
+            if warm:
+                self.url, self.license_key = warm
+                print("[DEBUG][Player] Warm URL: {}".format(self.url))
+
             # If the URL is a relinker, extract URL and license key
             if 'relinkerServlet' in self.url:
-                self.url, self.license_key = self.api.process_relinker(
-                    self.url)
+                with deadline_scope(PLAY_DEADLINE):
+                    self.url, self.license_key = self.api.process_relinker(
+                        self.url)
                 print("[DEBUG][Player] Processed URL: {}".format(self.url))
                 print(
                     "[DEBUG][Player] DRM: {}".format(
                         self.license_key is not None))
 
+            # Optional read-ahead proxy for clear HLS streams; live
+            # channels with rewind enabled always go through it
+            rewind = int(config.plugins.raiplay.live_rewind.value) * 60 if self.live else 0
+            if ((config.plugins.raiplay.hlsproxy.value or rewind) and
+                    not self.license_key and '.m3u8' in self.url.lower()):
+                local_url, self.hls_proxy = self.startHLSProxy(rewind)
+                if local_url:
+                    self.url = local_url
+
             # If Widevine DRM content
             if self.license_key:
                 if not check_widevine_ready():
@@ -8599,6 +8650,41 @@ class Playstream2(
         """Show IMDB/TMDB information"""
         returnIMDB(self.session, self.name)
 
+    def showBufferHealth(self):
+        """Show the HLS proxy read-ahead buffer state"""
+        if not self.hls_proxy:
+            return
+        health = self.hls_proxy.health()
+        text = _("Buffered ahead: {} segments ({} s)\nRewind: {} s\nBuffer: {} KB, in flight: {}\nHits: {}, misses: {}\nThroughput: {} KB/s").format(
+            health["segments_ahead"],
+            health["seconds_ahead"],
+            health["rewind_seconds"],
+            health["buffer_bytes"] // 1024,
+            health["inflight"],
+            health["hits"],
+            health["misses"],
+            health["throughput_bps"] // 1024)
+        self.session.open(MessageBox, text, MessageBox.TYPE_INFO, timeout=5)
+
+    def startHLSProxy(self, rewind):
+        prefetch = int(config.plugins.raiplay.hlsproxy_segments.value)
+        if rewind:
+            # Ring buffer lives next to recordings, /tmp is usually RAM
+            return start_hls_proxy(
+                self.url, prefetch=prefetch,
+                buffer_root=join(config.plugins.raiplay.lastdir.value, ".raiplay_rewind"),
+                max_bytes=int(config.plugins.raiplay.live_rewind_size.value) * 1024 * 1024,
+                rewind_seconds=rewind)
+        buffer_root = None
+        if config.plugins.raiplay.hlsproxy_buffer.value == "disk":
+            buffer_root = DISK_BUFFER_ROOT
+        return start_hls_proxy(self.url, prefetch=prefetch, buffer_root=buffer_root)
+
+    def stopHLSProxy(self):
+        if self.hls_proxy:
+            self.hls_proxy.stop()
+            self.hls_proxy = None
+
     def showVideoInfo(self):
         if self.shown:
             self.hideInfobar()
@@ -8634,9 +8720,7 @@ class Playstream2(
 class RaiPlayDownloadManagerScreen(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'download.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('download.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
 
@@ -8979,9 +9063,7 @@ class RaiPlayDownloadManagerScreen(SafeScreen):
 class RaiPlayInfo(SafeScreen):
     def __init__(self, session):
         self.session = session
-        skin = join(skin_path, 'info.xml')
-        with codecs.open(skin, "r", encoding="utf-8") as f:
-            self.skin = f.read()
+        self.skin = load_skin('info.xml')
         SafeScreen.__init__(self, session)
         self.is_video_screen = False
         name = _('WELCOME TO RAI PLAY PLUGINS BY LULULLA')
@@ -9058,6 +9140,21 @@ def main(session, **kwargs):
         )
 
 
+def sessionstart(reason, session=None, **kwargs):
+    """Start the recorder after a restart when recordings are scheduled"""
+    if reason != 0 or session is None:
+        return
+    try:
+        if not hasattr(session, 'download_manager'):
+            session.download_manager = RaiPlayDownloadManager(session)
+        if NOTIFICATION_AVAILABLE:
+            init_notification_system(session)
+        get_recorder(session.download_manager.get_real_video_url)
+    except Exception as e:
+        print("[RECORDER] Cannot start the recorder:", str(e))
+        traceback.print_exc()
+
+
 def Plugins(**kwargs):
     from Plugins.Plugin import PluginDescriptor
     ico_path = 'logo.png'
@@ -9075,6 +9172,9 @@ def Plugins(**kwargs):
             description=desc_plugin,
             where=PluginDescriptor.WHERE_PLUGINMENU,
             icon=ico_path,
-            fnc=main)]
+            fnc=main),
+        PluginDescriptor(
+            where=PluginDescriptor.WHERE_SESSIONSTART,
+            fnc=sessionstart)]
     result.append(extensions_menu)
     return result